@@ -0,0 +1,95 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#######################  README  ####################################
+#                                                                   #
+# This script compares the Bazin fit using finite differences with  #
+# the fit using the closed-form Jacobian, over all filters of the   #
+# light curves in the test fixtures.                                #
+#                                                                   #
+# Usage: python benchmark_bazin_jacobian.py <path_to_data/tests/>   #
+#                                                                   #
+#####################################################################
+
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from resspect import LightCurve
+from resspect.bazin import errfunc, errfunc_smooth, jac_errfunc
+from resspect.bazin import _get_scipy_guess_and_bounds
+
+path_to_data = sys.argv[1] if len(sys.argv) > 1 else 'data/tests/'
+nrepeat = 20
+
+# read all light curves available in the test fixtures
+light_curves = []
+
+lc = LightCurve()
+lc.load_snpcc_lc(path_to_data + 'DES_SN848233.DAT')
+light_curves.append(lc)
+
+lc = LightCurve()
+lc.load_resspect_lc(path_to_data + 'RESSPECT_PHOTO.csv.gz', snid=941867)
+light_curves.append(lc)
+
+lc = LightCurve()
+lc.load_plasticc_lc(path_to_data + 'plasticc_lightcurves.csv.gz',
+                    snid=229855)
+light_curves.append(lc)
+
+# one fitting problem per light curve and filter
+problems = []
+for lc in light_curves:
+    for band in lc.filters:
+        flag = lc.photometry['band'].values == band
+        if sum(flag) > 4:
+            mjd = lc.photometry['mjd'].values[flag]
+            problems.append((mjd - mjd[0],
+                             lc.photometry['flux'].values[flag],
+                             lc.photometry['fluxerr'].values[flag]))
+
+results = {}
+for name in ['finite differences', 'analytic jacobian']:
+    nfev = 0
+    start = time.perf_counter()
+    for i in range(nrepeat):
+        for t, flux, fluxerr in problems:
+            guess, bounds = _get_scipy_guess_and_bounds(t, flux)
+            if name == 'analytic jacobian':
+                res = least_squares(errfunc_smooth, guess, jac=jac_errfunc,
+                                    args=(t, flux, fluxerr), method='trf',
+                                    loss='linear', bounds=bounds)
+                # each jacobian evaluation is 1 extra call
+                nfev += res.nfev + res.njev
+            else:
+                res = least_squares(errfunc, guess, args=(t, flux, fluxerr),
+                                    method='trf', loss='linear',
+                                    bounds=bounds)
+                # each jacobian evaluation costs 5 extra calls
+                nfev += res.nfev + 5 * res.njev
+    elapsed = time.perf_counter() - start
+
+    results[name] = (nfev / (nrepeat * len(problems)),
+                     1e3 * elapsed / (nrepeat * len(problems)))
+
+print('Number of fits: ', len(problems))
+for name, (nfev, msec) in results.items():
+    print('{:>20}: {:6.1f} function evaluations, {:6.2f} ms per fit'.format(
+          name, nfev, msec))
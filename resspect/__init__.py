@@ -22,10 +22,12 @@ from .classifiers import *
 from .cosmo_metric_utils import *
 from .database import *
 from .exposure_time_calculator import *
+from .feature_store import *
 from .fit_lightcurves import *
 from .learn_loop import *
 from .metrics import *
 from .query_strategies import *
+from .sample_partitions import *
 from .plot_results import *
 from .snana_fits_to_pd import *
 from .scripts.build_canonical import main as build_canonical
@@ -49,29 +51,40 @@ __all__ = ['accuracy',
            'build_plasticc_metadata',
            'build_snpcc_canonical',
            'calculate_SNR',
+           'CachedKernelSVC',
            'Canonical',
            'CanonicalPLAsTiCC',
            'Canvas',
            'column_deriv_m',
            'compare_two_fishers',
            'cosmo_metric',
+           'DailyFeaturesWriter',
            'DataBase',
            'ExpTimeCalc',
            'efficiency',
            'errfunc',
+           'errfunc_smooth',
+           'FeaturesWriter',
            'fish_deriv_m',
            'fisher_results',
            'find_most_useful',
+           'fit_bazin_all_batch',
+           'fit_bazin_batch',
            'fit_dataset',
            'fit_scipy',
            'fit_snpcc_bazin',
            'fit_plasticc_bazin',
            'fit_resspect_bazin',
            'fom',
+           'forest_committee',
            'get_cosmo_metric',
+           'get_queryable_flag',
            'get_snpcc_metric',
            'get_SNR_headers',
            'gradient_boosted_trees',
+           'IncrementalKNN',
+           'is_binary_features_file',
+           'jac_errfunc',
            'knn',
            'learn_loop',
            'load_dataset',
@@ -81,15 +94,21 @@ __all__ = ['accuracy',
            'PLAsTiCCPhotometry',
            'make_metrics_plots',
            'plot_snpcc_train_canonical',
+           'predict_in_chunks',
            'purity',
            'random_forest',           
            'random_sampling',
+           'read_features_table',
            'read_fits',
            'run_loop',
            'run_time_domain',
+           'SamplePartitions',
+           'select_queries',
            'SNPCCPhotometry',
            'svm',
            'time_domain_loop',
            'uncertainty_sampling',
-           'update_matrix']
+           'update_classifier',
+           'update_matrix',
+           'write_features_table']
 
@@ -20,10 +20,59 @@ __all__ = ['compute_conditional_entropies_B', 'joint_probs_M_K_impl',
            'exact_batch', 'split_arrays', 'entropy_joint_probs_B_M_C',
            'importance_weighted_entropy_p_b_M_C', 'sample_M_K',
            'from_M_K', 'take_expand', 'fast_multi_choices',
-           'batch_sample']
+           'batch_sample', 'exact_joint_fits', 'adaptive_batch_sample',
+           'importance_weighted_nats_b_M', 'MAX_BYTES']
 
 import numpy as np
 
+# Memory limit, in bytes, for the largest temporary array built by the
+# functions below. Used when their max_bytes argument is None.
+MAX_BYTES = 2 * 1024 ** 3
+
+
+def _chunk_size(bytes_per_row: int, max_bytes=None) -> int:
+    """Number of rows which fit in max_bytes, at least one.
+
+    Parameters
+    ----------
+    bytes_per_row: int
+        Size of the temporary arrays needed for one row.
+    max_bytes: int (optional)
+        Memory limit in bytes. If None, use MAX_BYTES.
+
+    Returns
+    -------
+    int
+    """
+    if max_bytes is None:
+        max_bytes = MAX_BYTES
+    return max(1, int(max_bytes // max(1, bytes_per_row)))
+
+
+def exact_joint_fits(M: int, K: int, C: int, max_bytes=None) -> bool:
+    """Check if exact joint probabilities fit in memory.
+
+    Parameters
+    ----------
+    M: int
+        Number of class combinations of the current batch.
+    K: int
+        Committee size.
+    C: int
+        Number of classes.
+    max_bytes: int (optional)
+        Memory limit in bytes. If None, use MAX_BYTES.
+
+    Returns
+    -------
+    bool
+        True if both the joint for the batch with one more point (M x C x K)
+        and the joint of one candidate (M x C) fit in max_bytes.
+    """
+    if max_bytes is None:
+        max_bytes = MAX_BYTES
+    return 8 * M * C * (K + 1) <= max_bytes
+
 
 ## Conditional Entropy
 def compute_conditional_entropies_B(probs_B_K_C):
@@ -159,10 +208,13 @@ def entropy_from_probs_b_M_C(probs_b_M_C):
     return np.sum(-probs_b_M_C * np.log(probs_b_M_C), axis=(1, 2))
 
 
-def exact_batch(probs_B_K_C, prev_joint_probs_M_K=None):
+def exact_batch(probs_B_K_C, prev_joint_probs_M_K=None, max_bytes=None):
     """Computes entropy of each batch combination based on jointly modelling
     the points.
 
+    Joint probabilities are computed for chunks of data points sized to
+    stay within max_bytes, never for all B at once.
+
     Parameters
     ----------
     probs_B_K_C: np.array
@@ -171,6 +223,8 @@ def exact_batch(probs_B_K_C, prev_joint_probs_M_K=None):
         of data points, K is the committee size and C is the number of classes.
     prev_joint_probs_M_K: np.array (optional)
         Result of joint probability calculations from last run.
+    max_bytes: int (optional)
+        Memory limit for temporary arrays. If None, use MAX_BYTES.
 
     Returns
     -------
@@ -186,21 +240,25 @@ def exact_batch(probs_B_K_C, prev_joint_probs_M_K=None):
     if prev_joint_probs_M_K is None:
         prev_joint_probs_M_K = np.ones((1, K), dtype=np.float64)
 
-    joint_probs_B_M_C = entropy_joint_probs_B_M_C(probs_B_K_C, prev_joint_probs_M_K)
+    M = prev_joint_probs_M_K.shape[0]
 
     # Now we can compute the entropy.
     entropy_B = np.zeros((B,), dtype=np.float64)
 
-    chunk_size = 256
+    # joint probabilities and their log for each data point
+    chunk_size = _chunk_size(2 * 8 * M * C, max_bytes)
 
     for i in range(0, B, chunk_size):
         end_i = i+chunk_size
-        entropy_B[i:end_i] = entropy_from_probs_b_M_C(joint_probs_B_M_C[i:end_i])
+        joint_probs_b_M_C = entropy_joint_probs_B_M_C(probs_B_K_C[i:end_i],
+                                                      prev_joint_probs_M_K)
+        entropy_B[i:end_i] = entropy_from_probs_b_M_C(joint_probs_b_M_C)
 
     return entropy_B
 
 # Not computing an Entropy
-def entropy_joint_probs_B_M_C(probs_B_K_C, prev_joint_probs_M_K):
+def entropy_joint_probs_B_M_C(probs_B_K_C, prev_joint_probs_M_K,
+                              max_bytes=None):
     """ Compute joint probability of each batch.
 
     Parameters
@@ -211,6 +269,9 @@ def entropy_joint_probs_B_M_C(probs_B_K_C, prev_joint_probs_M_K):
         of data points, K is the committee size and C is the number of classes.
     prev_joint_probs_M_K: np.array
         Result of joint probability calculations from last run.
+    max_bytes: int (optional)
+        Memory limit for the output. If None, there is no limit;
+        use exact_batch to stream over data points instead.
 
     Returns
     -------
@@ -221,6 +282,10 @@ def entropy_joint_probs_B_M_C(probs_B_K_C, prev_joint_probs_M_K):
     """
     B, K, C = probs_B_K_C.shape
     M = prev_joint_probs_M_K.shape[0]
+
+    if max_bytes is not None and 8 * B * M * C > max_bytes:
+        raise MemoryError('Joint probabilities need ' + str(8 * B * M * C) +
+                          ' bytes, more than max_bytes=' + str(max_bytes))
     joint_probs_B_M_C = np.empty((B, M, C), dtype=np.float64)
 
     for i in range(B):
@@ -256,7 +321,7 @@ def split_arrays(arr1, arr2, chunk_size):
     return arrays
 
 ## Sampling approaches
-def sample_M_K(probs_N_K_C, S=1000):
+def sample_M_K(probs_N_K_C, S=1000, max_bytes=None, rng=None):
     """ Sample S combinations of class assignments for each data point for each
     committee memember.
 
@@ -268,26 +333,37 @@ def sample_M_K(probs_N_K_C, S=1000):
         of data points, K is the committee size and C is the number of classes.
     S: int (optional)
         Number of samples. Default is 1000.
+    max_bytes: int (optional)
+        Memory limit for temporary arrays. If None, use MAX_BYTES.
+    rng: np.random.Generator (optional)
+        Random number generator. If None, use the global numpy state.
 
     Returns
     -------
     samples_M_K: np.array:
         samples drawn.
     """
-    K = probs_N_K_C.shape[1]
-
-    choices_N_K_S = fast_multi_choices(probs_N_K_C, S)
-
-    expanded_choices_N_K_K_S = choices_N_K_S[:, None, :, :]
-    expanded_probs_N_K_K_C = probs_N_K_C[:, :, None, :]
+    N, K, C = probs_N_K_C.shape
 
-    probs_N_K_K_S = take_expand(expanded_probs_N_K_K_C,
-                                index=expanded_choices_N_K_K_S, dim=-1)
+    choices_N_K_S = fast_multi_choices(probs_N_K_C, S, rng=rng)
 
     # exp sum log seems necessary to avoid 0s?
-    probs_K_K_S = np.exp(np.sum(np.log(probs_N_K_K_S), axis=0,
-                                keepdims=False))
-    samples_K_M = probs_K_K_S.reshape((K, -1))
+    # Sum of logs is accumulated over chunks of data points, gathering
+    # the probability of each committee member for the class sampled from
+    # every other member.
+    log_probs_N_K_C = np.log(probs_N_K_C)
+    log_probs_K_K_S = np.zeros((K, K, S), dtype=np.float64)
+    chunk_size = _chunk_size(8 * K * K * S, max_bytes)
+    members_1_K_1_1 = np.arange(K)[None, :, None, None]
+
+    for i in range(0, N, chunk_size):
+        end_i = min(i+chunk_size, N)
+        points_n_1_1_1 = np.arange(i, end_i)[:, None, None, None]
+        log_probs_n_K_K_S = log_probs_N_K_C[points_n_1_1_1, members_1_K_1_1,
+                                            choices_N_K_S[i:end_i, None]]
+        log_probs_K_K_S += np.sum(log_probs_n_K_K_S, axis=0, keepdims=False)
+
+    samples_K_M = np.exp(log_probs_K_K_S).reshape((K, -1))
 
     samples_M_K = samples_K_M.transpose()
 
@@ -342,15 +418,20 @@ def take_expand(data, index, dim):
 
     return np.take_along_axis(data, index, axis=dim)
 
-def fast_multi_choices(probs_b_C, M):
+def fast_multi_choices(probs_b_C, M, rng=None):
     """ Sample from a categorical distribution.
 
+    Uses the inverse of the cumulative distribution, compared one class at
+    a time, so memory does not grow with M beyond the output.
+
     Parameters
     ----------
     probs_b_C: np.array
         Distribution to sample from.
     M: int
         Number of samples.
+    rng: np.random.Generator (optional)
+        Random number generator. If None, use the global numpy state.
 
     Returns
     -------
@@ -359,17 +440,29 @@ def fast_multi_choices(probs_b_C, M):
 
     """
     probs_B_C = probs_b_C.reshape((-1, probs_b_C.shape[-1]))
-    s = probs_B_C.cumsum(axis=1).repeat(M, axis=0)
-    # Probabilities might not sum to 1. perfectly due to numerical errors.
-    s[:, -1] = 1.
-    r = np.random.rand(probs_B_C.shape[0] * M)[:, np.newaxis]
-    choices = (s <= r).sum(axis=1)
+    B, C = probs_B_C.shape
+    s = probs_B_C.cumsum(axis=1)
+
+    if rng is None:
+        r = np.random.rand(B * M).reshape((B, M))
+    else:
+        r = rng.random((B, M))
+
+    # Probabilities might not sum to 1. perfectly due to numerical errors,
+    # so the last class takes everything above the previous ones.
+    choices = np.zeros((B, M), dtype=np.int64)
+    for c in range(C - 1):
+        choices += s[:, c:c + 1] <= r
+
     choices_b_M = choices.reshape(probs_b_C.shape[:-1] + (M,))
     return choices_b_M
 
-def batch_sample(probs_B_K_C, samples_M_K):
+def batch_sample(probs_B_K_C, samples_M_K, max_bytes=None):
     """ Compute entropy from samples.
 
+    Probabilities are computed for chunks of data points sized to stay
+    within max_bytes, never for all B at once.
+
     Parameters
     ----------
     probs_B_K_C: np.array
@@ -379,39 +472,33 @@ def batch_sample(probs_B_K_C, samples_M_K):
     samples_M_K: np.array
         Sample of class assignments for each data point for each committee
          member.
+    max_bytes: int (optional)
+        Memory limit for temporary arrays. If None, use MAX_BYTES.
 
     Returns
     -------
     entropy_B: np.array
     """
-    probs_B_K_C = probs_B_K_C
-    samples_M_K = samples_M_K
-
     M, K = samples_M_K.shape
     B, K_, C = probs_B_K_C.shape
     assert K == K_
 
-    p_B_M_C = np.empty((B, M, C), dtype=np.float64)
-
-    for i in range(B):
-        np.matmul(samples_M_K, probs_B_K_C[i], out=p_B_M_C[i])
-
-    p_B_M_C /= K
-
     q_1_M_1 = samples_M_K.mean(axis=1, keepdims=True)[None]
 
     # Now we can compute the entropy.
-    # We store it directly on the CPU to save GPU memory.
     entropy_B = np.zeros((B,), dtype=np.float64)
 
-#     chunk_size = 256
-#     for entropy_b, p_b_M_C in split_tensors(entropy_B, p_B_M_C, chunk_size):
-#         entropy_b.copy_(importance_weighted_entropy_p_b_M_C(p_b_M_C, q_1_M_1, M), non_blocking=True)
+    # probabilities and their log for each data point
+    chunk_size = _chunk_size(2 * 8 * M * C, max_bytes)
 
-    chunk_size = 256
     for i in range(0, B, chunk_size):
-        end_i = i+chunk_size
-        entropy_B[i:end_i] = importance_weighted_entropy_p_b_M_C(p_B_M_C[i:end_i], q_1_M_1, M)
+        end_i = min(i+chunk_size, B)
+        p_b_M_C = np.empty((end_i - i, M, C), dtype=np.float64)
+        for j in range(i, end_i):
+            np.matmul(samples_M_K, probs_B_K_C[j], out=p_b_M_C[j - i])
+        p_b_M_C /= K
+        entropy_B[i:end_i] = importance_weighted_entropy_p_b_M_C(p_b_M_C,
+                                                                 q_1_M_1, M)
 
     return entropy_B
 
@@ -432,3 +519,114 @@ def importance_weighted_entropy_p_b_M_C(p_b_M_C, q_1_M_1, M: int):
     entropy: np.array
     """
     return np.sum(-np.log(p_b_M_C) * p_b_M_C / q_1_M_1, axis=(1, 2)) / M
+
+def importance_weighted_nats_b_M(probs_b_K_C, samples_M_K):
+    """ Compute the contribution of each sample to the importance weighted
+    entropy, whose mean over samples is given by batch_sample.
+
+    Parameters
+    ----------
+    probs_b_K_C: np.array
+        Classification probabilitity distributions for a few data points.
+    samples_M_K: np.array
+        Sample of class assignments for each data point for each committee
+         member.
+
+    Returns
+    -------
+    nats_b_M: np.array
+    """
+    K = samples_M_K.shape[1]
+    q_1_M = samples_M_K.mean(axis=1)[None]
+    p_b_M_C = np.matmul(samples_M_K[None], probs_b_K_C) / K
+
+    return np.sum(-np.log(p_b_M_C) * p_b_M_C, axis=2) / q_1_M
+
+def adaptive_batch_sample(probs_B_K_C, probs_N_K_C, S_max, S_min=None,
+                          shift_B=None, weights_B_T=None, tol=1.e-3,
+                          max_bytes=None, rng=None):
+    """ Compute entropy from a number of samples adapted to the ranking.
+
+    Samples of the class assignments of the current batch are drawn with
+    sample_M_K, starting from S_min per committee member and doubling until
+    the standard error of the difference between the two best ranked
+    values is below their gap (or below tol), or S_max is reached. Samples
+    from previous rounds are kept. As all data points share the same
+    samples, the error is computed on paired differences.
+
+    Parameters
+    ----------
+    probs_B_K_C: np.array
+        Classification probabilitity distributions for each candidate data
+        point for each model in the committee. B is the number of candidates,
+        K is the committee size and C is the number of classes.
+    probs_N_K_C: np.array
+        Classification probabilitity distributions for the N data points
+        already in the batch.
+    S_max: int
+        Maximum number of samples per committee member.
+    S_min: int (optional)
+        Initial number of samples per committee member.
+        If None, use S_max // 32, at least 1.
+    shift_B: np.array (optional)
+        Added to the entropies to get the scores,
+        e.g. minus the conditional entropies for mutual information.
+    weights_B_T: np.array (optional)
+        The values ranked are the scores times each column, e.g. one over
+        the cost of each telescope. Zero or non finite weights exclude a
+        data point from a column, e.g. if it is over budget. If None,
+        rank the scores.
+    tol: float (optional)
+        Scores closer than tol are considered tied. Default is 1.e-3.
+    max_bytes: int (optional)
+        Memory limit for temporary arrays. If None, use MAX_BYTES.
+    rng: np.random.Generator (optional)
+        Random number generator. If None, use the global numpy state.
+
+    Returns
+    -------
+    entropy_B: np.array
+    S: int
+        Number of samples per committee member used.
+    """
+    if S_min is None:
+        S_min = max(1, S_max // 32)
+    if weights_B_T is None:
+        weights_B_T = np.ones((probs_B_K_C.shape[0], 1))
+    ranked = np.flatnonzero(np.logical_and(np.isfinite(weights_B_T),
+                                           weights_B_T != 0))
+    if shift_B is None:
+        shift_B = np.zeros(probs_B_K_C.shape[0])
+
+    S = 0
+    S_new = min(S_min, S_max)
+    samples = []
+    entropy_B = 0.
+    while True:
+        samples_M_K = sample_M_K(probs_N_K_C, S=S_new, max_bytes=max_bytes,
+                                 rng=rng)
+        samples.append(samples_M_K)
+        new_entropy_B = batch_sample(probs_B_K_C, samples_M_K,
+                                     max_bytes=max_bytes)
+        entropy_B = (entropy_B * S + new_entropy_B * S_new) / (S + S_new)
+        S = S + S_new
+
+        if S >= S_max or ranked.shape[0] < 2:
+            return entropy_B, S
+
+        values = ((entropy_B + shift_B)[:, None] * weights_B_T).ravel()
+        top_2 = ranked[np.argpartition(-values[ranked], 1)[:2]]
+        rows_2, columns_2 = np.unravel_index(top_2, weights_B_T.shape)
+        weights_2 = weights_B_T[rows_2, columns_2]
+        gap = abs(values[top_2[0]] - values[top_2[1]])
+
+        nats_2_M = np.concatenate(
+            [importance_weighted_nats_b_M(probs_B_K_C[rows_2], samples_M_K)
+             for samples_M_K in samples], axis=1)
+        values_2_M = (nats_2_M + shift_B[rows_2, None]) * weights_2[:, None]
+        diff_M = values_2_M[0] - values_2_M[1]
+        if diff_M.std() / np.sqrt(diff_M.shape[0]) < \
+                max(gap, tol * np.max(np.abs(weights_2))):
+            return entropy_B, S
+
+        S_new = min(S, S_max - S)
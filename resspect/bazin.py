@@ -20,7 +20,8 @@
 import numpy as np
 from scipy.optimize import least_squares
 
-__all__ = ['bazin', 'errfunc', 'fit_scipy']
+__all__ = ['bazin', 'errfunc', 'errfunc_smooth', 'jac_errfunc', 'fit_scipy',
+           'fit_bazin_batch']
 
 
 def bazin(time, a, b, t0, tfall, trise):
@@ -106,12 +107,17 @@ def errfunc(params, time, flux, fluxerr):
     return abs(flux - bazinr(time, *params)) / fluxerr
 
 
-def fit_scipy(time, flux, fluxerr):
+def errfunc_smooth(params, time, flux, fluxerr):
     """
-    Find best-fit parameters using scipy.least_squares.
+    Signed difference between theoretical and measured flux.
+
+    Gives the same sum of squares as errfunc, but is differentiable
+    everywhere, which allows the use of an analytic Jacobian.
 
     Parameters
     ----------
+    params : list of float
+        light curve parameters: (a, b, t0, tfall, r)
     time : array_like
         exploratory variable (time of observation)
     flux : array_like
@@ -121,11 +127,61 @@ def fit_scipy(time, flux, fluxerr):
 
     Returns
     -------
-    output : np.ndarray of floats
-        best fit parameter values
+    diff : np.ndarray
+        difference between theoretical and observed flux, in units of
+        fluxerr
+
+    """
+    return (bazinr(time, *params) - flux) / fluxerr
+
+
+def jac_errfunc(params, time, flux, fluxerr):
+    """
+    Closed-form Jacobian of errfunc_smooth.
+
+    Parameters
+    ----------
+    params : list of float
+        light curve parameters: (a, b, t0, tfall, r)
+    time : array_like
+        exploratory variable (time of observation)
+    flux : array_like
+        response variable (measured flux)
+    fluxerr : array_like
+        error in response variable (flux)
+
+    Returns
+    -------
+    jac : np.ndarray
+        derivatives of the residuals with respect to (a, b, t0, tfall, r),
+        shape [n_points, 5]
+
+    """
+    time = np.atleast_1d(np.asarray(time, dtype=float))
+    _, jac = _bazinr_batch(time[None], np.asarray(params, dtype=float)[None])
+    fluxerr = np.broadcast_to(np.asarray(fluxerr, dtype=float), time.shape)
+    return jac[0] / fluxerr[:, None]
+
+
+def _get_scipy_guess_and_bounds(time, flux):
+    """
+    Heuristic initial guess and parameter bounds used by fit_scipy.
+
+    Parameters
+    ----------
+    time : array_like
+        exploratory variable (time of observation)
+    flux : np.ndarray
+        response variable (measured flux)
+
+    Returns
+    -------
+    guess : list of float
+        initial values for (a, b, t0, tfall, r)
+    bounds : list of lists
+        lower and upper bounds for (a, b, t0, tfall, r)
 
     """
-    flux = np.asarray(flux)
     imax = flux.argmax()
     flux_max = flux[imax]
     
@@ -164,8 +220,55 @@ def fit_scipy(time, flux, fluxerr):
 
     bounds = [[a_bounds[0], b_bounds[0], t0_bounds[0], tfall_bounds[0], r_bounds[0]],
               [a_bounds[1], b_bounds[1], t0_bounds[1], tfall_bounds[1], r_bounds[1]]]
-    
-    result = least_squares(errfunc, guess, args=(time, flux, fluxerr), method='trf', loss='linear',bounds=bounds)
+
+    return guess, bounds
+
+
+def fit_scipy(time, flux, fluxerr, analytic_jac=False, initial_guess=None):
+    """
+    Find best-fit parameters using scipy.least_squares.
+
+    Parameters
+    ----------
+    time : array_like
+        exploratory variable (time of observation)
+    flux : array_like
+        response variable (measured flux)
+    fluxerr : array_like
+        error in response variable (flux)
+    analytic_jac : bool (optional)
+        If True, minimize errfunc_smooth using the closed-form Jacobian
+        in jac_errfunc instead of finite differences. Default is False.
+    initial_guess : array_like or None (optional)
+        Starting point [a, b, t0, tfall, trise], e.g. the best fit of
+        the same light curve with fewer points. Values are clipped to
+        the parameter bounds. If None or not finite, use the heuristic
+        guess. Default is None.
+
+    Returns
+    -------
+    output : np.ndarray of floats
+        best fit parameter values
+
+    """
+    flux = np.asarray(flux)
+    guess, bounds = _get_scipy_guess_and_bounds(time, flux)
+
+    if initial_guess is not None:
+        prior = np.asarray(initial_guess, dtype=float)
+        if prior.shape == (5,) and np.all(np.isfinite(prior)) and \
+                prior[4] > 0:
+            # (a, b, t0, tfall, trise) -> (a, b, t0, tfall, r)
+            prior[4] = prior[3] / prior[4]
+            guess = np.clip(prior, bounds[0], bounds[1]).tolist()
+
+    if analytic_jac:
+        result = least_squares(errfunc_smooth, guess, jac=jac_errfunc,
+                               args=(time, flux, fluxerr), method='trf',
+                               loss='linear', bounds=bounds)
+    else:
+        result = least_squares(errfunc, guess, args=(time, flux, fluxerr),
+                               method='trf', loss='linear', bounds=bounds)
     
     a_fit,b_fit,t0_fit,tfall_fit,r_fit = result.x
     trise_fit = tfall_fit/r_fit
@@ -173,6 +276,255 @@ def fit_scipy(time, flux, fluxerr):
     
     return final_result
 
+
+def _bazinr_batch(time, params):
+    """
+    Evaluate the Bazin function and its partial derivatives on a batch.
+
+    Uses the (a, b, t0, tfall, r) parametrization and is written in a
+    numerically stable form, so it can be evaluated on padded arrays.
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Time of observation, shape [n_curves, n_points].
+    params : np.ndarray
+        Parameter values (a, b, t0, tfall, r), shape [n_curves, 5].
+
+    Returns
+    -------
+    model : np.ndarray
+        Bazin flux, shape [n_curves, n_points].
+    jac : np.ndarray
+        Partial derivatives of the flux with respect to each parameter,
+        shape [n_curves, n_points, 5].
+    """
+    a, b, t0, tfall, r = [params[:, i][:, None] for i in range(5)]
+
+    u = (time - t0) / tfall
+    with np.errstate(over='ignore', invalid='ignore'):
+        # X = exp(-u) / (1 + exp(-r * u)), evaluated in log space
+        X = np.exp(-u - np.logaddexp(0, -r * u))
+        # s = exp(-r * u) / (1 + exp(-r * u))
+        s = np.exp(-np.logaddexp(0, r * u))
+
+    model = a * X + b
+
+    jac = np.empty(time.shape + (5,))
+    jac[..., 0] = X
+    jac[..., 1] = 1.
+    jac[..., 2] = a * X * (1 - r * s) / tfall
+    jac[..., 3] = a * X * u * (1 - r * s) / tfall
+    jac[..., 4] = a * X * u * s
+
+    return model, jac
+
+
+def _get_batch_guess_and_bounds(time, flux, mask):
+    """
+    Initial guess and parameter bounds used by fit_bazin_batch.
+
+    Same heuristic as _get_scipy_guess_and_bounds, applied to each padded
+    light curve.
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Time of observation, shape [n_curves, n_points].
+    flux : np.ndarray
+        Measured flux, same shape as time.
+    mask : np.ndarray of bool
+        True for valid observations, which come before padding.
+
+    Returns
+    -------
+    guess : np.ndarray
+        Initial values for (a, b, t0, tfall, r), shape [n_curves, 5].
+    lower : np.ndarray
+        Lower bounds, same shape as guess.
+    upper : np.ndarray
+        Upper bounds, same shape as guess.
+    """
+    nfit, npoints = time.shape
+    rows = np.arange(nfit)
+
+    # Parameter bounds
+    time_max = np.where(mask, time, -np.inf).max(axis=1)
+    lower = np.column_stack([np.full(nfit, 1.e-3), np.full(nfit, -np.inf),
+                             -0.5 * time_max, np.full(nfit, 1.e-3),
+                             np.ones(nfit)])
+    upper = np.column_stack([np.full(nfit, np.inf), np.full(nfit, np.inf),
+                             1.5 * time_max, np.full(nfit, np.inf),
+                             np.full(nfit, np.inf)])
+
+    # Parameter guess, same heuristic as fit_scipy
+    imax = np.where(mask, flux, -np.inf).argmax(axis=1)
+    a_guess = 2 * flux[rows, imax]
+    t0_guess = time[rows, imax]
+
+    # std of the points fit_scipy slices around the maximum, padding
+    # excluded: time[imax-2:imax+2], which wraps around and is empty for
+    # imax < 2, then time[imax-1:imax+1], empty for imax == 0
+    offsets = np.arange(-2, 2)
+    window = imax[:, None] + offsets[None, :]
+    in_window = (window < npoints) & (imax[:, None] >= 2)
+    in_window |= (imax[:, None] == 1) & (offsets[None, :] >= -1) & \
+        (offsets[None, :] <= 0)
+    window = np.clip(window, 0, npoints - 1)
+    in_window &= mask[rows[:, None], window]
+    times_window = time[rows[:, None], window]
+    nwindow = in_window.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_window = (times_window * in_window).sum(axis=1) / nwindow
+        tfall_guess = np.sqrt((((times_window - mean_window[:, None]) ** 2)
+                               * in_window).sum(axis=1) / nwindow) / 2
+    tfall_guess[~np.isfinite(tfall_guess) | (tfall_guess < 1)] = 50
+
+    guess = np.column_stack([a_guess, np.zeros(nfit), t0_guess,
+                              tfall_guess, np.full(nfit, 2.)])
+    guess = np.clip(guess, lower, upper)
+
+    return guess, lower, upper
+
+
+def fit_bazin_batch(time, flux, fluxerr, mask=None, max_iter=200,
+                    ftol=1e-8):
+    """
+    Find best-fit parameters for many light curves at once.
+
+    Solves all five-parameter Bazin problems simultaneously with a
+    vectorized, bound-constrained Levenberg-Marquardt algorithm, starting
+    from the same guess as fit_scipy. Curves which do not converge within
+    max_iter, or end with a rise or fall time below one day, where the
+    Bazin function degenerates into a step, are fitted again one by one
+    with fit_scipy. Inputs are padded arrays whose last axis holds the
+    observations of one light curve in one filter, e.g. shape
+    [n_obj, n_band, n_points].
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Time of observation, relative to the first epoch of each curve.
+    flux : np.ndarray
+        Measured flux, same shape as time.
+    fluxerr : np.ndarray
+        Error in measured flux, same shape as time.
+    mask : np.ndarray of bool (optional)
+        True for valid observations, False for padding.
+        If None, all points are considered valid. Default is None.
+    max_iter : int (optional)
+        Maximum number of iterations. Default is 200.
+    ftol : float (optional)
+        Relative tolerance in the cost function used to declare
+        convergence. Default is 1e-8.
+
+    Returns
+    -------
+    output : np.ndarray
+        Best fit parameter values [a, b, t0, tfall, trise],
+        shape time.shape[:-1] + (5,). Curves with less than 5 valid
+        points are filled with NaN.
+    """
+    time = np.asarray(time, dtype=float)
+    flux = np.asarray(flux, dtype=float)
+    fluxerr = np.broadcast_to(np.asarray(fluxerr, dtype=float), time.shape)
+
+    if mask is None:
+        mask = np.ones(time.shape, dtype=bool)
+    mask = np.asarray(mask, dtype=bool)
+
+    batch_shape = time.shape[:-1]
+    npoints = time.shape[-1]
+
+    # flatten batch dimensions and neutralize padded entries
+    time = np.where(mask, time, 0.).reshape(-1, npoints)
+    flux = np.where(mask, flux, 0.).reshape(-1, npoints)
+    fluxerr = np.where(mask, fluxerr, 1.).reshape(-1, npoints)
+    mask = mask.reshape(-1, npoints)
+    weight = mask / fluxerr
+
+    ncurves = time.shape[0]
+    final_result = np.full((ncurves, 5), np.nan)
+
+    valid = mask.sum(axis=1) > 4
+    if not valid.any():
+        return final_result.reshape(batch_shape + (5,))
+
+    time = time[valid]
+    flux = flux[valid]
+    fluxerr = fluxerr[valid]
+    weight = weight[valid]
+    mask = mask[valid]
+    nfit = time.shape[0]
+    rows = np.arange(nfit)
+
+    params, lower, upper = _get_batch_guess_and_bounds(time, flux, mask)
+
+    def _cost(p, idx):
+        model, jac = _bazinr_batch(time[idx], p)
+        res = (model - flux[idx]) * weight[idx]
+        return (res ** 2).sum(axis=1), res, jac * weight[idx][..., None]
+
+    # heavy damping at first: long Gauss-Newton steps from the guess
+    # tend to end in the step-like minima with tfall or trise near zero
+    cost, res, jac = _cost(params, rows)
+    damping = np.ones(nfit)
+
+    # residuals and jacobian are only kept for curves still being fitted
+    idx = rows[np.isfinite(cost)]
+    res, jac = res[idx], jac[idx]
+
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+
+        JTJ = np.einsum('npi,npj->nij', jac, jac)
+        grad = np.einsum('npi,np->ni', jac, res)
+        diag = np.maximum(np.einsum('nii->ni', JTJ), 1.e-12)
+        damped = JTJ + (damping[idx][:, None] * diag)[:, :, None] * np.eye(5)
+
+        try:
+            step = np.linalg.solve(damped, -grad[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = np.array([np.linalg.lstsq(m, -g, rcond=None)[0]
+                             for m, g in zip(damped, grad)])
+
+        new_params = np.clip(params[idx] + step, lower[idx], upper[idx])
+        new_cost, new_res, new_jac = _cost(new_params, idx)
+
+        improved = np.isfinite(new_cost) & (new_cost < cost[idx])
+        rel_change = np.zeros(idx.size)
+        rel_change[improved] = (cost[idx][improved] - new_cost[improved]) / \
+            np.maximum(cost[idx][improved], 1.e-300)
+
+        accepted = idx[improved]
+        params[accepted] = new_params[improved]
+        cost[accepted] = new_cost[improved]
+        damping[accepted] = np.maximum(damping[accepted] / 10, 1.e-12)
+        damping[idx[~improved]] *= 10
+
+        converged = (improved & (rel_change < ftol)) | \
+                    (~improved & (damping[idx] > 1.e10))
+
+        res = np.where(improved[:, None], new_res, res)[~converged]
+        jac = np.where(improved[:, None, None], new_jac, jac)[~converged]
+        idx = idx[~converged]
+
+    a_fit, b_fit, t0_fit, tfall_fit, r_fit = params.T
+    result = np.column_stack([a_fit, b_fit, t0_fit, tfall_fit,
+                              tfall_fit / r_fit])
+
+    refit = np.zeros(nfit, dtype=bool)
+    refit[idx] = True
+    refit |= (result[:, 3] < 1) | (result[:, 4] < 1)
+    for i in np.flatnonzero(refit):
+        result[i] = fit_scipy(time[i][mask[i]], flux[i][mask[i]],
+                              fluxerr[i][mask[i]])
+    final_result[valid] = result
+
+    return final_result.reshape(batch_shape + (5,))
+
+
 def main():
     return None
 
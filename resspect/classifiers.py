@@ -15,22 +15,187 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from xgboost.sklearn import XGBClassifier
 from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neighbors import NearestNeighbors
 from sklearn.neural_network import MLPClassifier
+from sklearn.metrics.pairwise import euclidean_distances
 from sklearn.svm import SVC
 from sklearn.naive_bayes import GaussianNB
 from sklearn.utils import resample
 from sklearn.utils.validation import check_is_fitted
 
 __all__ = ['random_forest','gradient_boosted_trees','knn',
-           'mlp','svm','nbg', 'bootstrap_clf']
+           'mlp','svm','nbg', 'bootstrap_clf', 'forest_committee',
+           'update_classifier', 'predict_in_chunks', 'IncrementalKNN',
+           'CachedKernelSVC']
+
+
+def _share_array(array: np.array):
+    """Copy an array to a new shared memory block.
+
+    Returns the block, which must be closed and unlinked by the caller,
+    and the (name, shape, dtype) needed to attach to it.
+    """
+    # only available from python 3.8
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared_array[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _fit_bootstrap_member(clf_function, train_features, train_labels,
+                          test_features, seed, kwargs):
+    """Train one ensemble member on a bootstrap resample of the training set.
+
+    The global numpy random state, used by classifiers without a
+    random_state, is seeded with the member seed during training and
+    restored afterwards.
+
+    Returns the classification probabilities for the test sample and the
+    trained classifier.
+    """
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        x_train, y_train = resample(train_features, train_labels,
+                                    random_state=seed)
+        _, class_prob, clf = clf_function(x_train, y_train, test_features,
+                                          **kwargs)
+    finally:
+        np.random.set_state(state)
+    return class_prob, clf
+
+
+def _fit_shared_bootstrap_member(clf_function, train_spec, train_labels,
+                                 test_spec, seed, kwargs):
+    """Attach to features in shared memory and train one ensemble member."""
+    from multiprocessing import shared_memory
+
+    blocks = []
+    arrays = []
+    for spec in [train_spec, test_spec]:
+        if spec is None:
+            arrays.append(None)
+            continue
+        name, shape, dtype = spec
+        blocks.append(shared_memory.SharedMemory(name=name))
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=blocks[-1].buf))
+    try:
+        result = _fit_bootstrap_member(clf_function, arrays[0], train_labels,
+                                       arrays[1], seed, kwargs)
+    finally:
+        # views must be released before closing the blocks
+        del arrays
+        for each_block in blocks:
+            each_block.close()
+    return result
+
+
+def predict_in_chunks(clf, features: np.array, chunk_size=None, n_threads=1,
+                      committees=None):
+    """Classify a sample in chunks, optionally in a pool of threads.
+
+    Results are written chunk by chunk into preallocated arrays, so
+    intermediate arrays only hold chunk_size objects at a time. Trained
+    sklearn and xgboost classifiers release the GIL while predicting, so
+    chunks are classified in parallel by threads sharing clf.
+
+    Parameters
+    ----------
+    clf: trained classifier
+        Classifier with predict, predict_proba and classes_.
+    features: np.array
+        Features from sample to be classified.
+    chunk_size: int (optional)
+        Number of objects classified at a time. If None, classify the
+        whole sample at once. Default is None.
+    n_threads: int (optional)
+        Number of threads classifying chunks. IncrementalKNN and
+        CachedKernelSVC caches are filled for the whole sample before
+        threads share them. Default is 1.
+    committees: list (optional)
+        Groups of trained classifiers, e.g. the members of a bootstrap
+        ensemble. If given, the probability of each group is the average
+        of its members, the sample probability is the average of all
+        members and clf is only used for its classes_. Default is None.
+
+    Returns
+    -------
+    predictions: np.array
+        Predicted classes.
+    prob: np.array
+        Classification probability for all objects.
+    ensemble_probs: np.array
+        Classification probability of each group for all objects.
+        Only returned if committees is given.
+    """
+    num_objects = features.shape[0]
+    if chunk_size is None:
+        chunk_size = max(1, num_objects)
+
+    n_classes = clf.classes_.shape[0]
+    predictions = np.empty(num_objects, dtype=clf.classes_.dtype)
+    prob = np.empty((num_objects, n_classes))
+    if committees is not None:
+        ensemble_probs = np.zeros((num_objects, len(committees), n_classes))
+        sizes = np.array([len(each_group) for each_group in committees])
+
+    def classify_chunk(start):
+        stop = min(start + chunk_size, num_objects)
+        chunk = features[start:stop]
+        if committees is None:
+            predictions[start:stop] = clf.predict(chunk)
+            prob[start:stop] = clf.predict_proba(chunk)
+        else:
+            for k, each_group in enumerate(committees):
+                for member in each_group:
+                    ensemble_probs[start:stop, k, :] += \
+                        member.predict_proba(chunk)
+                ensemble_probs[start:stop, k, :] /= sizes[k]
+
+            # weighted by group size to average over all members
+            prob[start:stop] = np.sum(ensemble_probs[start:stop] *
+                                      sizes[None, :, None], axis=1) / \
+                np.sum(sizes)
+            predictions[start:stop] = \
+                clf.classes_[np.argmax(prob[start:stop], axis=1)]
+
+    starts = range(0, num_objects, chunk_size)
+    if n_threads > 1:
+        # threads may only read cached results, so fill caches first
+        members = [clf]
+        if isinstance(clf, PreFitVotingClassifier):
+            members = members + clf.estimators
+        if committees is not None:
+            members = members + [member for each_group in committees
+                                 for member in each_group]
+        for member in members:
+            if isinstance(member, (IncrementalKNN, CachedKernelSVC)):
+                member.fill_cache(features)
+
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            list(executor.map(classify_chunk, starts))
+    else:
+        for start in starts:
+            classify_chunk(start)
+
+    if committees is not None:
+        return predictions, prob, ensemble_probs
+
+    return predictions, prob
 
 
 def bootstrap_clf(clf_function, n_ensembles, train_features,
-                  train_labels, test_features, **kwargs):
+                  train_labels, test_features, n_workers=1, seed=None,
+                  chunk_size=None, n_threads=1, **kwargs):
     """
     Train an ensemble of classifiers using bootstrap.
 
@@ -46,6 +211,21 @@ def bootstrap_clf(clf_function, n_ensembles, train_features,
         Training sample classes.
     test_features: np.array
         Test sample features.
+    n_workers: int (optional)
+        Number of worker processes. If larger than 1, members are trained
+        in parallel with train and test features in shared memory, which
+        requires python 3.8 or later. Members get the same seeds in
+        serial and parallel training. Default is 1.
+    seed: int (optional)
+        Seed for the bootstrap resamples, one derived seed per member.
+        If None, member seeds are drawn from the global numpy state.
+    chunk_size: int (optional)
+        If given, members are only trained by the workers and the test
+        sample is classified afterwards in chunks of this size (see
+        predict_in_chunks). Default is None.
+    n_threads: int (optional)
+        Number of threads classifying test chunks. If larger than 1,
+        classification is done as for chunk_size. Default is 1.
     kwargs: extra parameters
         All keywords required by
         sklearn.ensemble.RandomForestClassifier function.
@@ -61,23 +241,62 @@ def bootstrap_clf(clf_function, n_ensembles, train_features,
     """
     n_labels = np.unique(train_labels).size
     num_test_data = test_features.shape[0]
+    # classifiers do not accept an empty test sample
+    chunked = chunk_size is not None or n_threads > 1 or num_test_data == 0
+
+    if seed is None:
+        member_seeds = np.random.randint(0, 2 ** 32 - 1, size=n_ensembles)
+    else:
+        member_seeds = np.random.SeedSequence(seed).generate_state(n_ensembles)
+    member_seeds = [int(each_seed) for each_seed in member_seeds]
+
+    train_features = np.asarray(train_features)
+    test_features = np.asarray(test_features)
+    # members are only trained if the test sample is classified in chunks
+    member_test_features = None if chunked else test_features
+
+    if n_workers > 1 and not (train_features.dtype.hasobject or
+                              test_features.dtype.hasobject):
+        blocks = []
+        try:
+            train_shm, train_spec = _share_array(train_features)
+            blocks.append(train_shm)
+            test_spec = None
+            if not chunked:
+                test_shm, test_spec = _share_array(test_features)
+                blocks.append(test_shm)
+
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(_fit_shared_bootstrap_member,
+                                           clf_function, train_spec,
+                                           train_labels, test_spec,
+                                           each_seed, kwargs)
+                           for each_seed in member_seeds]
+                results = [each_future.result() for each_future in futures]
+        finally:
+            for each_block in blocks:
+                each_block.close()
+                each_block.unlink()
+    else:
+        results = [_fit_bootstrap_member(clf_function, train_features,
+                                         train_labels, member_test_features,
+                                         each_seed, kwargs)
+                   for each_seed in member_seeds]
+
+    classifier_list = [(str(i), clf) for i, (_, clf) in enumerate(results)]
+    ensemble_clf = PreFitVotingClassifier(classifier_list, voting='soft')  #Must use soft voting
+
+    if chunked:
+        return predict_in_chunks(ensemble_clf, test_features,
+                                 chunk_size=chunk_size, n_threads=n_threads,
+                                 committees=[[clf] for _, clf in
+                                             classifier_list]) + \
+            (ensemble_clf,)
+
     ensemble_probs = np.zeros((num_test_data, n_ensembles, n_labels))
-    classifier_list = list()
-    for i in range(n_ensembles):
-        x_train, y_train = resample(train_features, train_labels)
-        predicted_class, class_prob, clf = clf_function(x_train,
-                                                        y_train,
-                                                        test_features,
-                                                        **kwargs)
-        #clf = clf_function(**kwargs)
-        #clf.fit(x_train, y_train)
-        #predicted_class = clf.predict(test_features)
-        #class_prob = clf.predict_proba(test_features)
-        
-        classifier_list.append((str(i), clf))
+    for i, (class_prob, _) in enumerate(results):
         ensemble_probs[:, i, :] = class_prob
 
-    ensemble_clf = PreFitVotingClassifier(classifier_list, voting='soft')  #Must use soft voting
     class_prob = ensemble_probs.mean(axis=1)
     predictions = np.argmax(class_prob, axis=1)
     
@@ -95,7 +314,8 @@ def random_forest(train_features:  np.array, train_labels: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Features from sample to be classified.
+        Features from sample to be classified. If None, the
+        classifier is only trained.
     n_estimators: int (optional)
         Number of trees in the forest. Default is 1000.
     kwargs: extra parameters
@@ -113,12 +333,73 @@ def random_forest(train_features:  np.array, train_labels: np.array,
     # create classifier instance
     clf = RandomForestClassifier(n_estimators=n_estimators, **kwargs)
     clf.fit(train_features, train_labels)                     # train
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)                # predict
     prob = clf.predict_proba(test_features)       # get probabilities
 
     return predictions, prob, clf
   
 
+def forest_committee(train_features: np.array, train_labels: np.array,
+                     test_features: np.array, n_committees=10,
+                     n_estimators=100, chunk_size=None, n_threads=1,
+                     **kwargs):
+    """Random Forest whose trees are split into a committee.
+
+    A single forest is trained and its trees are grouped into n_committees
+    sub-forests, whose probabilities replace the members of a bootstrap
+    ensemble (see bootstrap_clf) for disagreement based strategies.
+
+    Parameters
+    ----------
+    train_features: np.array
+        Training sample features.
+    train_labels: np.array
+        Training sample classes.
+    test_features: np.array
+        Features from sample to be classified.
+    n_committees: int (optional)
+        Number of groups of trees. Default is 10.
+    n_estimators: int (optional)
+        Number of trees in the forest. Default is 100.
+    chunk_size: int (optional)
+        Number of test objects classified at a time (see
+        predict_in_chunks). If None, classify all at once. Default is None.
+    n_threads: int (optional)
+        Number of threads classifying test chunks. Default is 1.
+    kwargs: extra parameters
+        All keywords required by
+        sklearn.ensemble.RandomForestClassifier function.
+
+    Returns
+    -------
+    predictions: np.array
+        Predicted classes for test sample.
+    class_prob: np.array
+        Classification probability of the whole forest.
+    ensemble_probs: np.array
+        Classification probability of each group of trees.
+    clf: sklearn.ensemble.RandomForestClassifier
+        Trained forest.
+    """
+    if n_committees > n_estimators:
+        raise ValueError('n_committees must not exceed n_estimators!')
+
+    clf = RandomForestClassifier(n_estimators=n_estimators, **kwargs)
+    clf.fit(train_features, train_labels)
+
+    groups = np.array_split(np.arange(n_estimators), n_committees)
+    committees = [[clf.estimators_[i] for i in each_group]
+                  for each_group in groups]
+    predictions, class_prob, ensemble_probs = \
+        predict_in_chunks(clf, test_features, chunk_size=chunk_size,
+                          n_threads=n_threads, committees=committees)
+
+    return predictions, class_prob, ensemble_probs, clf
+
+
 def gradient_boosted_trees(train_features: np.array,
                            train_labels: np.array,
                            test_features: np.array, **kwargs):
@@ -131,7 +412,8 @@ def gradient_boosted_trees(train_features: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Test sample features.
+        Test sample features. If None, the classifier is only
+        trained.
     kwargs: extra parameters
         All parameters allowed by sklearn.XGBClassifier
 
@@ -147,13 +429,16 @@ def gradient_boosted_trees(train_features: np.array,
     clf = XGBClassifier(**kwargs)
 
     clf.fit(train_features, train_labels)             # train
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)          # predict
     prob = clf.predict_proba(test_features)           # get probabilities
 
     return predictions, prob, clf
 
 def knn(train_features: np.array, train_labels: np.array,
-        test_features: np.array, **kwargs):
+        test_features: np.array, incremental=False, **kwargs):
 
     """K-Nearest Neighbour classifier.
 
@@ -164,9 +449,14 @@ def knn(train_features: np.array, train_labels: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Test sample features.
+        Test sample features. If None, the classifier is only
+        trained.
+    incremental: bool (optional)
+        If True, use IncrementalKNN, which can be updated with
+        update_classifier. Default is False.
     kwargs: extra parameters
-        All parameters allowed by sklearn.neighbors.KNeighborsClassifier
+        All parameters allowed by sklearn.neighbors.KNeighborsClassifier,
+        or by IncrementalKNN if incremental is True.
 
     Returns
     -------
@@ -177,9 +467,15 @@ def knn(train_features: np.array, train_labels: np.array,
     """
 
     #create classifier instance
-    clf = KNeighborsClassifier(**kwargs)
+    if incremental:
+        clf = IncrementalKNN(**kwargs)
+    else:
+        clf = KNeighborsClassifier(**kwargs)
 
     clf.fit(train_features, train_labels)              # train
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)           # predict
     prob = clf.predict_proba(test_features)            # get probabilities
 
@@ -198,7 +494,8 @@ def mlp(train_features: np.array, train_labels: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Test sample features.
+        Test sample features. If None, the classifier is only
+        trained.
     kwargs: extra parameters
         All parameters allowed by sklearn.neural_network.MLPClassifier
 
@@ -214,13 +511,16 @@ def mlp(train_features: np.array, train_labels: np.array,
     clf=MLPClassifier(**kwargs)
 
     clf.fit(train_features, train_labels)              # train
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)           # predict
     prob = clf.predict_proba(test_features)            # get probabilities
 
     return predictions, prob, clf
 
 def svm(train_features: np.array, train_labels: np.array,
-        test_features: np.array, **kwargs):
+        test_features: np.array, incremental=False, **kwargs):
     """Support Vector classifier.
 
     Parameters
@@ -230,7 +530,11 @@ def svm(train_features: np.array, train_labels: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Test sample features.
+        Test sample features. If None, the classifier is only
+        trained.
+    incremental: bool (optional)
+        If True, use CachedKernelSVC, which keeps kernel matrices for
+        update_classifier. Default is False.
     kwargs: dict (optional)
         All parameters which can be passed to sklearn.svm.SVC
         function.
@@ -244,9 +548,15 @@ def svm(train_features: np.array, train_labels: np.array,
     """
 
     #create classifier instance
-    clf = SVC(probability=True, **kwargs)
+    if incremental:
+        clf = CachedKernelSVC(**kwargs)
+    else:
+        clf = SVC(probability=True, **kwargs)
 
     clf.fit(train_features, train_labels)          # train
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)       # predict
     prob = clf.predict_proba(test_features)        # get probabilities
 
@@ -265,7 +575,8 @@ def nbg(train_features: np.array, train_labels: np.array,
     train_labels: np.array
         Training sample classes.
     test_features: np.array
-        Test sample features.
+        Test sample features. If None, the classifier is only
+        trained.
     kwargs: dict (optional)
         All parameters which can be passed to sklearn.svm.SVC
         function.
@@ -282,11 +593,154 @@ def nbg(train_features: np.array, train_labels: np.array,
     clf=GaussianNB(**kwargs)
 
     clf.fit(train_features, train_labels)         # fit
+    if test_features is None:
+        return None, None, clf
+
     predictions = clf.predict(test_features)      # predict
     prob = clf.predict_proba(test_features)       # get probabilities
 
     return predictions, prob, clf
 
+def update_classifier(clf, train_features: np.array, train_labels: np.array,
+                      test_features: np.array, new_rows: np.array,
+                      n_replace=None, window=None, max_rounds=None):
+    """Update a trained classifier with new training objects.
+
+    Naive Bayes, Multi Layer Perceptron and IncrementalKNN are updated with
+    partial_fit on the new objects, CachedKernelSVC is trained again
+    reusing its kernel matrices. Random Forest replaces its n_replace oldest trees by
+    trees trained on a window including the new objects, and Gradient
+    Boosted Trees add n_replace boosting rounds trained on the window,
+    until they hold more than max_rounds rounds and are trained again.
+
+    Parameters
+    ----------
+    clf: sklearn or xgboost classifier
+        Classifier returned by nbg, mlp, knn or svm (incremental),
+        random_forest or gradient_boosted_trees. It is modified in place.
+    train_features: np.array
+        Full training sample features.
+    train_labels: np.array
+        Full training sample classes.
+    test_features: np.array
+        Features from sample to be classified. If None, the
+        classifier is only trained.
+    new_rows: np.array
+        Positions of the objects in the training sample which were not
+        used to train clf.
+    n_replace: int (optional)
+        Number of trees replaced (Random Forest) or added (Gradient Boosted
+        Trees). If None, use a tenth of n_estimators, at least 1.
+    window: int (optional)
+        Number of training objects used to train the new trees: all new
+        objects plus a random choice of the others. If None, use the full
+        training sample.
+    max_rounds: int (optional)
+        Largest number of boosting rounds of Gradient Boosted Trees. If
+        the update exceeds it, a new model with n_estimators rounds is
+        trained on the full training sample. If None, use twice
+        n_estimators.
+
+    Returns
+    -------
+    predictions: np.array
+        Predicted classes for test sample.
+    prob: np.array
+        Classification probability for test sample.
+    clf: sklearn or xgboost classifier
+        Updated classifier.
+    """
+    new_rows = np.asarray(new_rows, dtype=int)
+
+    if isinstance(clf, GaussianNB):
+        if new_rows.shape[0] > 0:
+            # partial_fit replaces the variance smoothing by one computed
+            # from the new objects only, keep the one from the first fit
+            # (variances are sigma_ before scikit-learn 1.0)
+            var_name = 'var_' if hasattr(clf, 'var_') else 'sigma_'
+            epsilon = clf.epsilon_
+            new_epsilon = clf.var_smoothing * \
+                np.var(train_features[new_rows], axis=0).max()
+            getattr(clf, var_name)[...] += new_epsilon - epsilon
+            clf.partial_fit(train_features[new_rows], train_labels[new_rows])
+            getattr(clf, var_name)[...] += epsilon - new_epsilon
+            clf.epsilon_ = epsilon
+
+    elif isinstance(clf, MLPClassifier):
+        if new_rows.shape[0] > 0:
+            clf.partial_fit(train_features[new_rows], train_labels[new_rows])
+
+    elif isinstance(clf, CachedKernelSVC):
+        clf.fit(train_features, train_labels)
+
+    elif isinstance(clf, IncrementalKNN):
+        # neighbours are only valid if previous objects did not change
+        old_rows = np.setdiff1d(np.arange(train_labels.shape[0]), new_rows)
+        if np.array_equal(train_features[old_rows], clf.fit_X_) and \
+                np.array_equal(train_labels[old_rows], clf.fit_y_):
+            clf.partial_fit(train_features[new_rows], train_labels[new_rows])
+        else:
+            clf.fit(train_features, train_labels)
+
+    elif isinstance(clf, (RandomForestClassifier, XGBClassifier)):
+        window_rows = np.arange(train_labels.shape[0])
+        if window is not None and window < window_rows.shape[0]:
+            old_rows = np.setdiff1d(window_rows, new_rows)
+            n_old = max(0, window - new_rows.shape[0])
+            window_rows = np.sort(np.concatenate([
+                new_rows, np.random.choice(old_rows, n_old, replace=False)]))
+        # all classes must be present for the new trees
+        if np.unique(train_labels[window_rows]).shape[0] != \
+                clf.classes_.shape[0]:
+            window_rows = np.arange(train_labels.shape[0])
+
+        # n_estimators is kept from the first fit, whatever the rounds added
+        params = clf.get_params()
+        n_estimators = params['n_estimators']
+        if isinstance(clf, RandomForestClassifier):
+            n_trees = len(clf.estimators_)
+        else:
+            n_trees = clf.get_booster().num_boosted_rounds()
+        # xgboost leaves n_estimators to None for its default
+        if n_estimators is None:
+            n_estimators = n_trees
+        if n_replace is None:
+            n_replace = max(1, n_estimators // 10)
+        if max_rounds is None:
+            max_rounds = 2 * n_estimators
+
+        params['n_estimators'] = n_replace
+        params['random_state'] = np.random.randint(0, 2 ** 31 - 1)
+        new_clf = type(clf)(**params)
+
+        if isinstance(clf, RandomForestClassifier):
+            new_clf.fit(train_features[window_rows], train_labels[window_rows])
+            n_replace = min(n_replace, n_trees)
+            clf.estimators_ = clf.estimators_[n_replace:] + \
+                new_clf.estimators_[:n_replace]
+        elif n_trees + n_replace > max_rounds:
+            new_clf.set_params(n_estimators=n_estimators)
+            new_clf.fit(train_features, train_labels)
+            clf = new_clf
+        else:
+            new_clf.fit(train_features[window_rows], train_labels[window_rows],
+                        xgb_model=clf.get_booster())
+            new_clf.set_params(n_estimators=n_estimators)
+            clf = new_clf
+
+    else:
+        raise ValueError('Incremental update not available for ' +
+                         type(clf).__name__)
+
+    if test_features is None:
+        return None, None, clf
+
+    predictions = clf.predict(test_features)
+    prob = clf.predict_proba(test_features)
+
+    return predictions, prob, clf
+
+
 class PreFitVotingClassifier(object):
     """Stripped-down version of VotingClassifier that uses prefit estimators"""
     def __init__(self, estimators, voting='hard', weights=None):
@@ -298,6 +752,20 @@ class PreFitVotingClassifier(object):
     def fit(self, X, y, sample_weight=None):
         raise NotImplementedError
 
+    @property
+    def classes_(self):
+        """Labels returned by predict, i.e. the column of each class."""
+        return np.arange(self.estimators[0].classes_.shape[0])
+
+    def _check_is_fitted(self):
+        """Check all prefit estimators are fitted.
+
+        sklearn.utils.validation.check_is_fitted only accepts sklearn
+        estimators, so it is applied to each member.
+        """
+        for clf in self.estimators:
+            check_is_fitted(clf)
+
     def predict(self, X):
         """ Predict class labels for X.
         Parameters
@@ -311,7 +779,7 @@ class PreFitVotingClassifier(object):
             Predicted class labels.
         """
 
-        check_is_fitted(self, 'estimators')
+        self._check_is_fitted()
         if self.voting == 'soft':
             maj = np.argmax(self.predict_proba(X), axis=1)
 
@@ -333,7 +801,7 @@ class PreFitVotingClassifier(object):
         if self.voting == 'hard':
             raise AttributeError("predict_proba is not available when"
                                  " voting=%r" % self.voting)
-        check_is_fitted(self, 'estimators')
+        self._check_is_fitted()
         avg = np.average(self._collect_probas(X), axis=0, weights=self.weights)
         return avg
 
@@ -368,7 +836,7 @@ class PreFitVotingClassifier(object):
           array-like = [n_samples, n_classifiers]
             Class labels predicted by each classifier.
         """
-        check_is_fitted(self, 'estimators')
+        self._check_is_fitted()
         if self.voting == 'soft':
             return self._collect_probas(X)
         else:
@@ -378,6 +846,330 @@ class PreFitVotingClassifier(object):
         """Collect results from clf.predict calls. """
         return np.asarray([clf.predict(X) for clf in self.estimators]).T
 
+class IncrementalKNN(object):
+    """K-Nearest Neighbour classifier which keeps neighbour lists between
+    calls, for a training sample which only grows.
+
+    The k nearest training distances and indices of every classified object
+    are cached, keyed by its features. When training objects are added with
+    partial_fit, cached lists are only updated for objects closer to a new
+    training object than to their k-th neighbour, so classifying the same
+    objects again costs O(N x n_new) instead of O(N x N_train).
+    Distances are Euclidean.
+
+    Parameters
+    ----------
+    n_neighbors: int (optional)
+        Number of neighbours. Default is 5.
+    weights: str (optional)
+        'uniform' or 'distance', as in
+        sklearn.neighbors.KNeighborsClassifier. Default is 'uniform'.
+    """
+    def __init__(self, n_neighbors=5, weights='uniform'):
+        if weights not in ['uniform', 'distance']:
+            raise ValueError('weights must be uniform or distance!')
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    def fit(self, X, y):
+        """Train on a new training sample, clearing cached neighbours."""
+        self.fit_X_ = np.array(X, dtype=float)
+        self.fit_y_ = np.asarray(y)
+        self.classes_, self._fit_codes = np.unique(self.fit_y_,
+                                                   return_inverse=True)
+        self._cache = {}
+        self._dist = np.zeros((0, self.n_neighbors))
+        self._ind = np.zeros((0, self.n_neighbors), dtype=int)
+        self._n_seen = np.zeros(0, dtype=int)
+        self._used = np.zeros(0, dtype=bool)
+        return self
+
+    def partial_fit(self, X, y):
+        """Add objects to the training sample.
+
+        Cached neighbours not used since the previous call are dropped.
+        """
+        y = np.asarray(y)
+        if not np.all(np.isin(y, self.classes_)):
+            raise ValueError('New classes require a new fit!')
+
+        keep = np.flatnonzero(self._used)
+        keys = list(self._cache.keys())
+        rows = np.array(list(self._cache.values()), dtype=int)
+        new_row = np.full(self._used.shape[0], -1)
+        new_row[keep] = np.arange(keep.shape[0])
+        self._cache = {keys[i]: new_row[rows[i]] for i in range(len(keys))
+                       if new_row[rows[i]] >= 0}
+        self._dist = self._dist[keep]
+        self._ind = self._ind[keep]
+        self._n_seen = self._n_seen[keep]
+        self._used = np.zeros(keep.shape[0], dtype=bool)
+
+        self.fit_X_ = np.concatenate([self.fit_X_, np.array(X, dtype=float)])
+        self.fit_y_ = np.concatenate([self.fit_y_, y])
+        self._fit_codes = np.searchsorted(self.classes_, self.fit_y_)
+        return self
+
+    def kneighbors(self, X):
+        """Distances and indices of the training neighbours of each object.
+
+        Parameters
+        ----------
+        X: np.array
+            Features of objects to classify.
+
+        Returns
+        -------
+        dist: np.array
+            Distances to the k nearest training objects, sorted.
+        ind: np.array
+            Positions of the k nearest training objects.
+        """
+        X = np.ascontiguousarray(X, dtype=float)
+        keys = [each_row.tobytes() for each_row in X]
+        rows = np.array([self._cache.get(each_key, -1) for each_key in keys],
+                        dtype=int)
+
+        # objects never seen before, full search
+        missing = np.flatnonzero(rows < 0)
+        if missing.shape[0] > 0:
+            first_keys = {}
+            for i in missing:
+                first_keys.setdefault(keys[i], i)
+            first = np.array(list(first_keys.values()), dtype=int)
+            nbrs = NearestNeighbors(n_neighbors=self.n_neighbors)
+            nbrs.fit(self.fit_X_)
+            dist, ind = nbrs.kneighbors(X[first])
+
+            start = self._dist.shape[0]
+            for j, i in enumerate(first):
+                self._cache[keys[i]] = start + j
+            self._dist = np.concatenate([self._dist, dist])
+            self._ind = np.concatenate([self._ind, ind])
+            self._n_seen = np.concatenate(
+                [self._n_seen, np.full(first.shape[0], self.fit_X_.shape[0])])
+            self._used = np.concatenate(
+                [self._used, np.zeros(first.shape[0], dtype=bool)])
+            rows[missing] = [self._cache[keys[i]] for i in missing]
+
+        # objects seen before training objects were added
+        rows_unique, first = np.unique(rows, return_index=True)
+        self._used[rows_unique] = True
+        n_train = self.fit_X_.shape[0]
+        stale_flag = self._n_seen[rows_unique] < n_train
+        for n_seen in np.unique(self._n_seen[rows_unique[stale_flag]]):
+            flag = stale_flag & (self._n_seen[rows_unique] == n_seen)
+            stale_rows = rows_unique[flag]
+            stale_X = X[first[flag]]
+            for j in range(n_seen, n_train):
+                new_dist = np.sqrt(np.sum((stale_X - self.fit_X_[j]) ** 2,
+                                          axis=1))
+                closer = np.flatnonzero(new_dist < self._dist[stale_rows, -1])
+                if closer.shape[0] == 0:
+                    continue
+                update_rows = stale_rows[closer]
+                dist = np.concatenate([self._dist[update_rows],
+                                       new_dist[closer, None]], axis=1)
+                ind = np.concatenate([self._ind[update_rows],
+                                      np.full((closer.shape[0], 1), j)],
+                                     axis=1)
+                order = np.argsort(dist, axis=1, kind='stable')
+                order = order[:, :self.n_neighbors]
+                self._dist[update_rows] = np.take_along_axis(dist, order, 1)
+                self._ind[update_rows] = np.take_along_axis(ind, order, 1)
+            self._n_seen[stale_rows] = n_train
+
+        return self._dist[rows], self._ind[rows]
+
+    def fill_cache(self, X):
+        """Cache up to date neighbours of objects.
+
+        Later calls for these objects only read the cache, so they can
+        run in parallel threads.
+        """
+        self.kneighbors(X)
+        return self
+
+    def predict_proba(self, X):
+        """Classification probability of each class, ordered as classes_."""
+        dist, ind = self.kneighbors(X)
+        if self.weights == 'uniform':
+            weights = np.ones(dist.shape)
+        else:
+            with np.errstate(divide='ignore'):
+                weights = 1. / dist
+            exact = np.isinf(weights)
+            exact_rows = np.any(exact, axis=1)
+            weights[exact_rows] = exact[exact_rows]
+
+        codes = self._fit_codes[ind]
+        prob = np.zeros((dist.shape[0], self.classes_.shape[0]))
+        for c in range(self.classes_.shape[0]):
+            prob[:, c] = np.sum(weights * (codes == c), axis=1)
+
+        return prob / prob.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """Predicted classes."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class CachedKernelSVC(object):
+    """Support Vector classifier which keeps kernel matrices between fits.
+
+    The training kernel and the kernel between classified objects and the
+    training sample are cached, keyed by feature values, and the SVC is
+    trained and evaluated with kernel='precomputed'. A new fit only
+    computes rows and columns for new training objects and drops those of
+    removed ones. Squared distances (rbf) or dot products (other kernels)
+    are cached, so gamma='scale' may follow the training sample.
+
+    Parameters
+    ----------
+    kernel: str (optional)
+        'rbf', 'linear', 'poly' or 'sigmoid'. Default is 'rbf'.
+    gamma: str or float (optional)
+        Kernel coefficient, as in sklearn.svm.SVC. Default is 'scale'.
+    degree: int (optional)
+        Degree of the 'poly' kernel. Default is 3.
+    coef0: float (optional)
+        Independent term of 'poly' and 'sigmoid' kernels. Default is 0.
+    kwargs: dict (optional)
+        Other parameters passed to sklearn.svm.SVC.
+    """
+    def __init__(self, kernel='rbf', gamma='scale', degree=3, coef0=0.0,
+                 **kwargs):
+        if kernel not in ['rbf', 'linear', 'poly', 'sigmoid']:
+            raise ValueError('Kernel not available for caching: ' +
+                             str(kernel))
+        self.kernel = kernel
+        self.gamma = gamma
+        self.degree = degree
+        self.coef0 = coef0
+        self.kwargs = kwargs
+
+        self._train_keys = {}
+        self._train_base = np.zeros((0, 0))
+        self._test_keys = {}
+        self._test_X = None
+        self._test_base = None
+        self._used = np.zeros(0, dtype=bool)
+
+    def _base(self, X, Y):
+        """Squared distances (rbf) or dot products between rows."""
+        if self.kernel == 'rbf':
+            return euclidean_distances(X, Y, squared=True)
+        return np.dot(X, Y.T)
+
+    def _apply(self, base):
+        """Kernel from cached squared distances or dot products."""
+        if self.kernel == 'rbf':
+            return np.exp(-self.gamma_ * base)
+        elif self.kernel == 'linear':
+            return base
+        elif self.kernel == 'poly':
+            return (self.gamma_ * base + self.coef0) ** self.degree
+        return np.tanh(self.gamma_ * base + self.coef0)
+
+    def fit(self, X, y):
+        """Train on a training sample, reusing cached kernel entries."""
+        X = np.ascontiguousarray(X, dtype=float)
+        keys = [each_row.tobytes() for each_row in X]
+        old_pos = np.array([self._train_keys.get(each_key, -1)
+                            for each_key in keys], dtype=int)
+        known = np.flatnonzero(old_pos >= 0)
+        new = np.flatnonzero(old_pos < 0)
+
+        base = np.empty((X.shape[0], X.shape[0]))
+        base[np.ix_(known, known)] = \
+            self._train_base[np.ix_(old_pos[known], old_pos[known])]
+        if new.shape[0] > 0:
+            new_base = self._base(X[new], X)
+            base[new, :] = new_base
+            base[:, new] = new_base.T
+
+        # columns of cached objects, dropping those unused since last fit
+        if self._test_X is not None:
+            keep = np.flatnonzero(self._used)
+            test_base = np.empty((keep.shape[0], X.shape[0]))
+            test_base[:, known] = self._test_base[keep][:, old_pos[known]]
+            if keep.shape[0] > 0 and new.shape[0] > 0:
+                test_base[:, new] = self._base(self._test_X[keep], X[new])
+
+            new_row = np.full(self._used.shape[0], -1)
+            new_row[keep] = np.arange(keep.shape[0])
+            self._test_keys = {each_key: new_row[row] for each_key, row in
+                               self._test_keys.items() if new_row[row] >= 0}
+            self._test_X = self._test_X[keep]
+            self._test_base = test_base
+            self._used = np.zeros(keep.shape[0], dtype=bool)
+
+        self._train_keys = {each_key: i for i, each_key in enumerate(keys)}
+        self._train_X = X
+        self._train_base = base
+
+        if self.gamma == 'scale':
+            X_var = X.var()
+            self.gamma_ = 1.0 / (X.shape[1] * X_var) if X_var != 0 else 1.0
+        elif self.gamma == 'auto':
+            self.gamma_ = 1.0 / X.shape[1]
+        else:
+            self.gamma_ = self.gamma
+
+        self.svc_ = SVC(kernel='precomputed', probability=True, **self.kwargs)
+        self.svc_.fit(self._apply(base), y)
+        self.classes_ = self.svc_.classes_
+        return self
+
+    def _kernel(self, X):
+        """Kernel between objects and the training sample."""
+        X = np.ascontiguousarray(X, dtype=float)
+        keys = [each_row.tobytes() for each_row in X]
+        rows = np.array([self._test_keys.get(each_key, -1)
+                         for each_key in keys], dtype=int)
+
+        missing = np.flatnonzero(rows < 0)
+        if missing.shape[0] > 0:
+            first_keys = {}
+            for i in missing:
+                first_keys.setdefault(keys[i], i)
+            first = np.array(list(first_keys.values()), dtype=int)
+
+            start = 0 if self._test_X is None else self._test_X.shape[0]
+            for j, i in enumerate(first):
+                self._test_keys[keys[i]] = start + j
+            new_base = self._base(X[first], self._train_X)
+            if self._test_X is None:
+                self._test_X = X[first]
+                self._test_base = new_base
+            else:
+                self._test_X = np.concatenate([self._test_X, X[first]])
+                self._test_base = np.concatenate([self._test_base, new_base])
+            self._used = np.concatenate(
+                [self._used, np.zeros(first.shape[0], dtype=bool)])
+            rows[missing] = [self._test_keys[keys[i]] for i in missing]
+
+        self._used[rows] = True
+        return self._apply(self._test_base[rows])
+
+    def fill_cache(self, X):
+        """Cache the kernel between objects and the training sample.
+
+        Later calls for these objects only read the cache, so they can
+        run in parallel threads.
+        """
+        self._kernel(X)
+        return self
+
+    def predict_proba(self, X):
+        """Classification probability of each class, ordered as classes_."""
+        return self.svc_.predict_proba(self._kernel(X))
+
+    def predict(self, X):
+        """Predicted classes."""
+        return self.svc_.predict(self._kernel(X))
+
+
 def main():
     return None
 
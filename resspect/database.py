@@ -22,6 +22,10 @@ import pandas as pd
 import tarfile
 
 from resspect.classifiers import *
+from resspect.feature_store import is_binary_features_file
+from resspect.feature_store import read_features_table
+from resspect.sample_partitions import SAMPLE_NAMES
+from resspect.sample_partitions import SamplePartitions
 
 from resspect.query_strategies import *
 from resspect.query_budget_strategies import *
@@ -31,6 +35,33 @@ from resspect.metrics import efficiency, purity, fom, accuracy, get_snpcc_metric
 __all__ = ['DataBase']
 
 
+def _sample_property(sample: str, kind: str):
+    """DataBase attribute for one sample, read from the sample partitions
+    when they are in use.
+
+    Assigning the attribute detaches the partitions, so samples can
+    still be replaced directly.
+
+    Parameters
+    ----------
+    sample: str
+        One of 'train', 'pool', 'test' or 'validation'.
+    kind: str
+        One of 'features', 'metadata' or 'labels'.
+    """
+    def getter(self):
+        if self._partitions is not None:
+            return self._partitions.get(sample, kind)
+        return self._samples[(sample, kind)]
+
+    def setter(self, value):
+        if self._partitions is not None:
+            self._detach_partitions()
+        self._samples[(sample, kind)] = value
+
+    return property(getter, setter)
+
+
 class DataBase:
     """DataBase object, upon which the active learning loop is performed.
 
@@ -42,6 +73,9 @@ class DataBase:
         Classifier object.
     classprob: np.array
         Classification probability for all objects, [pIa, pnon-Ia].
+    classprob_rows: np.array
+        Positions in the pool of the objects in classprob, predicted_class
+        and ensemble_probs. None if the whole pool was classified.
     data: pd.DataFrame
         Complete information read from features files.
     features: pd.DataFrame
@@ -119,10 +153,14 @@ class DataBase:
         Get min and max mjds for PLAsTiCC data
     load_features(path_to_file: str, method: str)
         Load features according to the chosen feature extraction method.
+    locate_ids(sample: str, ids: np.array)
+        Position of objects in one sample.
     make_query(strategy: str, batch: int) -> list
         Identify new object to be added to the training sample.
     output_photo_Ia(threshold: float)
         Returns the metadata for  photometrically classified SN Ia.
+    remove_ids(ids: np.array, samples: tuple)
+        Remove objects from samples.
     save_metrics(loop: int, output_metrics_file: str)
         Save current metrics to file.
     save_queried_sample(queried_sample_file: str, loop: int, full_sample: str)
@@ -177,10 +215,30 @@ class DataBase:
     >>>                          full_sample=False)
     """
 
+    pool_features = _sample_property('pool', 'features')
+    pool_labels = _sample_property('pool', 'labels')
+    pool_metadata = _sample_property('pool', 'metadata')
+    test_features = _sample_property('test', 'features')
+    test_labels = _sample_property('test', 'labels')
+    test_metadata = _sample_property('test', 'metadata')
+    train_features = _sample_property('train', 'features')
+    train_labels = _sample_property('train', 'labels')
+    train_metadata = _sample_property('train', 'metadata')
+    validation_features = _sample_property('validation', 'features')
+    validation_labels = _sample_property('validation', 'labels')
+    validation_metadata = _sample_property('validation', 'metadata')
+
     def __init__(self):
+        self._id_indexes = {}
+        self._partitions = None
+        self._samples = {}
         self.alt_label = False
         self.classifier = None
+        self._classifier_method = None
+        self._classifier_train_ids = None
+        self._classifier_train_features = None
         self.classprob = np.array([])
+        self.classprob_rows = None
         self.data = pd.DataFrame()
         self.ensemble_probs = None
         self.features = pd.DataFrame([])
@@ -222,7 +280,9 @@ class DataBase:
         Parameters
         ----------
         path_to_bazin_file: str
-            Complete path to Bazin features file.
+            Complete path to Bazin features file. Files ending in
+            '.npy', '.parquet' or '.feather' are read with
+            resspect.feature_store.read_features_table.
         screen: bool (optional)
             If True, print on screen number of light curves processed.
             Default is False.
@@ -243,6 +303,9 @@ class DataBase:
             data = pd.read_csv(io.BytesIO(content))
             tar.close()
 
+        elif is_binary_features_file(path_to_bazin_file):
+            data = read_features_table(path_to_bazin_file)
+
         else:
             data = pd.read_csv(path_to_bazin_file, index_col=False)
             if 'redshift' not in data.keys():
@@ -364,6 +427,8 @@ class DataBase:
             content = tar.extractfile(fname).read()
             data = pd.read_csv(io.BytesIO(content))
             tar.close()
+        elif is_binary_features_file(path_to_photometry_file):
+            data = read_features_table(path_to_photometry_file)
         else:
             data = pd.read_csv(path_to_photometry_file,
                                index_col=False)
@@ -501,6 +566,222 @@ class DataBase:
 
         return id_name
 
+    def _id_index(self, sample: str) -> pd.Index:
+        """Hash index of object ids in one sample.
+
+        The index is rebuilt only when the sample changes.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+
+        Returns
+        -------
+        pd.Index
+        """
+        metadata = getattr(self, sample + '_metadata')
+        cached = self._id_indexes.get(sample)
+        if cached is None or cached[0] is not metadata:
+            if metadata.shape[0] > 0:
+                ids = metadata[self.identify_keywords()].values
+            else:
+                ids = []
+            cached = (metadata, pd.Index(ids))
+            self._id_indexes[sample] = cached
+        return cached[1]
+
+    def _same_features(self, sample: str, other: str) -> bool:
+        """Check if two samples hold the same features in the same order.
+
+        True if both are the same rows of the sample partitions, or if
+        their features are identical. Predictions for one can then be
+        reused for the other.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+        other: str
+            One of 'train', 'pool', 'test' or 'validation'.
+
+        Returns
+        -------
+        bool
+        """
+        if self._partitions is not None and \
+                np.array_equal(self._partitions.indices(sample),
+                               self._partitions.indices(other)):
+            return True
+
+        features = getattr(self, sample + '_features')
+        other_features = getattr(self, other + '_features')
+        return features is other_features or \
+            (np.shape(features) == np.shape(other_features) and
+             np.array_equal(features, other_features))
+
+    def _pool_to_classify(self, queryable_only: bool):
+        """Choose the pool objects to be classified.
+
+        Parameters
+        ----------
+        queryable_only: bool
+            If True, choose only objects in queryable_ids.
+
+        Returns
+        -------
+        pool_rows: np.array
+            Positions in the pool of the chosen objects. None for the
+            whole pool.
+        pool_features: np.array
+            Features to be classified. The whole pool if it is the
+            validation sample, which must be classified in full.
+        """
+        if not queryable_only:
+            return None, self.pool_features
+
+        id_name = self.identify_keywords()
+        pool_rows = np.flatnonzero(get_queryable_flag(
+            self.pool_metadata[id_name].values, self.queryable_ids))
+        if self._same_features('validation', 'pool'):
+            return pool_rows, self.pool_features
+
+        return pool_rows, self.pool_features[pool_rows]
+
+    def _keep_pool_rows(self, pool_rows, ensemble=False):
+        """Keep predictions for the chosen pool objects only.
+
+        Set classprob_rows and, if the whole pool was classified,
+        restrict predicted_class, classprob and ensemble_probs to
+        pool_rows.
+
+        Parameters
+        ----------
+        pool_rows: np.array
+            Positions in the pool of the chosen objects, or None.
+        ensemble: bool (optional)
+            If True, also restrict ensemble_probs. Default is False.
+        """
+        self.classprob_rows = pool_rows
+        if pool_rows is None or self.classprob.shape[0] == pool_rows.shape[0]:
+            return
+
+        self.predicted_class = self.predicted_class[pool_rows]
+        self.classprob = self.classprob[pool_rows]
+        if ensemble:
+            self.ensemble_probs = self.ensemble_probs[pool_rows]
+
+    def _train_features_changed(self, train_ids: np.array,
+                                known_flag: np.array) -> bool:
+        """Check if training objects changed features since last classify.
+
+        Time domain loops replace the features of training objects
+        observed again, keeping their ids.
+
+        Parameters
+        ----------
+        train_ids: np.array
+            Ids of the current training sample.
+        known_flag: np.array
+            Flag of training objects used by the current classifier.
+
+        Returns
+        -------
+        bool
+        """
+        old_ids = pd.Index(self._classifier_train_ids)
+        if not old_ids.is_unique:
+            return True
+
+        old_rows = old_ids.get_indexer(train_ids[known_flag])
+        return not np.array_equal(
+            np.asarray(self.train_features)[known_flag],
+            self._classifier_train_features[old_rows])
+
+    def locate_ids(self, sample: str, ids: np.array) -> np.array:
+        """Position of objects in one sample.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+        ids: np.array
+            Object ids to be found.
+
+        Returns
+        -------
+        np.array
+            Position of each object in the sample, -1 if not present.
+            For repeated ids the first position is given.
+        """
+        index = self._id_index(sample)
+        ids = np.asarray(ids)
+        if index.is_unique:
+            return index.get_indexer(ids)
+
+        first = ~index.duplicated(keep='first')
+        positions = index[first].get_indexer(ids)
+        found = positions >= 0
+        positions[found] = np.flatnonzero(first)[positions[found]]
+        return positions
+
+    def remove_ids(self, ids: np.array,
+                   samples=('pool', 'test', 'validation')):
+        """Remove objects from samples.
+
+        Parameters
+        ----------
+        ids: np.array
+            Ids of objects to be removed, ids not found are ignored.
+        samples: tuple (optional)
+            Samples from which objects are removed.
+            Default is ('pool', 'test', 'validation').
+        """
+        partitions = self._attach_partitions()
+        if partitions.metadata.shape[0] == 0:
+            return
+        id_name = self.identify_keywords()
+        rows = np.flatnonzero(partitions.metadata[id_name].isin(ids).values)
+        for name in samples:
+            partitions.remove(name, rows)
+
+    def _attach_partitions(self) -> SamplePartitions:
+        """Store current samples as partitions of one table, if needed.
+
+        Returns
+        -------
+        resspect.SamplePartitions
+        """
+        if self._partitions is None:
+            samples = dict((name, (self._samples[(name, 'features')],
+                                   self._samples[(name, 'metadata')],
+                                   self._samples[(name, 'labels')]))
+                           for name in SAMPLE_NAMES)
+            self._partitions = SamplePartitions.from_samples(samples)
+        return self._partitions
+
+    def _detach_partitions(self):
+        """Copy every sample out of the partitions, so they can be
+        assigned independently.
+
+        Samples holding the same objects share the copies, so they
+        share rows again if partitions are attached later on.
+        """
+        partitions = self._partitions
+        self._partitions = None
+        for i, name in enumerate(SAMPLE_NAMES):
+            source = name
+            for previous in SAMPLE_NAMES[:i]:
+                if np.array_equal(partitions.indices(previous),
+                                  partitions.indices(name)):
+                    source = previous
+                    break
+            for kind in ['features', 'metadata', 'labels']:
+                if source == name:
+                    self._samples[(name, kind)] = partitions.get(name, kind)
+                else:
+                    self._samples[(name, kind)] = self._samples[(source, kind)]
+
     def build_orig_samples(self, nclass=2, screen=False, queryable=False,
                            sep_files=False):
         """Construct train and test samples as given in the original data set.
@@ -553,33 +834,30 @@ class DataBase:
                 self.queryable_ids = self.pool_metadata[id_name].values
 
         else:
-            train_flag = self.metadata['orig_sample'] == 'train'
-            train_data = self.features[train_flag]
-            self.train_features = train_data
-            self.train_metadata = self.metadata[train_flag]
-
-            test_flag = self.metadata['orig_sample'] == 'test'
-            test_data = self.features[test_flag]
-            self.test_features = test_data
-            self.test_metadata = self.metadata[test_flag]
-
-            if 'validation' in self.metadata['orig_sample'].values:
-                val_flag = self.metadata['orig_sample'] == 'validation'
+            if nclass != 2:
+                raise ValueError("Only 'Ia x non-Ia' are implemented! "
+                                 "\n Feel free to add other options.")
+
+            orig_sample = self.metadata['orig_sample'].values
+            train_flag = orig_sample == 'train'
+            test_flag = orig_sample == 'test'
+
+            if 'validation' in orig_sample:
+                val_flag = orig_sample == 'validation'
             else:
                 val_flag = test_flag
 
-            val_data = self.features[val_flag]
-            self.validation_features = val_data
-            self.validation_metadata = self.metadata[val_flag]
-
-            if 'pool' in self.metadata['orig_sample'].values:
-                pool_flag = self.metadata['orig_sample'] == 'pool'
+            if 'pool' in orig_sample:
+                pool_flag = orig_sample == 'pool'
             else:
                 pool_flag = test_flag
 
-            pool_data = self.features[pool_flag]
-            self.pool_features = pool_data
-            self.pool_metadata = self.metadata[pool_flag]
+            # all samples are views over the complete feature matrix
+            ia_flag = self.metadata['type'].values == 'Ia'
+            self._partitions = SamplePartitions(
+                self.features, self.metadata, ia_flag.astype(int),
+                members={'train': train_flag, 'test': test_flag,
+                         'validation': val_flag, 'pool': pool_flag})
 
             if queryable:
                 queryable_flag = self.pool_metadata['queryable'].values
@@ -587,23 +865,6 @@ class DataBase:
             else:
                 self.queryable_ids = self.pool_metadata[id_name].values
 
-            if nclass == 2:
-                train_ia_flag = self.train_metadata['type'].values == 'Ia'
-                self.train_labels = train_ia_flag.astype(int)
-
-                test_ia_flag = self.test_metadata['type'].values == 'Ia'
-                self.test_labels = test_ia_flag.astype(int)
-
-                val_ia_flag = self.validation_metadata['type'].values == 'Ia'
-                self.validation_labels = val_ia_flag.astype(int)
-
-                pool_ia_flag = self.pool_metadata['type'].values == 'Ia'
-                self.pool_labels = pool_ia_flag.astype(int)
-
-            else:
-                raise ValueError("Only 'Ia x non-Ia' are implemented! "
-                                 "\n Feel free to add other options.")
-
         if screen:
             print('\n')
             print('** Inside build_orig_samples: **')
@@ -615,10 +876,11 @@ class DataBase:
 
         # check repeated ids between training and pool
         if len(self.train_metadata) > 0 and len(self.pool_metadata) > 0:
-            for name in self.train_metadata[id_name].values:
-                if name in self.pool_metadata[id_name].values:
-                    raise ValueError('Object ', name, 'found in both, training ' +\
-                                    'and pool samples!')
+            train_ids = self.train_metadata[id_name].values
+            in_pool = self.locate_ids('pool', train_ids) >= 0
+            if np.any(in_pool):
+                raise ValueError('Object ', train_ids[in_pool][0], 'found in both, training ' +\
+                                 'and pool samples!')
 
         # check if there are repeated ids within each sample
         names = ['train', 'pool', 'validation', 'test']
@@ -688,12 +950,10 @@ class DataBase:
         # join classes
         frames_train = [temp_train_ia, temp_train_nonia]
         temp_train = pd.concat(frames_train, ignore_index=True, axis=0)
-        train_flag = np.array([data_copy[id_name].values[i] in temp_train[id_name].values
-                               for i in range(data_copy.shape[0])])
-
-        self.train_metadata = data_copy[train_flag]
+        train_flag = data_copy[id_name].isin(temp_train[id_name].values).values
 
         if sep_files:
+            self.train_metadata = data_copy[train_flag]
             self.train_features = self.train_features[train_flag]
             test_labels = self.test_metadata['type'].values == 'Ia'
             self.test_labels = test_labels.astype(int)
@@ -702,24 +962,16 @@ class DataBase:
             pool_labels = self.pool_metadata['type'].values == 'Ia'
             self.pool_labels = pool_labels.astype(int)
 
-        else:
-            self.train_features = self.features[train_flag]
+            train_label_flag = data_copy['type'][train_flag].values == 'Ia'
+            self.train_labels = train_label_flag.astype(int)
 
-            # get test sample
+        else:
+            # test, pool and validation are all the non-training objects
             test_flag = ~train_flag
-            self.test_metadata = data_copy[test_flag]
-            self.test_features = self.features[test_flag]
-            self.pool_metadata = self.test_metadata
-            self.pool_features = self.test_features
-            self.validation_features = self.test_features
-            self.validation_metadata = self.test_metadata
-            test_label_flag = data_copy['type'][test_flag].values == 'Ia'
-            self.test_labels = test_label_flag.astype(int)
-            self.pool_labels = self.test_labels
-            self.validation_labels = self.test_labels
-
-        train_label_flag = data_copy['type'][train_flag].values == 'Ia'
-        self.train_labels = train_label_flag.astype(int)
+            self._partitions = SamplePartitions(
+                self.features, data_copy, ia_flag.values.astype(int),
+                members={'train': train_flag, 'test': test_flag,
+                         'validation': test_flag, 'pool': test_flag})
 
         if queryable and not sep_files:
             queryable_flag = data_copy['queryable'].values
@@ -743,10 +995,11 @@ class DataBase:
             print('   From which queryable: ', self.queryable_ids.shape[0], '\n')
 
         # check if there are repeated ids
-        for name in self.train_metadata[id_name].values:
-            if name in self.pool_metadata[id_name].values:
-                raise ValueError('Object ', name, ' present in both, ' + \
-                                 'training and pool samples!')
+        train_ids = self.train_metadata[id_name].values
+        in_pool = self.locate_ids('pool', train_ids) >= 0
+        if np.any(in_pool):
+            raise ValueError('Object ', train_ids[in_pool][0], ' present in both, ' + \
+                             'training and pool samples!')
 
         # check if there are repeated ids within each sample
         names = ['train', 'pool', 'validation', 'test']
@@ -845,7 +1098,9 @@ class DataBase:
             wsample.close()
 
     def classify(self, method: str, save_predictions=False, pred_dir=None,
-                 loop=None, screen=False, **kwargs):
+                 loop=None, screen=False, warm_start=False, chunk_size=None,
+                 n_threads=1, queryable_only=False, n_replace=None,
+                 window=None, **kwargs):
         """Apply a machine learning classifier.
 
         Populate properties: predicted_class and class_prob
@@ -867,6 +1122,37 @@ class DataBase:
         pred_dir: str (optional)
             Output directory to store class predictions.
             Only used if `save_predictions == True`. Default is None.
+        warm_start: bool (optional)
+            If True, update the classifier from the previous call with the
+            objects added to the training sample since then, instead of
+            training a new one (see resspect.classifiers.update_classifier).
+            Only for `RandomForest`, 'GradientBoostedTrees', 'KNN', 'MLP',
+            'NB' and 'SVM', where 'KNN' keeps neighbour lists of classified
+            objects (see resspect.classifiers.IncrementalKNN) and 'SVM'
+            keeps kernel matrices (see resspect.classifiers.CachedKernelSVC);
+            falls back to a new classifier if objects left the training
+            sample. Default is False.
+        n_replace: int (optional)
+            Number of trees replaced ('RandomForest') or boosting rounds
+            added ('GradientBoostedTrees') by a warm update. If None, a
+            tenth of n_estimators. Only used if warm_start is True.
+        window: int (optional)
+            Number of training objects used to train the new trees of a
+            warm update, all newly added objects included. If None, use
+            the full training sample. Only used if warm_start is True.
+        chunk_size: int (optional)
+            If given, the classifier is only trained on the training sample
+            and pool and validation samples are classified in chunks of
+            this size (see resspect.classifiers.predict_in_chunks).
+            Default is None.
+        n_threads: int (optional)
+            Number of threads classifying chunks. If larger than 1,
+            samples are classified as for chunk_size. Default is 1.
+        queryable_only: bool (optional)
+            If True, only classify pool objects in queryable_ids, whose
+            positions are stored in classprob_rows. The validation sample
+            is still classified in full. make_query then only accepts
+            query_thre < 1 for 'RandomSampling'. Default is False.
         kwargs: extra parameters
             Parameters required by the chosen classifier.
         """
@@ -877,42 +1163,94 @@ class DataBase:
             print('   ... train_labels: ', self.train_labels.shape)
             print('   ... pool_features: ', self.pool_features.shape)
 
-        if method == 'RandomForest':
+        id_name = self.identify_keywords()
+        train_ids = self.train_metadata[id_name].values
+        pool_rows, scored_features = self._pool_to_classify(queryable_only)
+        # only train if the pool is classified in chunks or empty
+        chunked = chunk_size is not None or n_threads > 1
+        classify_after = chunked or scored_features.shape[0] == 0
+        pool_features = None if classify_after else scored_features
+        new_rows = None
+        if warm_start and self._classifier_method == method and \
+                method in ['RandomForest', 'GradientBoostedTrees', 'KNN',
+                           'MLP', 'NB', 'SVM'] and \
+                (method not in ['KNN', 'SVM'] or
+                 isinstance(self.classifier, (IncrementalKNN,
+                                              CachedKernelSVC))):
+            known_flag = np.isin(train_ids, self._classifier_train_ids)
+            new_rows = np.flatnonzero(~known_flag)
+            # cached kernels follow any change of the training sample
+            if not isinstance(self.classifier, CachedKernelSVC) and \
+                    (np.sum(known_flag) != len(self._classifier_train_ids) or
+                     not np.all(np.isin(self.train_labels[new_rows],
+                                        self.classifier.classes_)) or
+                     self._train_features_changed(train_ids, known_flag)):
+                new_rows = None
+
+        if new_rows is not None:
+            self.predicted_class, self.classprob, self.classifier = \
+                update_classifier(self.classifier, self.train_features,
+                                  self.train_labels, pool_features,
+                                  new_rows, n_replace=n_replace,
+                                  window=window)
+
+        elif method == 'RandomForest':
             self.predicted_class,  self.classprob, self.classifier = \
                    random_forest(self.train_features, self.train_labels,
-                                 self.pool_features, **kwargs)
+                                 pool_features, **kwargs)
 
         elif method == 'GradientBoostedTrees':
             self.predicted_class,  self.classprob, self.classifier = \
                 gradient_boosted_trees(self.train_features, self.train_labels,
-                                       self.pool_features, **kwargs)
+                                       pool_features, **kwargs)
         elif method == 'KNN':
             self.predicted_class,  self.classprob, self.classifier = \
                 knn(self.train_features, self.train_labels,
-                               self.pool_features, **kwargs)
+                               pool_features, incremental=warm_start,
+                               **kwargs)
         elif method == 'MLP':
             self.predicted_class,  self.classprob, self.classifier = \
                 mlp(self.train_features, self.train_labels,
-                               self.pool_features, **kwargs)
+                               pool_features, **kwargs)
         elif method == 'SVM':
             self.predicted_class, self.classprob, self.classifier = \
                 svm(self.train_features, self.train_labels,
-                               self.pool_features, **kwargs)
+                               pool_features, incremental=warm_start,
+                               **kwargs)
         elif method == 'NB':
             self.predicted_class, self.classprob, self.classifier = \
                 nbg(self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, **kwargs)
         else:
             raise ValueError("The only classifiers implemented are" +
                               "'RandomForest', 'GradientBoostedTrees'," +
                               "'KNN', 'MLP' and NB'." +
                              "\n Feel free to add other options.")
 
+        self._classifier_method = method
+        self._classifier_train_ids = train_ids
+        self._classifier_train_features = np.array(self.train_features)
+
+        if classify_after:
+            self.predicted_class, self.classprob = \
+                predict_in_chunks(self.classifier, scored_features,
+                                  chunk_size=chunk_size, n_threads=n_threads)
+
         # estimate classification for validation sample
-        self.validation_class = \
-            self.classifier.predict(self.validation_features)
-        self.validation_prob = \
-            self.classifier.predict_proba(self.validation_features)
+        if self._same_features('validation', 'pool'):
+            self.validation_class = self.predicted_class
+            self.validation_prob = self.classprob
+        elif chunked:
+            self.validation_class, self.validation_prob = \
+                predict_in_chunks(self.classifier, self.validation_features,
+                                  chunk_size=chunk_size, n_threads=n_threads)
+        else:
+            self.validation_class = \
+                self.classifier.predict(self.validation_features)
+            self.validation_prob = \
+                self.classifier.predict_proba(self.validation_features)
+
+        self._keep_pool_rows(pool_rows)
 
         if save_predictions:
             id_name = self.identify_keywords()
@@ -931,7 +1269,10 @@ class DataBase:
             op.close()
 
     def classify_bootstrap(self, method: str, save_predictions=False, pred_dir=None,
-                           loop=None, n_ensembles=10, screen=False, **kwargs):
+                           loop=None, n_ensembles=10, screen=False,
+                           n_workers=1, seed=None, tree_committee=False,
+                           chunk_size=None, n_threads=1, queryable_only=False,
+                           **kwargs):
         """Apply a machine learning classifier bootstrapping the classifier.
 
         Populate properties: predicted_class, class_prob and ensemble_probs.
@@ -949,6 +1290,31 @@ class DataBase:
             Only used if `save_predictions == True`. Default is None.
         loop: int (optional)
             Corresponding loop. Default is None.
+        n_ensembles: int (optional)
+            Number of classifiers in the ensemble. Default is 10.
+        screen: bool (optional)
+            If True, display dimensions of samples. Default is False.
+        n_workers: int (optional)
+            Number of processes training ensemble members in parallel.
+            Default is 1.
+        seed: int (optional)
+            Seed for the bootstrap resamples. Default is None.
+        tree_committee: bool (optional)
+            If True and method is `RandomForest`, train a single forest
+            and use n_ensembles groups of its trees as the ensemble,
+            instead of n_ensembles bootstrapped forests. Default is False.
+        chunk_size: int (optional)
+            If given, pool and validation samples are classified in chunks
+            of this size after training the ensemble (see
+            resspect.classifiers.predict_in_chunks). Default is None.
+        n_threads: int (optional)
+            Number of threads classifying chunks. If larger than 1,
+            samples are classified as for chunk_size. Default is 1.
+        queryable_only: bool (optional)
+            If True, only classify pool objects in queryable_ids, whose
+            positions are stored in classprob_rows. The validation sample
+            is still classified in full. make_query then only accepts
+            query_thre < 1 for 'RandomSampling'. Default is False.
         kwargs: extra parameters
             Parameters required by the chosen classifier.
         """
@@ -958,46 +1324,77 @@ class DataBase:
             print('   ... train_labels: ', self.train_labels.shape)
             print('   ... pool_features: ', self.pool_features.shape)
 
-        if method == 'RandomForest':
+        pool_rows, pool_features = self._pool_to_classify(queryable_only)
+
+        if method == 'RandomForest' and tree_committee:
+            self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
+            forest_committee(self.train_features, self.train_labels,
+                             pool_features, n_committees=n_ensembles,
+                             chunk_size=chunk_size, n_threads=n_threads,
+                             **kwargs)
+
+        elif method == 'RandomForest':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(random_forest, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
 
         elif method == 'GradientBoostedTrees':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(gradient_boosted_trees, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
         elif method == 'KNN':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(knn, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
         elif method == 'MLP':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(mlp, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
         elif method == 'SVM':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(svm, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
         elif method == 'NB':
             self.predicted_class, self.classprob, self.ensemble_probs, self.classifier = \
             bootstrap_clf(nbg, n_ensembles,
                           self.train_features, self.train_labels,
-                          self.pool_features, **kwargs)
+                          pool_features, n_workers=n_workers,
+                          seed=seed, chunk_size=chunk_size,
+                          n_threads=n_threads, **kwargs)
         else:
             raise ValueError('Classifier not recognized!')
 
-        self.validation_class = \
-            self.classifier.predict(self.validation_features)
-        self.validation_prob = \
-            self.classifier.predict_proba(self.validation_features)
+        self._classifier_method = None
 
-        
+        if self._same_features('validation', 'pool'):
+            self.validation_class = self.predicted_class
+            self.validation_prob = self.classprob
+        elif chunk_size is not None or n_threads > 1:
+            self.validation_class, self.validation_prob = \
+                predict_in_chunks(self.classifier, self.validation_features,
+                                  chunk_size=chunk_size, n_threads=n_threads)
+        else:
+            self.validation_class = \
+                self.classifier.predict(self.validation_features)
+            self.validation_prob = \
+                self.classifier.predict_proba(self.validation_features)
+
+        self._keep_pool_rows(pool_rows, ensemble=True)
 
         if save_predictions:
             id_name = self.identify_keywords()
@@ -1134,7 +1531,9 @@ class DataBase:
             print('Metrics values: ', self.metrics_list_values)
 
 
-    def make_query_budget(self, budgets, strategy='UncSampling', screen=False) -> list:
+    def make_query_budget(self, budgets, strategy='UncSampling', screen=False,
+                          budget_method='greedy', lazy=False,
+                          max_bytes=None) -> list:
         """Identify new object to be added to the training sample.
 
         Parameters
@@ -1151,11 +1550,23 @@ class DataBase:
             If true, display on screen information about the
             displacement in order and classificaion probability due to
             constraints on queryable sample. Default is False.
+        budget_method: str (optional)
+            How objects are fit within budget for uncertainty and random
+            strategies: 'greedy' or 'exact' (small budgets only).
+            Default is 'greedy'.
+        lazy: bool (optional)
+            If True, QBD strategies only rescore objects which can still
+            be chosen at each step (lazy greedy). Default is False.
+        max_bytes: int (optional)
+            Memory limit for the joint probabilities of QBD strategies.
+            If None, use resspect.batch_functions.MAX_BYTES.
 
         Returns
         -------
         query_indx: list
             List of indexes identifying the objects to be queried within budget.
+            Indexes refer to the pool, also if only part of it was
+            classified (see classprob_rows).
         """
         if screen:
             print('\n Inside make_query_budget: ')
@@ -1166,6 +1577,8 @@ class DataBase:
         id_name = self.identify_keywords()
         queryable_ids = self.queryable_ids
         pool_metadata = self.pool_metadata
+        if self.classprob_rows is not None:
+            pool_metadata = pool_metadata.iloc[self.classprob_rows]
         
         if strategy == 'UncSampling':
             query_indx = batch_queries_uncertainty(class_probs=self.classprob,
@@ -1173,6 +1586,7 @@ class DataBase:
                                                    queryable_ids=queryable_ids,
                                                    pool_metadata=pool_metadata,
                                                    budgets=budgets,
+                                                   method=budget_method,
                                                    criteria="uncertainty" )
 
         elif strategy == 'UncSamplingEntropy':
@@ -1181,6 +1595,7 @@ class DataBase:
                                                    queryable_ids=queryable_ids,
                                                    pool_metadata=pool_metadata,
                                                    budgets=budgets,
+                                                   method=budget_method,
                                                    criteria="entropy" )
 
         elif strategy == 'UncSamplingLeastConfident':
@@ -1189,6 +1604,7 @@ class DataBase:
                                                    queryable_ids=queryable_ids,
                                                    pool_metadata=pool_metadata,
                                                    budgets=budgets,
+                                                   method=budget_method,
                                                    criteria="least_confident" )
 
         elif strategy == 'UncSamplingMargin':
@@ -1197,6 +1613,7 @@ class DataBase:
                                                    queryable_ids=queryable_ids,
                                                    pool_metadata=pool_metadata,
                                                    budgets=budgets,
+                                                   method=budget_method,
                                                    criteria="margin" )
 
         elif strategy == 'QBDMI':
@@ -1205,6 +1622,8 @@ class DataBase:
                                                   queryable_ids=queryable_ids,
                                                   pool_metadata=pool_metadata,
                                                   budgets=budgets,
+                                                  lazy=lazy,
+                                                  max_bytes=max_bytes,
                                                   criteria="MI" )
 
         elif strategy =='QBDEntropy':
@@ -1213,6 +1632,8 @@ class DataBase:
                                                   queryable_ids=queryable_ids,
                                                   pool_metadata=pool_metadata,
                                                   budgets=budgets,
+                                                  lazy=lazy,
+                                                  max_bytes=max_bytes,
                                                   criteria="entropy" )
 
         elif strategy == 'RandomSampling':
@@ -1221,14 +1642,20 @@ class DataBase:
                                                    queryable_ids=queryable_ids,
                                                    pool_metadata=pool_metadata,
                                                    budgets=budgets,
+                                                   method=budget_method,
                                                    criteria="random" )
 
         else:
             raise ValueError('Invalid strategy.')
 
-        for n in query_indx:
-            if self.pool_metadata[id_name].values[n] not in self.queryable_ids:
-                raise ValueError('Chosen object is not available for query!')
+        # from classified objects to the pool
+        if self.classprob_rows is not None:
+            query_indx = list(self.classprob_rows[np.array(query_indx,
+                                                           dtype=int)])
+
+        query_ids = self.pool_metadata[id_name].values[np.array(query_indx, dtype=int)]
+        if not pd.Series(query_ids).isin(self.queryable_ids).all():
+            raise ValueError('Chosen object is not available for query!')
 
         return query_indx
 
@@ -1252,6 +1679,9 @@ class DataBase:
             Default is False.
         query_thre: float (optional)
             Percentile threshold where a query is considered worth it.
+            Values below 1 rank objects within the whole pool, so they
+            are not accepted if only part of it was classified (see
+            classprob_rows), except for 'RandomSampling'.
             Default is 1 (no limit).
         screen: bool (optional)
             If true, display on screen information about the
@@ -1262,7 +1692,8 @@ class DataBase:
         -------
         query_indx: list
             List of indexes identifying the objects to be queried in decreasing
-            order of importance.
+            order of importance. Indexes refer to the pool, also if only
+            part of it was classified (see classprob_rows).
             If strategy=='RandomSampling' the order is irrelevant.
         """
         if screen:
@@ -1273,65 +1704,91 @@ class DataBase:
 
         id_name = self.identify_keywords()
 
+        # random choice does not need classified objects, keep the pool
+        classprob_rows = self.classprob_rows
+        if strategy == 'RandomSampling':
+            classprob_rows = None
+        elif classprob_rows is not None and query_thre < 1:
+            raise ValueError('query_thre < 1 ranks objects within the ' +
+                             'whole pool, classify it without ' +
+                             'queryable_only.')
+
+        # flag queryable objects in the pool only once
+        pool_ids = self.pool_metadata[id_name].values
+        if classprob_rows is not None:
+            pool_ids = pool_ids[classprob_rows]
+        queryable_flag = get_queryable_flag(pool_ids, self.queryable_ids)
+
         if strategy == 'UncSampling':
             query_indx = uncertainty_sampling(class_prob=self.classprob,
                                               queryable_ids=self.queryable_ids,
-                                              test_ids=self.pool_metadata[id_name].values,
+                                              test_ids=pool_ids,
                                               batch=batch, screen=screen,
-                                              query_thre=query_thre)
+                                              query_thre=query_thre,
+                                              queryable_flag=queryable_flag)
 
 
         elif strategy == 'UncSamplingEntropy':
             query_indx = uncertainty_sampling_entropy(class_prob=self.classprob,
                                               queryable_ids=self.queryable_ids,
-                                              test_ids=self.pool_metadata[id_name].values,
+                                              test_ids=pool_ids,
                                               batch=batch, screen=screen,
-                                              query_thre=query_thre)
+                                              query_thre=query_thre,
+                                              queryable_flag=queryable_flag)
 
         elif strategy == 'UncSamplingLeastConfident':
             query_indx = uncertainty_sampling_least_confident(class_prob=self.classprob,
                                               queryable_ids=self.queryable_ids,
-                                              test_ids=self.pool_metadata[id_name].values,
+                                              test_ids=pool_ids,
                                               batch=batch, screen=screen,
-                                              query_thre=query_thre)
+                                              query_thre=query_thre,
+                                              queryable_flag=queryable_flag)
 
         elif strategy == 'UncSamplingMargin':
             query_indx = uncertainty_sampling_margin(class_prob=self.classprob,
                                               queryable_ids=self.queryable_ids,
-                                              test_ids=self.pool_metadata[id_name].values,
+                                              test_ids=pool_ids,
                                               batch=batch, screen=screen,
-                                              query_thre=query_thre)
-            return query_indx
+                                              query_thre=query_thre,
+                                              queryable_flag=queryable_flag)
+
         elif strategy == 'QBDMI':
             query_indx = qbd_mi(ensemble_probs=self.ensemble_probs,
                                 queryable_ids=self.queryable_ids,
-                                test_ids=self.pool_metadata[id_name].values,
+                                test_ids=pool_ids,
                                 batch=batch, screen=screen,
-                                query_thre=query_thre)
+                                query_thre=query_thre,
+                                queryable_flag=queryable_flag)
 
         elif strategy =='QBDEntropy':
             query_indx = qbd_entropy(ensemble_probs=self.ensemble_probs,
                                     queryable_ids=self.queryable_ids,
-                                    test_ids=self.pool_metadata[id_name].values,
+                                    test_ids=pool_ids,
                                     batch=batch, screen=screen,
-                                    query_thre=query_thre)
+                                    query_thre=query_thre,
+                                    queryable_flag=queryable_flag)
 
         elif strategy == 'RandomSampling':
             query_indx = random_sampling(queryable_ids=self.queryable_ids,
-                                         test_ids=self.pool_metadata[id_name].values,
+                                         test_ids=pool_ids,
                                          queryable=queryable, batch=batch,
-                                         query_thre=query_thre, screen=screen)
+                                         query_thre=query_thre, screen=screen,
+                                         queryable_flag=queryable_flag)
 
         else:
             raise ValueError('Invalid strategy.')
 
         if screen:
-            print('       ... queried obj id: ', self.pool_metadata[id_name].values[query_indx[0]])
+            print('       ... queried obj id: ', pool_ids[query_indx[0]])
 
         # check if there are repeated ids
-        for n in query_indx:
-            if self.pool_metadata[id_name].values[n] not in self.queryable_ids:
-                raise ValueError('Chosen object is not available for query!')
+        if not np.all(queryable_flag[np.array(query_indx, dtype=int)]):
+            raise ValueError('Chosen object is not available for query!')
+
+        # from classified objects to the pool
+        if classprob_rows is not None:
+            query_indx = list(classprob_rows[np.array(query_indx,
+                                                      dtype=int)])
 
         return query_indx
 
@@ -1360,164 +1817,108 @@ class DataBase:
             Default is False.
         """
         id_name = self.identify_keywords()
+        partitions = self._attach_partitions()
 
         ### keep track of number evolution ####
-        npool = self.pool_metadata.shape[0]
-        ntrain = self.train_metadata.shape[0]
-        ntest = self.test_metadata.shape[0]
-        nvalidation = self.validation_metadata.shape[0]
-
-        q2 = np.copy(query_indx)
-        nquery = len(q2)
-
-        data_copy = self.pool_metadata.copy()
-        query_ids = [data_copy['id'].values[item] for item in query_indx]
-
-        while len(query_indx) > 0 and self.pool_metadata.shape[0] > 0:
-
-            if self.pool_metadata.shape[0] != self.pool_labels.shape[0]:
-                raise ValueError('Missing data in the pool sample!')
-
-            # identify queried object index
-            obj = query_indx[0]
-
+        npool = partitions.size('pool')
+        ntrain = partitions.size('train')
+        ntest = partitions.size('test')
+        nvalidation = partitions.size('validation')
+
+        nquery = len(query_indx)
+        if nquery > 1 and alternative_label:
+            raise ValueError('Alternative label only works with batch=1!')
+
+        if len(np.unique(query_indx)) != nquery:
+            raise ValueError('Repeated indexes in query!')
+
+        # rows of the queried objects in the partitions table
+        all_ids = partitions.metadata[id_name].values
+        pool_rows = partitions.indices('pool')
+        query_rows = pool_rows[np.array(query_indx, dtype=int)]
+        query_ids = all_ids[query_rows]
+
+        if not self._id_index('pool').is_unique and \
+           np.count_nonzero(np.isin(all_ids[pool_rows], query_ids)) > nquery:
+            print('Repeated id: ')
+            print(self.pool_metadata[np.isin(self.pool_metadata[id_name].values,
+                                             query_ids)])
+            raise ValueError('Found repeated ids in pool sample!')
+
+        for obj in query_rows:
             # add object to the query sample
-            query_header0 = self.pool_metadata.values[obj]
+            query_header = list(partitions.metadata.iloc[obj])
 
             # check if we add normal or reversed label
-            if nquery == 1 and alternative_label:
+            if alternative_label:
                 self.alt_label = True
                 new_header = []
 
-                for i in range(len(query_header0)):
+                for i in range(len(query_header)):
                     # add all elements of header, except type
                     if i < 2 or i > 3:
-                        new_header.append(query_header0[i])
+                        new_header.append(query_header[i])
                     # add reverse label
-                    elif i == 2 and query_header0[i] == 'Ia':
+                    elif i == 2 and query_header[i] == 'Ia':
                         new_header.append('X')
                         new_header.append(99)
-                    elif i == 2 and query_header0[i] != 'Ia':
+                    elif i == 2 and query_header[i] != 'Ia':
                         new_header.append('Ia')
                         new_header.append(90)
 
                 query_header = new_header
+                partitions.set_metadata(obj, query_header)
 
-            elif not alternative_label:
-                query_header = query_header0
-
-            elif nquery > 1 and alternative_label:
-                raise ValueError('Alternative label only works with batch=1!')
-
-            query_features = self.pool_features[obj]
             line = [epoch]
             for item in query_header:
                 line.append(item)
-            for item1 in query_features:
+            for item1 in partitions.features[obj]:
                 line.append(item1)
 
             self.queried_sample.append(line)
 
-            # add object to the training sample
-            new_header = pd.DataFrame([query_header], columns=self.metadata_names)
-            self.train_metadata = pd.concat([self.train_metadata, new_header], axis=0,
-                                            ignore_index=True)
-            self.train_features = np.append(self.train_features,
-                                            np.array([self.pool_features[obj]]),
-                                            axis=0)
-            self.train_labels = np.append(self.train_labels,
-                                          np.array([self.pool_labels[obj]]),
-                                          axis=0)
-
-            # remove queried object from pool sample
-            query_flag = self.pool_metadata[id_name].values == \
-                 self.pool_metadata[id_name].iloc[obj]
-
-            if sum(query_flag) > 1:
-                print('Repeated id: ')
-                print(self.pool_metadata[query_flag])
-                raise ValueError('Found repeated ids in pool sample!')
-
-            pool_metadata_temp = self.pool_metadata.copy()
-            self.pool_metadata = pool_metadata_temp[~query_flag]
-            self.pool_labels = self.pool_labels[~query_flag]
-            self.pool_features = self.pool_features[~query_flag]
-
-            if queryable:
-                qids_flag = self.pool_metadata['queryable'].values
-                self.queryable_ids = self.pool_metadata[id_name].values[qids_flag]
-            else:
-                self.queryable_ids = self.pool_metadata[id_name].values
-
-            # check if queried object is also in other samples
-            test_ids = self.test_metadata[id_name].values
-            if query_header[0] in test_ids:
-                qtest_flag = self.test_metadata[id_name].values == \
-                    query_header[0]
-                test_metadata_temp = self.test_metadata.copy()
-                self.test_labels = self.test_labels[~qtest_flag]
-                self.test_features = self.test_features[~qtest_flag]
-                self.test_metadata = test_metadata_temp[~qtest_flag]
-
-            validation_ids = self.validation_metadata[id_name].values
-            if query_header[0] in validation_ids:
-                qval_flag = self.validation_metadata[id_name].values == \
-                    query_header[0]
-                validation_metadata_temp = self.validation_metadata.copy()
-                self.validation_labels = self.validation_labels[~qval_flag]
-                self.validation_features = self.validation_features[~qval_flag]
-                self.validation_metadata = validation_metadata_temp[~qval_flag]
-
-            # update ids order
-            query_indx.remove(obj)
-
-            new_query_indx = []
-
-            for item in query_indx:
-                if item < obj:
-                    new_query_indx.append(item)
-                else:
-                    new_query_indx.append(item - 1)
-
-            query_indx = new_query_indx
+        # move objects from pool to training and remove them from
+        # other samples, also if they were stored as separate rows
+        partitions.move(query_rows, to='train', remove_from=('pool',))
+        self.remove_ids(query_ids, samples=('test', 'validation'))
 
-            if screen:
-                print('remaining  queries: ', query_indx)
+        if queryable:
+            qids_flag = self.pool_metadata['queryable'].values
+            self.queryable_ids = self.pool_metadata[id_name].values[qids_flag]
+        else:
+            self.queryable_ids = self.pool_metadata[id_name].values
 
         # test
-        npool2 = self.pool_metadata.shape[0]
-        ntrain2 = self.train_metadata.shape[0]
-        ntest2 = self.test_metadata.shape[0]
-        nvalidation2 = self.validation_metadata.shape[0]
+        npool2 = partitions.size('pool')
+        ntrain2 = partitions.size('train')
+        ntest2 = partitions.size('test')
+        nvalidation2 = partitions.size('validation')
 
         if screen:
-            print('query_ids: ', query_ids)
+            print('query_ids: ', list(query_ids))
             print('queried sample: ', self.queried_sample[-1][1])
             print('----------------------------------------------')
 
         if ntest2 > ntest or nvalidation2 > nvalidation:
             raise ValueError('Wrong dimensionality for test/val samples.')
 
-        for name in query_ids:
-            if name in self.pool_metadata['id'].values:
-                raise ValueError('Queried object ', name, ' is still in pool sample!')
+        still_in_pool = self.locate_ids('pool', query_ids) >= 0
+        if np.any(still_in_pool):
+            raise ValueError('Queried object ', query_ids[still_in_pool][0],
+                             ' is still in pool sample!')
 
-            if name not in self.train_metadata['id'].values:
-                raise ValueError('Queried object ', name, ' not in training!')
+        not_in_train = self.locate_ids('train', query_ids) < 0
+        if np.any(not_in_train):
+            raise ValueError('Queried object ', query_ids[not_in_train][0],
+                             ' not in training!')
 
         # check if there are repeated ids
-        for name in self.train_metadata['id'].values:
-            if name in self.pool_metadata['id'].values:
-                raise ValueError('After update! Object ', name,
-                                 ' found in pool and training samples!')
-
-            if name in self.test_metadata['id'].values:
-                raise ValueError('After update! Object ', name,
-                                 ' found in test and training samples!')
-
-            if name in self.validation_metadata['id'].values:
-                raise ValueError('After update! Object ', name,
-                                 ' found in validation and training samples!')
+        train_ids = self.train_metadata[id_name].values
+        for name in ['pool', 'test', 'validation']:
+            repeated = self.locate_ids(name, train_ids) >= 0
+            if np.any(repeated):
+                raise ValueError('After update! Object ', train_ids[repeated][0],
+                                 ' found in ' + name + ' and training samples!')
 
         if ntrain2 != ntrain + nquery or npool2 != npool - nquery:
             raise ValueError('Wrong dimensionality for train/pool samples!')
@@ -0,0 +1,294 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+    Columnar binary storage for features files.
+
+    The format is chosen from the file extension:
+    '.npy' -> NumPy structured array (typed columns, memory-mapped on read)
+    '.parquet' or '.feather' -> pandas, requires pyarrow
+    anything else -> space separated text, as in the original files
+"""
+
+import weakref
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['DailyFeaturesWriter', 'FeaturesWriter',
+           'is_binary_features_file', 'read_features_table',
+           'write_features_table']
+
+BINARY_FEATURES_EXTENSIONS = ('.npy', '.parquet', '.feather')
+
+
+def is_binary_features_file(file_path: str) -> bool:
+    """
+    Check if file_path should be stored in a columnar binary format.
+
+    Parameters
+    ----------
+    file_path: str
+        Complete path to features file.
+    """
+    return str(file_path).endswith(BINARY_FEATURES_EXTENSIONS)
+
+
+def _to_structured_array(data: pd.DataFrame) -> np.ndarray:
+    """
+    Convert a data frame to a NumPy structured array, so it can be saved
+    without pickling.
+
+    Boolean and numeric columns keep their type, also if stored as
+    objects, as they would be parsed from a text file. Other columns
+    become fixed size strings.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Features table.
+    """
+    columns = []
+    dtypes = []
+    for name in data.keys():
+        values = data[name].to_numpy()
+        if values.dtype.kind == 'O':
+            inferred = pd.api.types.infer_dtype(values, skipna=False)
+            if inferred == 'boolean':
+                values = values.astype('?')
+            elif inferred == 'integer':
+                values = values.astype(np.int64)
+            elif inferred in ('floating', 'mixed-integer-float'):
+                values = values.astype(np.float64)
+        if values.dtype.kind not in 'biuf':
+            values = values.astype(str)
+        columns.append(values)
+        dtypes.append((str(name), values.dtype))
+
+    table = np.empty(data.shape[0], dtype=dtypes)
+    for (name, _), values in zip(dtypes, columns):
+        table[name] = values
+    return table
+
+
+def write_features_table(data: pd.DataFrame, file_path: str):
+    """
+    Write features table to file, format is chosen from the extension.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Features table, one object per row.
+    file_path: str
+        Complete path to output file.
+    """
+    if file_path.endswith('.npy'):
+        np.save(file_path, _to_structured_array(data), allow_pickle=False)
+    elif file_path.endswith('.parquet'):
+        data.to_parquet(file_path, index=False)
+    elif file_path.endswith('.feather'):
+        data.reset_index(drop=True).to_feather(file_path)
+    else:
+        data.to_csv(file_path, sep=' ', index=False)
+
+
+def read_features_table(file_path: str) -> pd.DataFrame:
+    """
+    Read features table written by write_features_table.
+
+    '.npy' files are memory-mapped instead of parsed as text.
+
+    Parameters
+    ----------
+    file_path: str
+        Complete path to features file.
+    """
+    if file_path.endswith('.npy'):
+        table = np.load(file_path, mmap_mode='r', allow_pickle=False)
+        return pd.DataFrame(dict(
+            (name, np.asarray(table[name])) for name in table.dtype.names))
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path)
+    if file_path.endswith('.feather'):
+        return pd.read_feather(file_path)
+
+    data = pd.read_csv(file_path, index_col=False)
+    if 'redshift' not in data.keys():
+        data = pd.read_csv(file_path, sep=' ', index_col=False)
+    return data
+
+
+class FeaturesWriter(object):
+    """Write features one object at a time, in text or binary format.
+
+    Text files are written line by line. For binary formats rows are kept
+    in memory and the table is written when the writer is closed.
+
+    Attributes
+    ----------
+    file_path: str
+        Complete path to output file.
+    header: list
+        Column names.
+
+    Methods
+    -------
+    write_row(values: list)
+        Add features of one object.
+    close()
+        Write pending rows and close the file.
+
+    Examples
+    --------
+    >>> with FeaturesWriter('features.npy', header) as writer:
+    >>>     writer.write_row(values)
+    """
+
+    def __init__(self, file_path: str, header: list):
+        self.file_path = file_path
+        self.header = list(header)
+        self._rows = []
+        self._text_file = None
+        if not is_binary_features_file(file_path):
+            self._text_file = open(file_path, 'w')
+            self._text_file.write(' '.join(self.header) + '\n')
+
+    def write_row(self, values: list):
+        """Add features of one object.
+
+        Parameters
+        ----------
+        values: list
+            Metadata and features, in the same order as header.
+        """
+        if self._text_file is not None:
+            self._text_file.write(
+                ' '.join(str(each_value) for each_value in values) + '\n')
+        else:
+            self._rows.append(list(values))
+
+    def close(self):
+        """Write pending rows and close the file."""
+        if self._text_file is not None:
+            self._text_file.close()
+            self._text_file = None
+            self._rows = None
+        elif self._rows is not None:
+            write_features_table(
+                pd.DataFrame(self._rows, columns=self.header),
+                self.file_path)
+            self._rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _flush_line_buffers(buffers: dict):
+    """
+    Append buffered lines to their files and empty the buffers.
+
+    Parameters
+    ----------
+    buffers: dict
+        Keywords are file paths, values are lists of lines.
+    """
+    for file_path, lines in buffers.items():
+        if lines:
+            with open(file_path, 'a') as param_file:
+                param_file.writelines(lines)
+    buffers.clear()
+
+
+class DailyFeaturesWriter(object):
+    """Buffered writer for the daily time domain features files.
+
+    Lines are kept in one in-memory buffer per file and appended to disk,
+    each file opened once, when the number of buffered lines reaches
+    max_lines. Pending lines are always written when the writer is closed,
+    when the context manager exits (also on errors) or, as a last resort,
+    when the writer is garbage collected or the interpreter exits.
+
+    Daily files are always space separated text: they are appended to by
+    many flushes and calls, which columnar binary formats only allow by
+    rewriting the whole table. Finished files can be converted with
+    read_features_table and write_features_table.
+
+    Attributes
+    ----------
+    max_lines: int
+        Number of buffered lines, over all files, that triggers a flush.
+    n_lines: int
+        Number of lines currently buffered.
+
+    Methods
+    -------
+    write(file_path: str, line: str)
+        Buffer one line to be appended to file_path.
+    flush()
+        Append all buffered lines to their files.
+    close()
+        Flush and stop accepting lines.
+
+    Examples
+    --------
+    >>> with DailyFeaturesWriter() as writer:
+    >>>     for snid in snids:
+    >>>         data.fit_one_lc(raw_data_dir, snid, output_dir, writer=writer)
+    """
+
+    def __init__(self, max_lines=100000):
+        self.max_lines = max_lines
+        self.n_lines = 0
+        self._buffers = {}
+        self._finalizer = weakref.finalize(self, _flush_line_buffers,
+                                           self._buffers)
+
+    def write(self, file_path: str, line: str):
+        """Buffer one line to be appended to file_path.
+
+        Parameters
+        ----------
+        file_path: str
+            Complete path to daily features file.
+        line: str
+            Line to be written, including the new line character.
+        """
+        if not self._finalizer.alive:
+            raise ValueError('Writer is already closed.')
+        self._buffers.setdefault(file_path, []).append(line)
+        self.n_lines += 1
+        if self.n_lines >= self.max_lines:
+            self.flush()
+
+    def flush(self):
+        """Append all buffered lines to their files."""
+        _flush_line_buffers(self._buffers)
+        self.n_lines = 0
+
+    def close(self):
+        """Flush and stop accepting lines."""
+        self.n_lines = 0
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
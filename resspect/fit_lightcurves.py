@@ -16,6 +16,8 @@
 # limitations under the License.
 
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import IO
 from typing import Tuple
 
@@ -25,16 +27,17 @@ import numpy as np
 import pandas as pd
 import progressbar
 
-from resspect.bazin import bazin, fit_scipy
+from resspect.bazin import bazin, fit_scipy, fit_bazin_batch
 from resspect.exposure_time_calculator import ExpTimeCalc
+from resspect.feature_store import FeaturesWriter
 from resspect.lightcurves_utils import read_file
 from resspect.lightcurves_utils import get_resspect_header_data
 from resspect.lightcurves_utils import load_snpcc_photometry_df
-from resspect.lightcurves_utils import get_photometry_with_id_name_and_snid
+from resspect.lightcurves_utils import get_photometry_with_snid_index
+from resspect.lightcurves_utils import index_full_photometry
+from resspect.lightcurves_utils import photometry_store
 from resspect.lightcurves_utils import read_plasticc_full_photometry_data
 from resspect.lightcurves_utils import load_plasticc_photometry_df
-from resspect.lightcurves_utils import read_resspect_full_photometry_data
-from resspect.lightcurves_utils import insert_band_column_to_resspect_df
 from resspect.lightcurves_utils import load_resspect_photometry_df
 from resspect.lightcurves_utils import get_snpcc_sntype
 from resspect.lightcurves_utils import SNPCC_FEATURES_HEADER
@@ -42,8 +45,8 @@ from resspect.lightcurves_utils import find_available_key_name_in_header
 from resspect.lightcurves_utils import PLASTICC_TARGET_TYPES
 from resspect.lightcurves_utils import PLASTICC_RESSPECT_FEATURES_HEADER
 
-__all__ = ['LightCurve', 'fit_snpcc_bazin', 'fit_resspect_bazin',
-           'fit_plasticc_bazin']
+__all__ = ['LightCurve', 'fit_bazin_all_batch', 'fit_snpcc_bazin',
+           'fit_resspect_bazin', 'fit_plasticc_bazin']
 
 
 class LightCurve:
@@ -65,6 +68,8 @@ class LightCurve:
         List of broad band filters.
     full_photometry: pd.DataFrame
         Photometry for a set of light curves read from file.
+        Tables read from file are shared through
+        resspect.lightcurves_utils.photometry_store.
     id: int
         SN identification number.
     id_name:
@@ -74,6 +79,9 @@ class LightCurve:
     photometry: pd.DataFrame
         Photometry information.
         Minimum keys --> [mjd, band, flux, fluxerr].
+    photometry_index: dict or None
+        SNID to (start, stop) row offsets in full_photometry.
+        Built on first use, None if not yet available.
     redshift: float
         Redshift
     sample: str
@@ -107,6 +115,8 @@ class LightCurve:
         Calculates best-fit parameters from the Bazin function in 1 filter.
     fit_bazin_all()
         Calculates  best-fit parameters from the Bazin func for all filters.
+    fit_bazin_warm(bazin_cache: dict)
+        Bazin fit for all filters, starting from cached parameters.
     plot_bazin_fit(save: bool, show: bool, output_file: srt)
         Plot photometric points and Bazin fitted curve.
 
@@ -172,6 +182,7 @@ class LightCurve:
         self.id_name = None
         self.last_mag = None
         self.photometry = pd.DataFrame()
+        self.photometry_index = None
         self.redshift = 0
         self.sample = ' '
         self.sim_peakmag = []
@@ -255,16 +266,16 @@ class LightCurve:
         self.id = snid
 
         if self.full_photometry.empty:
-            _, self.full_photometry = read_resspect_full_photometry_data(
-                photo_file)
-        id_names_list = ['SNID', 'snid', 'objid', 'id']
-        filtered_photometry, self.id_name = (
-            get_photometry_with_id_name_and_snid(
-                self.full_photometry, id_names_list, snid))
+            self.full_photometry, self.photometry_index, self.id_name = (
+                photometry_store.get(photo_file, self.dataset_name))
+        elif self.photometry_index is None:
+            self.full_photometry, self.photometry_index, self.id_name = (
+                index_full_photometry(self.full_photometry,
+                                      self.dataset_name))
+        filtered_photometry = get_photometry_with_snid_index(
+            self.full_photometry, self.photometry_index, snid)
 
         if not filtered_photometry.empty:
-            filtered_photometry = insert_band_column_to_resspect_df(
-                filtered_photometry, self.filters)
             self.photometry = load_resspect_photometry_df(filtered_photometry)
 
     def load_plasticc_lc(self, photo_file: str, snid: int):
@@ -283,12 +294,14 @@ class LightCurve:
         self.id = snid
 
         if self.full_photometry.empty:
-            self.full_photometry = read_plasticc_full_photometry_data(
-                photo_file)
-        id_names_list = ['object_id', 'SNID', 'snid']
-        filtered_photometry, self.id_name = (
-            get_photometry_with_id_name_and_snid(
-                self.full_photometry, id_names_list, snid))
+            self.full_photometry, self.photometry_index, self.id_name = (
+                photometry_store.get(photo_file, self.dataset_name))
+        elif self.photometry_index is None:
+            self.full_photometry, self.photometry_index, self.id_name = (
+                index_full_photometry(self.full_photometry,
+                                      self.dataset_name))
+        filtered_photometry = get_photometry_with_snid_index(
+            self.full_photometry, self.photometry_index, snid)
         filter_mapping_dict = {
             0: 'u', 1: 'g', 2: 'r', 3: 'i', 4: 'z', 5: 'Y'
         }
@@ -439,13 +452,16 @@ class LightCurve:
             self.exp_time[telescope_name] = 9999
             return 9999
 
-    def fit_bazin(self, band: str) -> np.ndarray:
+    def fit_bazin(self, band: str, initial_guess=None) -> np.ndarray:
         """Extract Bazin features for one filter.
 
         Parameters
         ----------
         band: str
             Choice of broad band filter
+        initial_guess: list or None (optional)
+            Prior best fit [a, b, t0, tfall, trise] used as starting
+            point. If None, use the heuristic guess. Default is None.
 
         Returns
         -------
@@ -465,7 +481,8 @@ class LightCurve:
         fluxerr = self.photometry['fluxerr'].values[band_indices]
 
         # fit Bazin function
-        bazin_param = fit_scipy(time - time[0], flux, fluxerr)
+        bazin_param = fit_scipy(time - time[0], flux, fluxerr,
+                                initial_guess=initial_guess)
         return bazin_param
 
     def evaluate_bazin(self, time: np.array):
@@ -502,20 +519,56 @@ class LightCurve:
 
         return flux
 
-    def fit_bazin_all(self):
+    def fit_bazin_all(self, initial_guess=None):
         """
         Perform Bazin fit for all filters independently and concatenate results.
         Populates the attributes: bazin_features.
+
+        Parameters
+        ----------
+        initial_guess: list or None (optional)
+            Prior Bazin features for all filters, in the same format as
+            the bazin_features attribute. Filters with 'None' values use
+            the heuristic guess. Default is None.
         """
+        n_params = len(self.bazin_features_names)
+        if initial_guess is not None and \
+                len(initial_guess) != n_params * len(self.filters):
+            initial_guess = None
+
         self.bazin_features = []
-        default_bazin_features = ['None'] * len(self.bazin_features_names)
-        for each_band in self.filters:
-            best_fit = self.fit_bazin(each_band)
+        default_bazin_features = ['None'] * n_params
+        for k, each_band in enumerate(self.filters):
+            band_guess = None
+            if initial_guess is not None:
+                band_guess = initial_guess[k * n_params:(k + 1) * n_params]
+                if 'None' in band_guess:
+                    band_guess = None
+            best_fit = self.fit_bazin(each_band, initial_guess=band_guess)
             if (best_fit.size > 0) and (not np.isnan(np.sum(best_fit))):
                 self.bazin_features.extend(best_fit.tolist())
             else:
                 self.bazin_features.extend(default_bazin_features)
 
+    def fit_bazin_warm(self, bazin_cache=None):
+        """
+        Perform Bazin fit for all filters, starting from cached parameters.
+        Populates the attributes: bazin_features.
+
+        Parameters
+        ----------
+        bazin_cache: dict or None (optional)
+            Bazin features previously fitted, keyed by object id. The
+            features of this object are used as initial guess and then
+            replaced by the new fit. If None, use the heuristic guess.
+            Default is None.
+        """
+        if bazin_cache is None:
+            self.fit_bazin_all()
+        else:
+            self.fit_bazin_all(initial_guess=bazin_cache.get(self.id))
+            bazin_cache[self.id] = self.bazin_features
+
     def clear_data(self):
         """ Reset to default values """
         self.photometry = []
@@ -644,6 +697,90 @@ class LightCurve:
             plt.show()
 
 
+def _pad_light_curves(light_curves: list, filters: list) -> Tuple[
+        np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Arrange photometry of many light curves into padded arrays.
+
+    Parameters
+    ----------
+    light_curves
+        list of LightCurve objects with photometry loaded
+    filters
+        list of broad band filters
+
+    Returns
+    -------
+    time, flux, fluxerr, mask
+        arrays of shape [n_obj, n_band, n_points]. Time is given relative
+        to the first observation in each filter, mask flags valid entries.
+    """
+    columns = []
+    max_points = 1
+    for each_lc in light_curves:
+        if len(each_lc.photometry) == 0:
+            empty = np.array([])
+            columns.append([(empty, empty, empty)] * len(filters))
+            continue
+        bands = each_lc.photometry['band'].values
+        mjd = each_lc.photometry['mjd'].values
+        flux = each_lc.photometry['flux'].values
+        fluxerr = each_lc.photometry['fluxerr'].values
+        lc_columns = []
+        for each_band in filters:
+            band_indices = bands == each_band
+            lc_columns.append((mjd[band_indices], flux[band_indices],
+                               fluxerr[band_indices]))
+            max_points = max(max_points, int(band_indices.sum()))
+        columns.append(lc_columns)
+
+    shape = (len(light_curves), len(filters), max_points)
+    time_array = np.zeros(shape)
+    flux_array = np.zeros(shape)
+    fluxerr_array = np.ones(shape)
+    mask = np.zeros(shape, dtype=bool)
+    for i, lc_columns in enumerate(columns):
+        for j, (mjd, flux, fluxerr) in enumerate(lc_columns):
+            npoints = mjd.size
+            if npoints > 0:
+                time_array[i, j, :npoints] = mjd - mjd[0]
+                flux_array[i, j, :npoints] = flux
+                fluxerr_array[i, j, :npoints] = fluxerr
+                mask[i, j, :npoints] = True
+    return time_array, flux_array, fluxerr_array, mask
+
+
+def fit_bazin_all_batch(light_curves: list):
+    """
+    Perform Bazin fit for all filters of many light curves at once.
+
+    Vectorized equivalent of calling LightCurve.fit_bazin_all on each
+    element. Populates the attribute bazin_features of every light curve.
+
+    Parameters
+    ----------
+    light_curves
+        list of LightCurve objects sharing the same filter set
+    """
+    if len(light_curves) == 0:
+        return
+
+    filters = light_curves[0].filters
+    nparams = len(light_curves[0].bazin_features_names)
+    time, flux, fluxerr, mask = _pad_light_curves(light_curves, filters)
+    best_fit = fit_bazin_batch(time, flux, fluxerr, mask)
+
+    default_bazin_features = ['None'] * nparams
+    for i, each_lc in enumerate(light_curves):
+        each_lc.bazin_features = []
+        for j in range(len(filters)):
+            if mask[i, j].sum() > (nparams - 1) and \
+                    not np.isnan(np.sum(best_fit[i, j])):
+                each_lc.bazin_features.extend(best_fit[i, j].tolist())
+            else:
+                each_lc.bazin_features.extend(default_bazin_features)
+
+
 def _get_features_to_write(light_curve_data: LightCurve) -> list:
     """
     Returns features list to write
@@ -674,14 +811,220 @@ def write_features_to_output_file(
     """
     current_features = _get_features_to_write(
         light_curve_data)
-    features_file.write(
-        ' '.join(str(each_feature) for each_feature
-                 in current_features) + '\n')
+    _write_features_list(current_features, features_file)
+
+
+def _write_features_list(current_features: list, features_file: IO):
+    """
+    Writes one line of features to output features file
+
+    Parameters
+    ----------
+    current_features
+        metadata and Bazin features of one object
+    features_file
+        features output file
+    """
+    if isinstance(features_file, FeaturesWriter):
+        features_file.write_row(current_features)
+    else:
+        features_file.write(
+            ' '.join(str(each_feature) for each_feature
+                     in current_features) + '\n')
+
+
+def _fit_and_write_batch(light_curves: list, features_file: IO):
+    """
+    Fits a batch of light curves and writes the successful ones to file
+
+    Parameters
+    ----------
+    light_curves
+        list of light curves with photometry and metadata loaded
+    features_file
+        features output file
+    """
+    fit_bazin_all_batch(light_curves)
+    for each_lc in light_curves:
+        if 'None' not in each_lc.bazin_features:
+            write_features_to_output_file(each_lc, features_file)
+
+
+def _fit_shard(dataset_name: str, shard_metadata: list,
+               full_photometry: pd.DataFrame = None,
+               photometry_index: dict = None, photo_file: str = None,
+               sample: str = None, vectorized: bool = False) -> list:
+    """
+    Fits one shard of objects and returns the features to be written.
+
+    Runs inside a worker process. The photometry for the whole shard is
+    received once, together with the metadata of its objects.
+
+    Parameters
+    ----------
+    dataset_name
+        'SNPCC', 'RESSPECT' or 'PLAsTiCC'
+    shard_metadata
+        list of (snid, redshift, sncode, sntype) tuples. For SNPCC, snid is
+        the path to the light curve file and the other values are ignored.
+    full_photometry
+        photometry of all objects in the shard. Not used for SNPCC.
+    photometry_index
+        dictionary mapping SNID to (start, stop) rows of full_photometry.
+        If None, it is built from full_photometry. Not used for SNPCC.
+    photo_file
+        path to light curves file. Not used for SNPCC.
+    sample
+        'train' or 'test'. Not used for SNPCC.
+    vectorized
+        If True, fit all light curves in the shard with fit_bazin_all_batch.
+
+    Returns
+    -------
+    list
+        features of successfully fitted objects, in the shard order
+    """
+    light_curves = []
+    for snid, redshift, sncode, sntype in shard_metadata:
+        light_curve_data = LightCurve()
+        if dataset_name == 'SNPCC':
+            light_curve_data.load_snpcc_lc(snid)
+        else:
+            # share the table and its SNID index among the shard objects
+            light_curve_data.full_photometry = full_photometry
+            light_curve_data.photometry_index = photometry_index
+            if dataset_name == 'RESSPECT':
+                light_curve_data.load_resspect_lc(photo_file, snid)
+            else:
+                light_curve_data.load_plasticc_lc(photo_file, snid)
+            full_photometry = light_curve_data.full_photometry
+            photometry_index = light_curve_data.photometry_index
+            light_curve_data.redshift = redshift
+            light_curve_data.sncode = sncode
+            light_curve_data.sntype = sntype
+            light_curve_data.sample = sample
+        light_curves.append(light_curve_data)
+
+    if vectorized:
+        fit_bazin_all_batch(light_curves)
+    else:
+        for light_curve_data in light_curves:
+            light_curve_data.fit_bazin_all()
+
+    return [_get_features_to_write(light_curve_data)
+            for light_curve_data in light_curves
+            if 'None' not in light_curve_data.bazin_features]
+
+
+def _slice_shard_photometry(full_photometry: pd.DataFrame,
+                            photometry_index: dict,
+                            shard_metadata: list) -> Tuple[pd.DataFrame, dict]:
+    """
+    Returns the photometry rows of the objects in one shard.
+
+    Parameters
+    ----------
+    full_photometry
+        photometry of all objects, grouped by SNID
+    photometry_index
+        dictionary mapping SNID to (start, stop) rows of full_photometry
+    shard_metadata
+        list of (snid, redshift, sncode, sntype) tuples, see _fit_shard
+
+    Returns
+    -------
+    pd.DataFrame
+        photometry of the shard objects, copied from their row ranges
+    dict
+        dictionary mapping SNID to (start, stop) rows of the shard table
+    """
+    rows = []
+    shard_index = {}
+    n_rows = 0
+    for each_row in shard_metadata:
+        snid = each_row[0]
+        if snid not in photometry_index or snid in shard_index:
+            continue
+        start, stop = photometry_index[snid]
+        rows.append(np.arange(start, stop))
+        shard_index[snid] = (n_rows, n_rows + stop - start)
+        n_rows += stop - start
+    rows = np.concatenate(rows) if rows else np.array([], dtype=int)
+    return full_photometry.iloc[rows], shard_index
+
+
+def _fit_in_parallel(dataset_name: str, metadata: list, features_file: IO,
+                     n_workers: int, full_photometry: pd.DataFrame = None,
+                     photometry_index: dict = None, photo_file: str = None,
+                     sample: str = None, vectorized: bool = False,
+                     batch_size: int = None):
+    """
+    Shards objects across a process pool and writes results in input order.
+
+    Parameters
+    ----------
+    dataset_name
+        'SNPCC', 'RESSPECT' or 'PLAsTiCC'
+    metadata
+        list of (snid, redshift, sncode, sntype) tuples, see _fit_shard
+    features_file
+        features output file
+    n_workers
+        number of worker processes
+    full_photometry
+        photometry for all objects, grouped by SNID. Not used for SNPCC.
+    photometry_index
+        dictionary mapping SNID to (start, stop) rows of full_photometry,
+        as returned by photometry_store.get. Not used for SNPCC.
+    photo_file
+        path to light curves file. Not used for SNPCC.
+    sample
+        'train' or 'test'. Not used for SNPCC.
+    vectorized
+        If True, use the vectorized fit inside each worker.
+    batch_size
+        Largest number of objects in one shard. If None, only the number
+        of workers sets the shard size.
+    """
+    # a few shards per worker help balancing the load
+    n_shards = min(len(metadata), 4 * n_workers)
+    if n_shards == 0:
+        return
+    if batch_size is not None:
+        n_shards = max(n_shards, -(-len(metadata) // batch_size))
+    shards = iter(np.array_split(np.arange(len(metadata)), n_shards))
+
+    def submit_next_shard(executor):
+        shard_metadata = [metadata[i] for i in next(shards)]
+        shard_photometry, shard_index = None, None
+        if full_photometry is not None:
+            shard_photometry, shard_index = _slice_shard_photometry(
+                full_photometry, photometry_index, shard_metadata)
+        return executor.submit(
+            _fit_shard, dataset_name, shard_metadata, shard_photometry,
+            shard_index, photo_file, sample, vectorized)
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # only a few shards wait for a worker, so their photometry copies
+        # do not add up to a second full table
+        futures = deque(submit_next_shard(executor)
+                        for _ in range(min(n_shards, 2 * n_workers)))
+        n_submitted = len(futures)
+
+        # iterate in submission order so the output is deterministic
+        for _ in progressbar.progressbar(range(n_shards)):
+            current_future = futures.popleft()
+            if n_submitted < n_shards:
+                futures.append(submit_next_shard(executor))
+                n_submitted += 1
+            for current_features in current_future.result():
+                _write_features_list(current_features, features_file)
 
 
 def fit_snpcc_bazin(
         path_to_data_dir: str, features_file: str,
-        file_prefix: str = "DES_SN"):
+        file_prefix: str = "DES_SN", vectorized: bool = False,
+        batch_size: int = 1000, n_workers: int = 1):
     """Perform Bazin fit to all objects in the SNPCC data.
 
      Parameters
@@ -691,26 +1034,55 @@ def fit_snpcc_bazin(
          one for each light curve.
      features_file: str
          Path to output file where results should be stored.
+         Files ending in '.npy', '.parquet' or '.feather' are written
+         in columnar binary format, see resspect.feature_store.
      file_prefix: str
         File names prefix
+     vectorized: bool (optional)
+        If True, fit batches of light curves with the vectorized
+        engine in resspect.bazin.fit_bazin_batch. Default is False.
+     batch_size: int (optional)
+        Number of light curves fitted together when vectorized=True.
+        If n_workers > 1, also the largest number of objects sent to a
+        worker at a time. Default is 1000.
+     n_workers: int (optional)
+        Number of worker processes. If larger than 1, objects are sharded
+        across a process pool. Default is 1.
      """
     files_list = os.listdir(path_to_data_dir)
     files_list = [each_file for each_file in files_list
                   if each_file.startswith(file_prefix)]
-    with open(features_file, 'w') as snpcc_features_file:
-        snpcc_features_file.write(' '.join(SNPCC_FEATURES_HEADER) + '\n')
+    with FeaturesWriter(features_file,
+                        SNPCC_FEATURES_HEADER) as snpcc_features_file:
+        if n_workers > 1:
+            metadata = [(os.path.join(path_to_data_dir, each_file),
+                         None, None, None) for each_file in files_list]
+            _fit_in_parallel('SNPCC', metadata, snpcc_features_file,
+                             n_workers, vectorized=vectorized,
+                             batch_size=batch_size)
+            return
+        light_curves_batch = []
         for each_file in progressbar.progressbar(files_list):
             light_curve_data = LightCurve()
             light_curve_data.load_snpcc_lc(
                 os.path.join(path_to_data_dir, each_file))
+            if vectorized:
+                light_curves_batch.append(light_curve_data)
+                if len(light_curves_batch) == batch_size:
+                    _fit_and_write_batch(light_curves_batch,
+                                         snpcc_features_file)
+                    light_curves_batch = []
+                continue
             light_curve_data.fit_bazin_all()
             if 'None' not in light_curve_data.bazin_features:
                 write_features_to_output_file(
                     light_curve_data, snpcc_features_file)
+        _fit_and_write_batch(light_curves_batch, snpcc_features_file)
 
 
 def fit_resspect_bazin(path_photo_file: str, path_header_file: str,
-                       output_file: str, sample=None):
+                       output_file: str, sample=None, vectorized=False,
+                       batch_size=1000, n_workers=1):
     """Perform Bazin fit to all objects in a given RESSPECT data file.
 
     Parameters
@@ -721,8 +1093,20 @@ def fit_resspect_bazin(path_photo_file: str, path_header_file: str,
         Complete path to header file.
     output_file: str
         Output file where the features will be stored.
+        Files ending in '.npy', '.parquet' or '.feather' are written
+        in columnar binary format, see resspect.feature_store.
     sample: str
         'train' or 'test'. Default is None.
+    vectorized: bool (optional)
+        If True, fit batches of light curves with the vectorized
+        engine in resspect.bazin.fit_bazin_batch. Default is False.
+    batch_size: int (optional)
+        Number of light curves fitted together when vectorized=True.
+        If n_workers > 1, also the largest number of objects sent to a
+        worker at a time. Default is 1000.
+    n_workers: int (optional)
+        Number of worker processes. If larger than 1, objects are sharded
+        across a process pool. Default is 1.
     """
     meta_header = get_resspect_header_data(path_header_file, path_photo_file)
 
@@ -739,24 +1123,59 @@ def fit_resspect_bazin(path_photo_file: str, path_header_file: str,
     light_curve_data = LightCurve()
     snid_values = meta_header[id_name]
 
-    with open(output_file, 'w') as ressepect_features_file:
-        ressepect_features_file.write(
-            ' '.join(PLASTICC_RESSPECT_FEATURES_HEADER) + '\n')
+    with FeaturesWriter(output_file, PLASTICC_RESSPECT_FEATURES_HEADER) \
+            as ressepect_features_file:
+        if n_workers > 1:
+            full_photometry, photometry_index, _ = photometry_store.get(
+                path_photo_file, 'RESSPECT')
+            metadata = [(each_snid, meta_header[z_name][index],
+                         meta_header[subtype_name][index],
+                         meta_header[type_name][index])
+                        for index, each_snid in snid_values.items()]
+            _fit_in_parallel('RESSPECT', metadata, ressepect_features_file,
+                             n_workers,
+                             full_photometry=full_photometry,
+                             photometry_index=photometry_index,
+                             photo_file=path_photo_file, sample=sample,
+                             vectorized=vectorized, batch_size=batch_size)
+            return
+        light_curves_batch = []
         for index, each_snid in progressbar.progressbar(snid_values.items()):
-            light_curve_data.load_resspect_lc(path_photo_file, each_snid)
-            light_curve_data.fit_bazin_all()
-            light_curve_data.redshift = meta_header[z_name][index]
-            light_curve_data.sncode = meta_header[subtype_name][index]
-            light_curve_data.sntype = meta_header[type_name][index]
-            light_curve_data.sample = sample
+            if vectorized:
+                # share the photometry table already read from file
+                current_lc = LightCurve()
+                current_lc.full_photometry = light_curve_data.full_photometry
+                current_lc.photometry_index = (
+                    light_curve_data.photometry_index)
+                current_lc.load_resspect_lc(path_photo_file, each_snid)
+                light_curve_data.full_photometry = current_lc.full_photometry
+                light_curve_data.photometry_index = (
+                    current_lc.photometry_index)
+            else:
+                current_lc = light_curve_data
+                current_lc.load_resspect_lc(path_photo_file, each_snid)
+                current_lc.fit_bazin_all()
+            current_lc.redshift = meta_header[z_name][index]
+            current_lc.sncode = meta_header[subtype_name][index]
+            current_lc.sntype = meta_header[type_name][index]
+            current_lc.sample = sample
+            if vectorized:
+                light_curves_batch.append(current_lc)
+                if len(light_curves_batch) == batch_size:
+                    _fit_and_write_batch(light_curves_batch,
+                                         ressepect_features_file)
+                    light_curves_batch = []
+                continue
             if 'None' not in light_curve_data.bazin_features:
                 write_features_to_output_file(
                     light_curve_data, ressepect_features_file)
             light_curve_data.clear_data()
+        _fit_and_write_batch(light_curves_batch, ressepect_features_file)
 
 
 def fit_plasticc_bazin(path_photo_file: str, path_header_file: str,
-                       output_file: str, sample=None):
+                       output_file: str, sample=None, vectorized=False,
+                       batch_size=1000, n_workers=1):
     """Perform Bazin fit to all objects in a given PLAsTiCC data file.
     Parameters
     ----------
@@ -766,8 +1185,20 @@ def fit_plasticc_bazin(path_photo_file: str, path_header_file: str,
         Complete path to header file.
     output_file: str
         Output file where the features will be stored.
+        Files ending in '.npy', '.parquet' or '.feather' are written
+        in columnar binary format, see resspect.feature_store.
     sample: str
         'train' or 'test'. Default is None.
+    vectorized: bool (optional)
+        If True, fit batches of light curves with the vectorized
+        engine in resspect.bazin.fit_bazin_batch. Default is False.
+    batch_size: int (optional)
+        Number of light curves fitted together when vectorized=True.
+        If n_workers > 1, also the largest number of objects sent to a
+        worker at a time. Default is 1000.
+    n_workers: int (optional)
+        Number of worker processes. If larger than 1, objects are sharded
+        across a process pool. Default is 1.
     """
     meta_header = read_plasticc_full_photometry_data(path_header_file)
     meta_header_keys = meta_header.keys().tolist()
@@ -776,21 +1207,55 @@ def fit_plasticc_bazin(path_photo_file: str, path_header_file: str,
     light_curve_data = LightCurve()
     snid_values = meta_header[id_name]
 
-    with open(output_file, 'w') as plasticc_features_file:
-        plasticc_features_file.write(
-            ' '.join(PLASTICC_RESSPECT_FEATURES_HEADER) + '\n')
+    with FeaturesWriter(output_file, PLASTICC_RESSPECT_FEATURES_HEADER) \
+            as plasticc_features_file:
+        if n_workers > 1:
+            full_photometry, photometry_index, _ = photometry_store.get(
+                path_photo_file, 'PLAsTiCC')
+            metadata = [(each_snid, meta_header['true_z'][index],
+                         meta_header['true_target'][index],
+                         PLASTICC_TARGET_TYPES[
+                             meta_header['true_target'][index]])
+                        for index, each_snid in snid_values.items()]
+            _fit_in_parallel('PLAsTiCC', metadata, plasticc_features_file,
+                             n_workers,
+                             full_photometry=full_photometry,
+                             photometry_index=photometry_index,
+                             photo_file=path_photo_file, sample=sample,
+                             vectorized=vectorized, batch_size=batch_size)
+            return
+        light_curves_batch = []
         for index, each_snid in progressbar.progressbar(snid_values.items()):
-            light_curve_data.load_plasticc_lc(path_photo_file, each_snid)
-            light_curve_data.fit_bazin_all()
-            light_curve_data.redshift = meta_header['true_z'][index]
-            light_curve_data.sncode = meta_header['true_target'][index]
-            light_curve_data.sntype = PLASTICC_TARGET_TYPES[
-                light_curve_data.sncode]
-            light_curve_data.sample = sample
+            if vectorized:
+                # share the photometry table already read from file
+                current_lc = LightCurve()
+                current_lc.full_photometry = light_curve_data.full_photometry
+                current_lc.photometry_index = (
+                    light_curve_data.photometry_index)
+                current_lc.load_plasticc_lc(path_photo_file, each_snid)
+                light_curve_data.full_photometry = current_lc.full_photometry
+                light_curve_data.photometry_index = (
+                    current_lc.photometry_index)
+            else:
+                current_lc = light_curve_data
+                current_lc.load_plasticc_lc(path_photo_file, each_snid)
+                current_lc.fit_bazin_all()
+            current_lc.redshift = meta_header['true_z'][index]
+            current_lc.sncode = meta_header['true_target'][index]
+            current_lc.sntype = PLASTICC_TARGET_TYPES[current_lc.sncode]
+            current_lc.sample = sample
+            if vectorized:
+                light_curves_batch.append(current_lc)
+                if len(light_curves_batch) == batch_size:
+                    _fit_and_write_batch(light_curves_batch,
+                                         plasticc_features_file)
+                    light_curves_batch = []
+                continue
             if 'None' not in light_curve_data.bazin_features:
                 write_features_to_output_file(
                     light_curve_data, plasticc_features_file)
             light_curve_data.clear_data()
+        _fit_and_write_batch(light_curves_batch, plasticc_features_file)
 
 
 def main():
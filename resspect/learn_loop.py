@@ -30,7 +30,9 @@ def learn_loop(nloops: int, strategy: str, path_to_features: str,
                photo_ids_froot=' ', classifier_bootstrap=False, save_predictions=False,
                sep_files=False, pred_dir=None, queryable=False, 
                metric_label='snpcc', dist_loop_root=None, save_alt_class=False,
-               SNANA_types=False, metadata_fname=None, **kwargs):
+               SNANA_types=False, metadata_fname=None, warm_start=False,
+               queryable_only=False, n_replace=None, window=None,
+               **kwargs):
     """Perform the active learning loop. All results are saved to file.
 
     Parameters
@@ -114,6 +116,20 @@ def learn_loop(nloops: int, strategy: str, path_to_features: str,
         If int: choose the required number of samples at random,
         ensuring that at least half are SN Ia
         Default is 'original'.
+    warm_start: bool (optional)
+        If True, update the classifier of the previous loop with the newly
+        queried objects instead of training a new one. Only used if
+        classifier_bootstrap is False. Default is False.
+    n_replace: int (optional)
+        Number of trees replaced or boosting rounds added by each warm
+        update, see DataBase.classify. Default is None.
+    window: int (optional)
+        Number of training objects used by each warm update, see
+        DataBase.classify. Default is None.
+    queryable_only: bool (optional)
+        If True, only classify queryable objects of the pool in each loop,
+        metrics are still computed on the validation sample.
+        Default is False.
     kwargs: extra parameters
         All keywords required by the classifier function.
     """
@@ -152,10 +168,13 @@ def learn_loop(nloops: int, strategy: str, path_to_features: str,
         # classify
         if classifier_bootstrap:
             data.classify_bootstrap(method=classifier, save_predictions=save_predictions,
-                                    pred_dir=pred_dir, loop=loop, screen=screen, **kwargs)            
+                                    pred_dir=pred_dir, loop=loop, screen=screen,
+                                    queryable_only=queryable_only, **kwargs)            
         else:
             data.classify(method=classifier, save_predictions=save_predictions,
-                          pred_dir=pred_dir, loop=loop, screen=screen, **kwargs)
+                          pred_dir=pred_dir, loop=loop, screen=screen,
+                          warm_start=warm_start, queryable_only=queryable_only,
+                          n_replace=n_replace, window=window, **kwargs)
 
         # calculate metrics
         data.evaluate_classification(metric_label=metric_label, screen=screen)
@@ -188,7 +207,9 @@ def learn_loop(nloops: int, strategy: str, path_to_features: str,
             # classify
             data_alt.classify(method=classifier, save_predictions=save_predictions,
                               pred_dir=pred_dir, loop=loop, screen=screen, 
-                              **kwargs)
+                              warm_start=warm_start,
+                              queryable_only=queryable_only,
+                              n_replace=n_replace, window=window, **kwargs)
             # evaluate classification
             data_alt.evaluate_classification(metric_label=metric_label, screen=screen)
             # save photo ids  
@@ -3,7 +3,9 @@
 """
 
 import io
+import os
 import tarfile
+from collections import OrderedDict
 from typing import AnyStr
 from typing import Tuple
 from typing import Union
@@ -138,6 +140,74 @@ def get_photometry_with_id_name_and_snid(
     return pd.DataFrame(), None
 
 
+def build_snid_index(
+        full_photometry: pd.DataFrame, id_names_list: list) -> Tuple[
+        pd.DataFrame, dict, Union[str, None]]:
+    """
+    Builds a one-time SNID index for the full photometry table.
+    Rows are (stably) sorted by SNID, so that each object occupies a
+    contiguous block of rows. If the rows are already grouped by SNID the
+    input table is returned without copying.
+
+    Parameters
+    ----------
+    full_photometry
+        photometry DataFrame
+    id_names_list
+        list of available SNID column names
+
+    Returns
+    -------
+    sorted_photometry, snid_index, snid_column_name
+        photometry grouped by SNID, dictionary mapping each SNID to the
+        (start, stop) offsets of its rows and the SNID column name.
+        The index is empty if none of id_names_list is available.
+    """
+    snid_column_name = find_available_key_name_in_header(
+        full_photometry.keys(), id_names_list)
+    if snid_column_name is None:
+        return full_photometry, {}, None
+
+    snid_values = full_photometry[snid_column_name].values
+    run_starts = np.flatnonzero(snid_values[1:] != snid_values[:-1]) + 1
+    # rows already grouped when every SNID appears in a single run
+    if len(run_starts) + 1 != len(pd.unique(snid_values)):
+        order = np.argsort(snid_values, kind='stable')
+        full_photometry = full_photometry.take(order)
+        snid_values = snid_values[order]
+        run_starts = np.flatnonzero(snid_values[1:] != snid_values[:-1]) + 1
+
+    starts = np.concatenate([[0], run_starts]).astype(int)
+    stops = np.concatenate([run_starts, [len(snid_values)]]).astype(int)
+    if len(snid_values) == 0:
+        starts, stops = starts[:0], stops[:0]
+    snid_index = dict(zip(snid_values[starts].tolist(),
+                          zip(starts.tolist(), stops.tolist())))
+    return full_photometry, snid_index, snid_column_name
+
+
+def get_photometry_with_snid_index(
+        sorted_photometry: pd.DataFrame, snid_index: dict,
+        snid: int) -> pd.DataFrame:
+    """
+    Returns photometry data of the given SNID as a slice of the table
+    returned by build_snid_index, without copying or scanning it.
+
+    Parameters
+    ----------
+    sorted_photometry
+        photometry DataFrame grouped by SNID
+    snid_index
+        dictionary mapping SNID to (start, stop) row offsets
+    snid
+        SNID
+    """
+    if snid not in snid_index:
+        return pd.DataFrame()
+    start, stop = snid_index[snid]
+    return sorted_photometry.iloc[start:stop]
+
+
 def _update_resspect_filter_values(
         filters_array: np.ndarray, filters: list) -> np.ndarray:
     """
@@ -342,3 +412,157 @@ def get_resspect_header_data(
         raise ValueError(
             f"Unknown RESSPECT header data file: {path_header_file}")
     return meta_header
+
+
+def index_full_photometry(
+        full_photometry: pd.DataFrame, dataset_name: str) -> Tuple[
+        pd.DataFrame, dict, Union[str, None]]:
+    """
+    Prepares a full photometry table for per-object access: rows are grouped
+    by SNID (see build_snid_index) and, for RESSPECT, the band column is
+    added once for the whole table.
+
+    Parameters
+    ----------
+    full_photometry
+        photometry DataFrame
+    dataset_name
+        'RESSPECT' or 'PLAsTiCC'
+    """
+    if dataset_name == 'RESSPECT':
+        id_names_list = ['SNID', 'snid', 'objid', 'id']
+    elif dataset_name == 'PLAsTiCC':
+        id_names_list = ['object_id', 'SNID', 'snid']
+    else:
+        raise ValueError(f"Unknown data set name: {dataset_name}")
+
+    full_photometry, snid_index, id_name = build_snid_index(
+        full_photometry, id_names_list)
+    if (dataset_name == 'RESSPECT' and not full_photometry.empty and
+            'band' not in full_photometry.keys()):
+        full_photometry = insert_band_column_to_resspect_df(
+            full_photometry.copy(), ['u', 'g', 'r', 'i', 'z', 'Y'])
+    return full_photometry, snid_index, id_name
+
+
+class PhotometryStore(object):
+    """Process-wide cache of full photometry tables, keyed by file path.
+
+    Tables are kept already indexed by SNID and evicted in least recently
+    used order once their total size exceeds the memory budget.
+
+    Attributes
+    ----------
+    max_bytes: int
+        Memory budget for all cached tables. The most recently used
+        table is always kept, even if larger than the budget.
+    n_reads: int
+        Number of files parsed so far.
+
+    Methods
+    -------
+    get(file_path: str, dataset_name: str)
+        Return (photometry, snid_index, id_name) for a photometry file.
+    find_file(snid, file_paths: list)
+        Return the first file in file_paths containing snid.
+    clear()
+        Drop all cached tables and SNID lookups.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.n_reads = 0
+        self._tables = OrderedDict()
+        self._nbytes = 0
+        self._snid_to_file = {}
+        self._scanned_files = set()
+
+    def _key(self, file_path: str) -> tuple:
+        file_path = os.path.abspath(file_path)
+        return file_path, os.path.getmtime(file_path)
+
+    def get(self, file_path: str, dataset_name: str) -> Tuple[
+            pd.DataFrame, dict, Union[str, None]]:
+        """
+        Return the indexed photometry table stored in file_path.
+        The file is only parsed if it is not in the cache.
+
+        Parameters
+        ----------
+        file_path
+            photometry file path
+        dataset_name
+            'RESSPECT' or 'PLAsTiCC'
+
+        Returns
+        -------
+        full_photometry, snid_index, id_name
+            see index_full_photometry
+        """
+        key = self._key(file_path) + (dataset_name,)
+        if key in self._tables:
+            self._tables.move_to_end(key)
+            return self._tables[key]
+
+        if dataset_name == 'RESSPECT':
+            _, full_photometry = read_resspect_full_photometry_data(file_path)
+        elif dataset_name == 'PLAsTiCC':
+            full_photometry = read_plasticc_full_photometry_data(file_path)
+        else:
+            raise ValueError(f"Unknown data set name: {dataset_name}")
+        self.n_reads += 1
+
+        entry = index_full_photometry(full_photometry, dataset_name)
+        self._tables[key] = entry
+        self._nbytes += int(entry[0].memory_usage(index=True).sum())
+        self._register_snids(key[0], entry[1])
+
+        while self._nbytes > self.max_bytes and len(self._tables) > 1:
+            _, evicted = self._tables.popitem(last=False)
+            self._nbytes -= int(evicted[0].memory_usage(index=True).sum())
+        return entry
+
+    def _register_snids(self, file_path: str, snid_index: dict):
+        if file_path in self._scanned_files:
+            return
+        for snid in snid_index.keys():
+            self._snid_to_file.setdefault(snid, file_path)
+        self._scanned_files.add(file_path)
+
+    def find_file(self, snid, file_paths: list,
+                  dataset_name='PLAsTiCC') -> Union[str, None]:
+        """
+        Return the first file in file_paths holding photometry for snid.
+        Files are only parsed until the object is found, and the SNID to
+        file lookup table is kept for later calls.
+
+        Parameters
+        ----------
+        snid
+            SNID
+        file_paths
+            list of photometry file paths, in search order
+        dataset_name
+            'RESSPECT' or 'PLAsTiCC'. Default is 'PLAsTiCC'.
+        """
+        abs_paths = [os.path.abspath(each_path) for each_path in file_paths]
+        found = self._snid_to_file.get(snid)
+        if found in abs_paths:
+            return file_paths[abs_paths.index(found)]
+        for each_path, each_abs_path in zip(file_paths, abs_paths):
+            if each_abs_path in self._scanned_files:
+                continue
+            _, snid_index, _ = self.get(each_path, dataset_name)
+            if snid in snid_index:
+                return each_path
+        return None
+
+    def clear(self):
+        """Drop all cached tables and SNID lookups."""
+        self._tables.clear()
+        self._nbytes = 0
+        self._snid_to_file.clear()
+        self._scanned_files.clear()
+
+
+photometry_store = PhotometryStore()
@@ -1,8 +1,119 @@
 import numpy as np
 from resspect.batch_functions import *
 
+def _greedy_within_budget(order: np.array, costs: np.array, budget: float) -> np.array:
+    """Walk objects in order, taking each one which still fits in budget.
+
+    The walk is done in blocks: a cumulative sum over the remaining
+    objects gives the run which fits, the first object which does not fit
+    is skipped and objects which can no longer fit are dropped before the
+    next block. The result is the same as for the sequential walk.
+
+    Parameters
+    ----------
+    order: np.array
+        Indexes of candidate objects, in decreasing order of importance.
+    costs: np.array
+        Cost of each object.
+    budget: float
+        Total cost must stay below this value.
+
+    Returns
+    -------
+    np.array
+        Indexes of chosen objects, in the same order as in 'order'.
+    """
+    chosen = []
+    total_cost = 0.
+    remaining = np.asarray(order)
+    remaining = remaining[total_cost + costs[remaining] < budget]
+
+    while remaining.shape[0] > 0:
+        # cumulative cost accumulated in the same order as a sequential sum
+        cumulative = np.cumsum(np.concatenate([[total_cost],
+                                               costs[remaining]]))[1:]
+        fits = cumulative < budget
+        nfit = remaining.shape[0] if np.all(fits) else int(np.argmin(fits))
+
+        chosen.append(remaining[:nfit])
+        total_cost = cumulative[nfit - 1]
+        remaining = remaining[nfit + 1:]
+        remaining = remaining[total_cost + costs[remaining] < budget]
+
+    if len(chosen) == 0:
+        return np.array([], dtype=int)
+    return np.concatenate(chosen)
+
+
+def _knapsack_within_budget(values: np.array, costs: np.array, budget: float,
+                            cost_resolution=None) -> np.array:
+    """Choose objects with maximum total value within budget.
+
+    Exact 0/1 knapsack by dynamic programming, with costs rounded up to
+    multiples of cost_resolution so the chosen objects always fit. Time and
+    memory scale with number of objects x budget / cost_resolution, so
+    this is meant for small budgets.
+
+    Parameters
+    ----------
+    values: np.array
+        Value of each object, non-negative.
+    costs: np.array
+        Cost of each object.
+    budget: float
+        Total cost must stay below this value.
+    cost_resolution: float (optional)
+        Cost discretization, in the same units as costs.
+        Default is budget / 1000.
+
+    Returns
+    -------
+    np.array
+        Indexes of chosen objects, in decreasing order of value.
+    """
+    if budget <= 0:
+        return np.array([], dtype=int)
+    if cost_resolution is None:
+        cost_resolution = budget / 1000.
+
+    # largest number of cost units with total cost strictly below budget
+    capacity = int(np.ceil(budget / cost_resolution)) - 1
+    units = np.ceil(costs / cost_resolution).astype(int)
+    candidates = np.flatnonzero(np.logical_and(units <= capacity, values > 0))
+
+    # among objects with the same cost at most capacity // units can be
+    # chosen, so only the most valuable ones are kept
+    candidates = candidates[np.lexsort((-values[candidates], units[candidates]))]
+    cand_units = units[candidates]
+    first = np.searchsorted(cand_units, cand_units, side='left')
+    rank = np.arange(candidates.shape[0]) - first
+    keep = np.logical_or(cand_units == 0,
+                         rank < capacity // np.maximum(cand_units, 1))
+    candidates = candidates[keep]
+
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((candidates.shape[0], capacity + 1), dtype=bool)
+    for k, indx in enumerate(candidates):
+        with_obj = np.full(capacity + 1, -np.inf)
+        with_obj[units[indx]:] = best[:capacity + 1 - units[indx]] + values[indx]
+        taken[k] = with_obj > best
+        best = np.where(taken[k], with_obj, best)
+
+    # walk back through the table to recover the chosen objects
+    chosen = []
+    remaining_units = capacity
+    for k in range(candidates.shape[0] - 1, -1, -1):
+        if taken[k, remaining_units]:
+            chosen.append(candidates[k])
+            remaining_units -= units[candidates[k]]
+
+    chosen = np.array(chosen, dtype=int)
+    return chosen[np.argsort(-values[chosen], kind='stable')]
+
+
 def batch_queries_uncertainty(class_probs, id_name, queryable_ids,
-                              pool_metadata, budgets, criteria):
+                              pool_metadata, budgets, criteria,
+                              method='greedy', cost_resolution=None):
     """Select batch of queries based on acquistion criteria. Independently
     models the elements of the batch.
 
@@ -22,6 +133,14 @@ def batch_queries_uncertainty(class_probs, id_name, queryable_ids,
     criteria: str
         Acqution strategy to use can be 'uncertainty', 'entropy', 'margin',
         'least_confident' and 'random'.
+    method: str (optional)
+        'greedy' walks objects from most to least informative, taking each
+        one which fits in the budget. 'exact' maximizes the total
+        informativeness within budget, telescope by telescope, only
+        feasible for small budgets. Default is 'greedy'.
+    cost_resolution: float (optional)
+        Cost discretization for method='exact', in the same units as
+        costs. Default is 1/1000 of each budget.
 
     Returns
     -------
@@ -32,76 +151,76 @@ def batch_queries_uncertainty(class_probs, id_name, queryable_ids,
     pool_ids = pool_metadata[id_name].values
     budget_4m = budgets[0]
     budget_8m = budgets[1]
-    index_to_ids = {i: q_id for i, q_id in enumerate(queryable_ids)}
-    ids_to_index = {i_d: i for i, i_d in enumerate(pool_metadata['id'].values)}
-    pool_query_filter = np.array([p_id in queryable_ids for p_id in pool_ids])
+    pool_query_filter = np.isin(pool_ids, queryable_ids)
+    query_index = np.flatnonzero(pool_query_filter)
 
-    cost_4m = pool_metadata['cost_4m'].values[pool_query_filter]
-    cost_8m = pool_metadata['cost_8m'].values[pool_query_filter]
+    cost_4m = pool_metadata['cost_4m'].values[pool_query_filter].astype(float)
+    cost_8m = pool_metadata['cost_8m'].values[pool_query_filter].astype(float)
     cost_4m[cost_4m >= 9999.0] = 1e8
     cost_8m[cost_8m >= 9999.0] = 1e8
     possible_4m = cost_4m < 1e8
     possible_8m = cost_8m < 1e8
-    query_ids = pool_ids[pool_query_filter]
 
     class_probs = class_probs[pool_query_filter]
 
+    # informativeness is only used by method='exact', higher is better
     if criteria == 'uncertainty':
         score = abs(class_probs[:, 1] - 0.5)
+        informativeness = 0.5 - score
         reversed = False
     elif criteria == 'entropy':
         entropies = (-1*np.sum(class_probs * np.log(class_probs + 1e-12), axis=1))
         score = entropies
+        informativeness = score
         reversed = True
     elif criteria == 'margin':
         sorted_probs = np.sort(class_probs, axis=1)
         score = sorted_probs[:, -1] - sorted_probs[:, -2]
+        informativeness = 1 - score
         reversed = False
     elif criteria == 'least_confident':
         score = class_probs.max(axis=1)
+        informativeness = 1 - score
         reversed = False
     elif criteria == 'random':
         score = np.random.rand(class_probs.shape[0])
+        informativeness = score
         reversed = False
 
-    cost_4m_possible = cost_4m[possible_4m]
-    score_4m = score[possible_4m]
-    if reversed:
-        order_4m = score_4m.argsort()[::-1]
-    else:
-        order_4m = score_4m.argsort()
-
-    cost_4m_order = cost_4m_possible[order_4m]
-    query_ids_4m_possible = query_ids[possible_4m][order_4m]
+    if method == 'greedy':
+        # candidates for each telescope, from most to least informative
+        possible_4m_index = np.flatnonzero(possible_4m)
+        order_4m = score[possible_4m_index].argsort()
+        if reversed:
+            order_4m = order_4m[::-1]
+        acquistions_4m = _greedy_within_budget(possible_4m_index[order_4m],
+                                               cost_4m, budget_4m)
+
+        # objects taken by the 4m are not available for the 8m
+        possible_8m[acquistions_4m] = False
+        possible_8m_index = np.flatnonzero(possible_8m)
+        order_8m = score[possible_8m_index].argsort()
+        if reversed:
+            order_8m = order_8m[::-1]
+        acquistions_8m = _greedy_within_budget(possible_8m_index[order_8m],
+                                               cost_8m, budget_8m)
+
+    elif method == 'exact':
+        values_4m = np.where(possible_4m, informativeness, 0.)
+        acquistions_4m = _knapsack_within_budget(values_4m, cost_4m,
+                                                 budget_4m, cost_resolution)
+
+        values_8m = np.where(possible_8m, informativeness, 0.)
+        values_8m[acquistions_4m] = 0.
+        acquistions_8m = _knapsack_within_budget(values_8m, cost_8m,
+                                                 budget_8m, cost_resolution)
 
-    # Record acquistions as IDs
-    acquistions_4m = []
-    total_cost_4m = 0.
-    for q_id, c_4m in zip(query_ids_4m_possible, cost_4m_order):
-        if (total_cost_4m + c_4m) < budget_4m:
-            acquistions_4m.append(q_id)
-            total_cost_4m += c_4m
-
-    acquistions =  acquistions_4m.copy()
-
-    cost_8m_possible = cost_8m[possible_8m]
-    score_8m = score[possible_8m]
-    if reversed:
-        order_8m = score_8m.argsort()[::-1]
     else:
-        order_8m = score_8m.argsort()
-
-    cost_8m_order = cost_8m_possible[order_8m]
-    query_ids_8m_possible = query_ids[possible_8m][order_8m]
+        raise ValueError('Invalid method: ' + str(method))
 
-    acquistions_8m = []
-    total_cost_8m = 0.
-    for q_id, c_8m in zip(query_ids_8m_possible, cost_8m_order):
-        if (total_cost_8m + c_8m) < budget_8m and (q_id not in acquistions):
-            acquistions_8m.append(q_id)
-            total_cost_8m += c_8m
-
-    acquistions += acquistions_8m
+    total_cost_4m = np.sum(cost_4m[acquistions_4m])
+    total_cost_8m = np.sum(cost_8m[acquistions_8m])
+    acquistions = np.concatenate([acquistions_4m, acquistions_8m]).astype(int)
 
     if total_cost_4m > budget_4m:
         raise RuntimeError("4m Budget exceeded")
@@ -112,14 +231,22 @@ def batch_queries_uncertainty(class_probs, id_name, queryable_ids,
     if len(set(acquistions_4m) & set(acquistions_8m)) != 0:
         raise RuntimeError("Object acquired by both telescopes")
 
-    acquistion_index = []
-    for q_id in acquistions:
-        acquistion_index.append(ids_to_index[q_id])
+    return list(query_index[acquistions])
+
+def _best_possible(scores: np.array, possible: np.array):
+    """Index of the highest score among possible objects, None if there
+    is no possible object."""
+    sorted_idx = scores.argsort()[::-1]
+    possible_order = np.where(possible[sorted_idx])[0]
+    if possible_order.shape[0] == 0:
+        return None
+    return sorted_idx[possible_order[0]]
 
-    return acquistion_index
 
 def batch_queries_mi_entropy(probs_B_K_C, id_name, queryable_ids,
-                             pool_metadata, budgets, criteria="MI" ):
+                             pool_metadata, budgets, criteria="MI",
+                             lazy=False, lazy_chunk=64, max_bytes=None,
+                             rng=None, adaptive=False, min_samples=1000):
     """Select batch of queries based on acquistion criteria. Jointly models the
     elements of the batch.
 
@@ -141,6 +268,30 @@ def batch_queries_mi_entropy(probs_B_K_C, id_name, queryable_ids,
     criteria: str
         Acqution strategy to use can be 'uncertainty', 'entropy', 'margin',
         'least_confident' and 'random'.
+    lazy: bool (optional)
+        If True, use lazy greedy acquisition: joint scores are only
+        recomputed for objects whose upper bound, from the score gain in
+        a previous step, can beat the best current score. Gives the same
+        acquisitions while the joint is computed exactly, as joint
+        entropy and mutual information are submodular. Default is False.
+    lazy_chunk: int (optional)
+        Number of objects rescored at a time when lazy is True.
+        Default is 64.
+    max_bytes: int (optional)
+        Memory limit for the joint probability calculations. Batches whose
+        exact joint would exceed it are scored by sampling instead.
+        If None, use resspect.batch_functions.MAX_BYTES.
+    rng: np.random.Generator (optional)
+        Random number generator for sampled joint entropies.
+        If None, use the global numpy state.
+    adaptive: bool (optional)
+        If True, sampled joint entropies start from min_samples samples
+        and double them only until the standard error of the two best
+        cost adjusted scores within budget is below their gap, up to the
+        usual 40000. Not available with lazy, whose rescored chunks must
+        share samples. Default is False.
+    min_samples: int (optional)
+        Initial number of samples when adaptive is True. Default is 1000.
 
     Returns
     -------
@@ -148,14 +299,16 @@ def batch_queries_mi_entropy(probs_B_K_C, id_name, queryable_ids,
             List of indexes identifying the objects from the pool sampled to be
             queried. Guranteed to be within budget.
     """
+    if adaptive and lazy:
+        raise ValueError('Adaptive sampling is not available with lazy!')
+
     pool_ids = pool_metadata[id_name].values
     # Specifically queryable ids since we don't need ids to the pool in general.
-    index_to_ids = {i: q_id for i, q_id in enumerate(queryable_ids)}
-    ids_to_index = {i_d: i for i, i_d in enumerate(pool_metadata['id'].values)}
-    pool_query_filter = np.array([p_id in queryable_ids for p_id in pool_ids])
+    pool_query_filter = np.isin(pool_ids, queryable_ids)
+    query_index = np.flatnonzero(pool_query_filter)
 
-    cost_4m = pool_metadata['cost_4m'].values[pool_query_filter]
-    cost_8m = pool_metadata['cost_8m'].values[pool_query_filter]
+    cost_4m = pool_metadata['cost_4m'].values[pool_query_filter].astype(float)
+    cost_8m = pool_metadata['cost_8m'].values[pool_query_filter].astype(float)
     cost_4m[cost_4m >= 9999.0] = np.inf
     cost_8m[cost_8m >= 9999.0] = np.inf
 
@@ -178,94 +331,152 @@ def batch_queries_mi_entropy(probs_B_K_C, id_name, queryable_ids,
     scores = []
     prev_joint_probs_M_K = None
     prev_samples_M_K = None
+    sampling = False
     top_scores = []
 
+    # score of the current batch and score gains from the last evaluation
+    batch_total = 0.
+    gains_B = np.zeros(B)
+
     is_time = True
     i = 0
     while is_time:
         #print(i)
         exact_samples = C ** i
-        if exact_samples <= num_samples:
-            if len(acquistions) == 0:
-                joint_entropies_B = exact_batch(probs_B_K_C)
-            else:
+        if exact_samples <= num_samples and \
+                exact_joint_fits(exact_samples, K, C, max_bytes):
+            if len(acquistions) > 0:
                 prev_joint_probs_M_K = joint_probs_M_K(probs_B_K_C[acquistions[-1][None]], prev_joint_probs_M_K)
-                joint_entropies_B = exact_batch(probs_B_K_C, prev_joint_probs_M_K)
         else:
             # Clear memory will be using sampling method from here on out.
             prev_joint_probs_M_K = None
-            prev_samples_M_K = sample_M_K(probs_B_K_C[acquistions], S=num_samples_per_ws)
-            joint_entropies_B = batch_sample(probs_B_K_C, prev_samples_M_K)
-
-        if criteria == 'MI':
-            batch_scores = joint_entropies_B - conditional_entropies_B
-            #print(batch_scores.max())
-            batch_scores = batch_scores - np.sum(conditional_entropies_B[acquistions])
-            #print(batch_scores.max())
-        elif criteria == 'entropy':
-            batch_scores = joint_entropies_B
-
-        # Adjust scores for cost
-        scores_4m = batch_scores / cost_4m
-        scores_4m[~np.isfinite(scores_4m)] = -np.inf
-        scores_8m = batch_scores / cost_8m
-        scores_8m[~np.isfinite(scores_8m)] = -np.inf
-
-        scores_4m[acquistions] = -1 * np.inf
-        scores_8m[acquistions] = -1 * np.inf
-
-        # What objects can be observered within budget
-        possible_4m = (cost_4m + total_cost_4m) <= budget_4m
-        possible_4m[~np.isfinite(scores_4m)] = False
-        possible_8m = (cost_8m + total_cost_8m) <= budget_8m
-        possible_8m[~np.isfinite(scores_8m)] = False
-
-        sorted_4m_idx = scores_4m.argsort()[::-1]
-        possible_4m_order = np.where(possible_4m[sorted_4m_idx])[0]
-
-        sorted_8m_idx = scores_8m.argsort()[::-1]
-        possible_8m_order = np.where(possible_8m[sorted_8m_idx])[0]
-
-        if np.any(possible_4m) and np.any(possible_8m):
+            sampling = True
+            if not adaptive:
+                prev_samples_M_K = sample_M_K(probs_B_K_C[acquistions],
+                                              S=num_samples_per_ws,
+                                              max_bytes=max_bytes, rng=rng)
+
+        def evaluate(rows):
+            """Score of the current batch plus each object in rows."""
+            if not sampling:
+                joint_entropies = exact_batch(probs_B_K_C[rows],
+                                              prev_joint_probs_M_K,
+                                              max_bytes=max_bytes)
+            elif adaptive:
+                shift = -conditional_entropies_B[rows] - \
+                    np.sum(conditional_entropies_B[acquistions]) \
+                    if criteria == 'MI' else None
+                # rank as the choice below, within budget and over cost
+                weights = np.stack([1. / cost_4m[rows], 1. / cost_8m[rows]],
+                                   axis=1)
+                weights[cost_4m[rows] + total_cost_4m > budget_4m, 0] = 0.
+                weights[cost_8m[rows] + total_cost_8m > budget_8m, 1] = 0.
+                weights[np.isin(rows, acquistions)] = 0.
+                joint_entropies, _ = adaptive_batch_sample(
+                    probs_B_K_C[rows], probs_B_K_C[acquistions],
+                    S_max=num_samples_per_ws,
+                    S_min=max(1, min_samples // K), shift_B=shift,
+                    weights_B_T=weights, max_bytes=max_bytes, rng=rng)
+            else:
+                joint_entropies = batch_sample(probs_B_K_C[rows],
+                                               prev_samples_M_K,
+                                               max_bytes=max_bytes)
+
+            if criteria == 'MI':
+                return joint_entropies - conditional_entropies_B[rows] - \
+                       np.sum(conditional_entropies_B[acquistions])
+            elif criteria == 'entropy':
+                return joint_entropies
+
+        if not lazy or i == 0:
+            batch_scores = evaluate(np.arange(B))
+            fresh = np.ones(B, dtype=bool)
+        else:
+            # upper bounds, small slack guards against round off
+            slack = 1e-9 * max(1., abs(batch_total))
+            batch_scores = batch_total + gains_B + slack
+            fresh = np.zeros(B, dtype=bool)
+
+        while True:
+            # Adjust scores for cost
+            scores_4m = batch_scores / cost_4m
+            scores_4m[~np.isfinite(scores_4m)] = -np.inf
+            scores_8m = batch_scores / cost_8m
+            scores_8m[~np.isfinite(scores_8m)] = -np.inf
+
+            scores_4m[acquistions] = -1 * np.inf
+            scores_8m[acquistions] = -1 * np.inf
+
+            # What objects can be observered within budget
+            possible_4m = (cost_4m + total_cost_4m) <= budget_4m
+            possible_4m[~np.isfinite(scores_4m)] = False
+            possible_8m = (cost_8m + total_cost_8m) <= budget_8m
+            possible_8m[~np.isfinite(scores_8m)] = False
+
+            top_4m = _best_possible(scores_4m, possible_4m)
+            top_8m = _best_possible(scores_8m, possible_8m)
+
+            # rescore objects whose bound beats the best current scores
+            stale = [top for top in [top_4m, top_8m]
+                     if top is not None and not fresh[top]]
+            if len(stale) == 0:
+                break
+
+            rows = []
+            for telescope_scores, possible in [(scores_4m, possible_4m),
+                                               (scores_8m, possible_8m)]:
+                candidates = np.flatnonzero(np.logical_and(possible, ~fresh))
+                if candidates.shape[0] > lazy_chunk:
+                    top = np.argpartition(-telescope_scores[candidates],
+                                          lazy_chunk - 1)[:lazy_chunk]
+                    candidates = candidates[top]
+                rows.append(candidates)
+            rows = np.unique(np.concatenate(rows + [np.array(stale)]))
+
+            batch_scores[rows] = evaluate(rows)
+            fresh[rows] = True
+
+        gains_B[fresh] = batch_scores[fresh] - batch_total
+
+        if top_4m is not None and top_8m is not None:
             #print("BOTH POSSIBLE")
-            top_4m_score = scores_4m[sorted_4m_idx[possible_4m_order]][0]
-            top_8m_score = scores_8m[sorted_8m_idx[possible_8m_order]][0]
+            top_4m_score = scores_4m[top_4m]
+            top_8m_score = scores_8m[top_8m]
             if top_4m_score >= top_8m_score:
                 #print("Choose 4m")
                 top_score = top_4m_score
-                selection = sorted_4m_idx[possible_4m_order][0]
+                selection = top_4m
                 acquistions_4m.append(selection)
                 total_cost_4m += cost_4m[selection]
             else:
                 #print("Choose 8m")
                 top_score = top_8m_score
-                selection = sorted_8m_idx[possible_8m_order][0]
+                selection = top_8m
                 acquistions_8m.append(selection)
                 total_cost_8m += cost_8m[selection]
 
-        elif np.any(possible_4m) and not np.any(possible_8m):
+        elif top_4m is not None:
             #print("Only 4m possible")
-            top_4m_score = scores_4m[sorted_4m_idx[possible_4m_order]][0]
-            top_score = top_4m_score
-            selection = sorted_4m_idx[possible_4m_order][0]
+            top_score = scores_4m[top_4m]
+            selection = top_4m
             acquistions_4m.append(selection)
             total_cost_4m += cost_4m[selection]
 
-        elif not np.any(possible_4m) and np.any(possible_8m):
+        elif top_8m is not None:
             #print("Only 8m possible")
-            top_8m_score = scores_8m[sorted_8m_idx[possible_8m_order]][0]
-            top_score = top_8m_score
-            selection = sorted_8m_idx[possible_8m_order][0]
+            top_score = scores_8m[top_8m]
+            selection = top_8m
             acquistions_8m.append(selection)
             total_cost_8m += cost_8m[selection]
 
-        elif not np.any(possible_4m) and not np.any(possible_8m):
+        else:
             #print("Budget Full")
             is_time = False
             continue
 
         acquistions.append(selection)
         scores.append(batch_scores[selection])
+        batch_total = batch_scores[selection]
         i += 1
         top_scores.append(top_score)
         #print("TOP SCORE: {}".format(top_score))
@@ -281,12 +492,4 @@ def batch_queries_mi_entropy(probs_B_K_C, id_name, queryable_ids,
     if len(set(acquistions_4m) & set(acquistions_8m)) != 0:
         raise RuntimeError("Object acquired by both telescopes")
 
-    acquistion_ids = []
-    for index in acquistions:
-        acquistion_ids.append(index_to_ids[index])
-
-    acquistion_indexes = []
-    for p_id in acquistion_ids:
-        acquistion_indexes.append(ids_to_index[p_id])
-
-    return acquistion_indexes
+    return list(query_index[np.array(acquistions, dtype=int)])
@@ -15,7 +15,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-__all__ = ['uncertainty_sampling',
+__all__ = ['get_queryable_flag',
+           'select_queries',
+           'uncertainty_sampling',
            'random_sampling',
            'uncertainty_sampling_entropy',
            'uncertainty_sampling_least_confident',
@@ -69,9 +71,92 @@ def compute_qbd_mi_entropy(ensemble_probs: np.array):
     return entropy_avg_dist, mutual_information
 
 
+def get_queryable_flag(test_ids: np.array, queryable_ids: np.array) -> np.array:
+    """
+    Flag objects in the test sample which are available for querying.
+
+    Parameters
+    ----------
+    test_ids: np.array
+        Set of ids for objects in the test sample.
+    queryable_ids: np.array
+        Set of ids for objects available for querying.
+
+    Returns
+    -------
+    queryable_flag: np.array
+        True for queryable objects, one value per object in the test sample.
+    """
+    return np.isin(np.asarray(test_ids), np.asarray(queryable_ids))
+
+
+def select_queries(scores: np.array, queryable_flag: np.array, batch=1,
+                   query_thre=1.0, screen=False, class_prob=None) -> list:
+    """
+    Choose the queryable objects with the lowest scores.
+
+    Only the best 'batch' queryable objects are sorted, the rest of the
+    test sample is never ordered.
+
+    Parameters
+    ----------
+    scores: np.array
+        One value per object in the test sample. Objects with lower scores
+        are queried first.
+    queryable_flag: np.array
+        True for objects available for querying.
+    batch: int (optional)
+        Number of objects to be chosen. Default is 1.
+    query_thre: float (optional)
+        Maximum percentile where a spectra is considered worth it.
+        If the best queryable object is ranked after this threshold
+        within the whole test sample, return empty query. Default is 1.0.
+    screen: bool (optional)
+        If True display on screen the shift in index and the difference
+        in estimated probabilities caused by constraints on the sample
+        available for querying. Default is False.
+    class_prob: np.array (optional)
+        Classification probabilities, only used if screen is True.
+
+    Returns
+    -------
+    query_indx: list
+        List of indexes identifying the objects from the test sample
+        to be queried in decreasing order of importance.
+    """
+    scores = np.asarray(scores)
+    candidates = np.flatnonzero(queryable_flag)
+    if candidates.shape[0] == 0 or batch < 1:
+        return list([])
+
+    # partial selection of the best candidates, then sort only those
+    candidate_scores = scores[candidates]
+    if candidates.shape[0] > batch:
+        best = np.argpartition(candidate_scores, batch - 1)[:batch]
+    else:
+        best = np.arange(candidates.shape[0])
+    best = best[np.lexsort((candidates[best], candidate_scores[best]))]
+    query_indx = candidates[best]
+
+    # rank of the best queryable object within the whole test sample
+    displacement = np.count_nonzero(scores < scores[query_indx[0]])
+    if displacement >= int(scores.shape[0] * query_thre):
+        return list([])
+
+    if screen:
+        print('*** Displacement caused by constraints on query****')
+        print(' 0 -> ', displacement)
+        if class_prob is not None:
+            print(class_prob[np.argmin(scores)], '-- > ',
+                  class_prob[query_indx[0]])
+
+    return list(query_indx)
+
+
 def uncertainty_sampling(class_prob: np.array, test_ids: np.array,
                          queryable_ids: np.array, batch=1,
-                         screen=False, query_thre=1.0) -> list:
+                         screen=False, query_thre=1.0,
+                         queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty in predicted class.
 
     Parameters
@@ -93,6 +178,9 @@ def uncertainty_sampling(class_prob: np.array, test_ids: np.array,
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -111,45 +199,26 @@ def uncertainty_sampling(class_prob: np.array, test_ids: np.array,
     # calculate distance to the decision boundary - only binary classification
     dist = abs(class_prob[:, 1] - 0.5)
 
-    # get indexes in increasing order
-    order = dist.argsort()
-
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
+    query_indx = select_queries(dist, queryable_flag, batch=batch,
+                                query_thre=query_thre, screen=screen,
+                                class_prob=class_prob)
 
-    if sum(flag[:indx]) > 0:
+    if screen and len(query_indx) > 0:
+        print('\n Inside UncSampling: ')
+        print('       query_ids: ', test_ids[query_indx], '\n')
+        print('   number of test_ids: ', test_ids.shape[0])
+        print('   number of queryable_ids: ', len(queryable_ids), '\n')
 
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
-
-        if screen:
-            print('\n Inside UncSampling: ')
-            print('       query_ids: ', test_ids[final_order][:batch], '\n')
-            print('   number of test_ids: ', test_ids.shape[0])
-            print('   number of queryable_ids: ', len(queryable_ids), '\n')
-            print('   *** Displacement caused by constraints on query****')
-            print('   0 -> ', list(order).index(final_order[0]))
-            print('   ', class_prob[order[0]], '-- > ', class_prob[final_order[0]], '\n')
-
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return query_indx
 
 
 def random_sampling(test_ids: np.array, queryable_ids: np.array,
                     batch=1, queryable=False, query_thre=1.0, seed=42,
-                    screen=False) -> list:
+                    screen=False, queryable_flag=None) -> list:
     """Randomly choose an object from the test sample.
 
     Parameters
@@ -173,6 +242,9 @@ def random_sampling(test_ids: np.array, queryable_ids: np.array,
         caused by constraints on the sample available for querying.
     seed: int (optional)
         Seed for random number generator. Default is 42.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -190,41 +262,32 @@ def random_sampling(test_ids: np.array, queryable_ids: np.array,
                             replace=False)
 
     if queryable:
-        # flag only the queryable objects
-        flag = []
-        for item in indx:
-            if test_ids[item] in queryable_ids:
-                flag.append(True)
-            else:
-                flag.append(False)
-
-        ini_index = flag.index(True)
-
-        flag = np.array(flag)
-
-        # check if there are queryable objects within threshold
-        indx_query = int(len(flag) * query_thre)
-
-        if sum(flag[:indx_query]) > 0:       
-            if screen:
-                print('\n Inside RandomSampling: ')
-                print('       query_ids: ', test_ids[indx[flag]][:batch], '\n')
-                print('   number of test_ids: ', test_ids.shape[0])
-                print('   number of queryable_ids: ', len(queryable_ids), '\n')
-                print('   inedex of queried ids: ', indx[flag][:batch])
-
-            # return the corresponding batch size
-            return list(indx[flag])[:batch]
-        else:
-            # return empty list
-            return list([])
+        # rank objects by their position in the random permutation
+        position = np.empty(len(test_ids), dtype=int)
+        position[indx] = np.arange(len(test_ids))
+
+        if queryable_flag is None:
+            queryable_flag = get_queryable_flag(test_ids, queryable_ids)
+
+        query_indx = select_queries(position, queryable_flag, batch=batch,
+                                    query_thre=query_thre)
+
+        if screen and len(query_indx) > 0:
+            print('\n Inside RandomSampling: ')
+            print('       query_ids: ', test_ids[query_indx], '\n')
+            print('   number of test_ids: ', test_ids.shape[0])
+            print('   number of queryable_ids: ', len(queryable_ids), '\n')
+            print('   inedex of queried ids: ', query_indx)
+
+        return query_indx
     else:
         return list(indx)[:batch]
 
 
 def uncertainty_sampling_entropy(class_prob: np.array, test_ids: np.array,
                          queryable_ids: np.array, batch=1,
-                         screen=False, query_thre=1.0) -> list:
+                         screen=False, query_thre=1.0,
+                         queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty, defined by entropy, in predicted class.
 
     Parameters
@@ -246,6 +309,9 @@ def uncertainty_sampling_entropy(class_prob: np.array, test_ids: np.array,
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -260,42 +326,21 @@ def uncertainty_sampling_entropy(class_prob: np.array, test_ids: np.array,
         raise ValueError('Number of probabiblities is different ' +
                          'from number of objects in the test sample!')
 
-    # calculate entropy
+    # calculate entropy, highest values are queried first
     entropies = (-1*np.sum(class_prob * np.log(class_prob + 1e-12), axis=1))
 
-    # get indexes in increasing order
-    order = entropies.argsort()[::-1]
-
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
-
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
-    if sum(flag[:indx]) > 0:
-
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
-
-        if screen:
-            print('*** Displacement caused by constraints on query****')
-            print(' 0 -> ', list(order).index(final_order[0]))
-            print(class_prob[order[0]], '-- > ', class_prob[final_order[0]])
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return select_queries(-entropies, queryable_flag, batch=batch,
+                          query_thre=query_thre, screen=screen,
+                          class_prob=class_prob)
 
 def uncertainty_sampling_least_confident(class_prob: np.array, test_ids: np.array,
                          queryable_ids: np.array, batch=1,
-                         screen=False, query_thre=1.0) -> list:
+                         screen=False, query_thre=1.0,
+                         queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty, defined by least confident, in predicted class.
 
     Parameters
@@ -317,6 +362,9 @@ def uncertainty_sampling_least_confident(class_prob: np.array, test_ids: np.arra
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -334,39 +382,18 @@ def uncertainty_sampling_least_confident(class_prob: np.array, test_ids: np.arra
     # Get probability of predicted class
     prob_predicted_class = class_prob.max(axis=1)
 
-    # get indexes in increasing order
-    order = prob_predicted_class.argsort()
-
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
-
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
-    if sum(flag[:indx]) > 0:
-
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-        if screen:
-            print('*** Displacement caused by constraints on query****')
-            print(' 0 -> ', list(order).index(final_order[0]))
-            print(class_prob[order[0]], '-- > ', class_prob[final_order[0]])
-
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return select_queries(prob_predicted_class, queryable_flag, batch=batch,
+                          query_thre=query_thre, screen=screen,
+                          class_prob=class_prob)
 
 def uncertainty_sampling_margin(class_prob: np.array, test_ids: np.array,
                          queryable_ids: np.array, batch=1,
-                         screen=False, query_thre=1.0) -> list:
+                         screen=False, query_thre=1.0,
+                         queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty, defined by max margin, in predicted class.
 
     Parameters
@@ -388,6 +415,9 @@ def uncertainty_sampling_margin(class_prob: np.array, test_ids: np.array,
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -405,40 +435,20 @@ def uncertainty_sampling_margin(class_prob: np.array, test_ids: np.array,
     # Calculate margin between highest predicted class and second highest
     sorted_probs = np.sort(class_prob, axis=1)
     margin = sorted_probs[:, -1] - sorted_probs[:, -2]
-    # get indexes in increasing order
-    order = margin.argsort()
-
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
 
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
-    if sum(flag[:indx]) > 0:
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
-
-        if screen:
-            print('*** Displacement caused by constraints on query****')
-            print(' 0 -> ', list(order).index(final_order[0]))
-            print(class_prob[order[0]], '-- > ', class_prob[final_order[0]])
-
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return select_queries(margin, queryable_flag, batch=batch,
+                          query_thre=query_thre, screen=screen,
+                          class_prob=class_prob)
 
 
 def qbd_mi(ensemble_probs: np.array, test_ids: np.array,
                          queryable_ids: np.array, batch=1,
-                         screen=False, query_thre=1.0) -> list:
+                         screen=False, query_thre=1.0,
+                         queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty in predicted class.
 
     Parameters
@@ -460,6 +470,9 @@ def qbd_mi(ensemble_probs: np.array, test_ids: np.array,
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -474,43 +487,21 @@ def qbd_mi(ensemble_probs: np.array, test_ids: np.array,
         raise ValueError('Number of probabiblities is different ' +
                          'from number of objects in the test sample!')
 
-    # calculate distance to the decision boundary - only binary classification
+    # calculate mutual information, highest values are queried first
     entropies, mis = compute_qbd_mi_entropy(ensemble_probs)
 
-    # get indexes in increasing order
-    order = mis.argsort()[::-1]
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
-
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
-    if sum(flag[:indx]) > 0:
-
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
-
-        if screen:
-            print('*** Displacement caused by constraints on query****')
-            print(' 0 -> ', list(order).index(final_order[0]))
-            print(ensemble_probs[order[0]], '-- > ', ensemble_probs[final_order[0]])
-
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return select_queries(-mis, queryable_flag, batch=batch,
+                          query_thre=query_thre, screen=screen,
+                          class_prob=ensemble_probs)
 
 
 def qbd_entropy(ensemble_probs: np.array, test_ids: np.array,
                 queryable_ids: np.array, batch=1,
-                screen=False, query_thre=1.0) -> list:
+                screen=False, query_thre=1.0, queryable_flag=None) -> list:
     """Search for the sample with highest uncertainty in predicted class.
 
     Parameters
@@ -532,6 +523,9 @@ def qbd_entropy(ensemble_probs: np.array, test_ids: np.array,
         Maximum percentile where a spectra is considered worth it.
         If not queryable object is available before this threshold,
         return empty query. Default is 1.0.
+    queryable_flag: np.array (optional)
+        True for objects in the test sample available for querying.
+        If given, queryable_ids is not used to build it.
 
     Returns
     -------
@@ -546,38 +540,16 @@ def qbd_entropy(ensemble_probs: np.array, test_ids: np.array,
         raise ValueError('Number of probabiblities is different ' +
                          'from number of objects in the test sample!')
 
-    # calculate distance to the decision boundary - only binary classification
+    # calculate entropy of the average distribution, highest values first
     entropies, mis = compute_qbd_mi_entropy(ensemble_probs)
 
-    # get indexes in increasing order
-    order = entropies.argsort()[::-1]
-
-    # only allow objects in the query sample to be chosen
-    flag = []
-    for item in order:
-        if test_ids[item] in queryable_ids:
-            flag.append(True)
-        else:
-            flag.append(False)
-
-    # check if there are queryable objects within threshold
-    indx = int(len(flag) * query_thre)
-    if sum(flag[:indx]) > 0:
+    if queryable_flag is None:
+        queryable_flag = get_queryable_flag(test_ids, queryable_ids)
 
-        # arrange queryable elements in increasing order
-        flag = np.array(flag)
-        final_order = order[flag]
-
-        if screen:
-            print('*** Displacement caused by constraints on query****')
-            print(' 0 -> ', list(order).index(final_order[0]))
-            print(ensemble_probs[order[0]], '-- > ', ensemble_probs[final_order[0]])
-
-        # return the index of the highest uncertain objects which are queryable
-        return list(final_order)[:batch]
-
-    else:
-        return list([])
+    # return the index of the highest uncertain objects which are queryable
+    return select_queries(-entropies, queryable_flag, batch=batch,
+                          query_thre=query_thre, screen=screen,
+                          class_prob=ensemble_probs)
 
 
 def main():
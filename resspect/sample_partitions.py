@@ -0,0 +1,265 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['SAMPLE_NAMES', 'SamplePartitions']
+
+SAMPLE_NAMES = ('train', 'pool', 'test', 'validation')
+
+
+class SamplePartitions(object):
+    """Train, pool, test and validation samples stored as one table.
+
+    Features, metadata and labels of all objects are kept once. Each
+    sample is a membership flag over the rows, so moving an object between
+    samples only flips flags instead of copying every array. Objects
+    keep their original order within a sample, objects added later go to
+    the end.
+
+    Attributes
+    ----------
+    features: np.array
+        Features matrix for all objects.
+    labels: np.array
+        Classes for all objects.
+    metadata: pd.DataFrame
+        Metadata for all objects.
+
+    Methods
+    -------
+    from_samples(samples: dict)
+        Build partitions from separate features, metadata and labels.
+    get(sample: str, kind: str)
+        Features, metadata or labels for one sample.
+    indices(sample: str)
+        Rows belonging to one sample, in sample order.
+    move(rows: np.array, to: str, remove_from: tuple)
+        Move rows from some samples to another.
+    remove(sample: str, rows: np.array)
+        Remove rows from one sample.
+    set_metadata(row: int, values: list)
+        Replace metadata of one object.
+    size(sample: str)
+        Number of objects in one sample.
+
+    Examples
+    --------
+    >>> partitions = SamplePartitions(features, metadata, labels,
+    >>>                               members={'train': train_flag,
+    >>>                                        'pool': ~train_flag})
+    >>> pool_features = partitions.get('pool', 'features')
+    >>> rows = partitions.indices('pool')[query_indx]
+    >>> partitions.move(rows, to='train', remove_from=('pool',))
+    """
+
+    def __init__(self, features: np.array, metadata: pd.DataFrame,
+                 labels: np.array, members: dict):
+        self.features = np.asarray(features)
+        self.metadata = metadata.reset_index(drop=True)
+        self.labels = np.asarray(labels)
+
+        nobjects = self.metadata.shape[0]
+        self._members = {}
+        self._ranks = {}
+        for name in SAMPLE_NAMES:
+            if members.get(name) is None:
+                self._members[name] = np.zeros(nobjects, dtype=bool)
+            else:
+                self._members[name] = np.array(members[name], dtype=bool)
+            self._ranks[name] = np.arange(nobjects)
+        self._next_rank = nobjects
+        self._cache = {}
+
+    @classmethod
+    def from_samples(cls, samples: dict):
+        """Build partitions from separate features, metadata and labels.
+
+        Samples given by the same metadata object, as when pool and test
+        are the same sample, share their rows.
+
+        Parameters
+        ----------
+        samples: dict
+            Keywords are sample names, values are tuples of
+            (features, metadata, labels).
+
+        Returns
+        -------
+        resspect.SamplePartitions
+        """
+        groups = []
+        for name in SAMPLE_NAMES:
+            features, metadata, labels = samples[name]
+            if metadata.shape[0] == 0:
+                continue
+            if len(labels) != metadata.shape[0] or \
+               len(features) != metadata.shape[0]:
+                raise ValueError('Missing data in the ' + name + ' sample!')
+
+            for group in groups:
+                if group['metadata'] is metadata and \
+                   group['features'] is features:
+                    group['names'].append(name)
+                    break
+            else:
+                groups.append({'features': features, 'metadata': metadata,
+                               'labels': labels, 'names': [name]})
+
+        if len(groups) == 0:
+            return cls(np.array([]), pd.DataFrame(), np.array([]), {})
+
+        sizes = [group['metadata'].shape[0] for group in groups]
+        limits = np.cumsum([0] + sizes)
+        members = {}
+        for i, group in enumerate(groups):
+            for name in group['names']:
+                members[name] = np.zeros(limits[-1], dtype=bool)
+                members[name][limits[i]:limits[i + 1]] = True
+
+        features = np.concatenate([np.asarray(group['features'])
+                                   for group in groups], axis=0)
+        metadata = pd.concat([group['metadata'] for group in groups],
+                             axis=0, ignore_index=True)
+        labels = np.concatenate([np.asarray(group['labels'])
+                                 for group in groups], axis=0)
+
+        return cls(features, metadata, labels, members)
+
+    def indices(self, sample: str) -> np.array:
+        """Rows belonging to one sample, in sample order.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+
+        Returns
+        -------
+        np.array
+        """
+        if (sample, 'rows') not in self._cache:
+            rows = np.flatnonzero(self._members[sample])
+            order = np.argsort(self._ranks[sample][rows], kind='stable')
+            self._cache[(sample, 'rows')] = rows[order]
+        return self._cache[(sample, 'rows')]
+
+    def size(self, sample: str) -> int:
+        """Number of objects in one sample.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+        """
+        return int(np.count_nonzero(self._members[sample]))
+
+    def get(self, sample: str, kind: str):
+        """Features, metadata or labels for one sample.
+
+        Results are kept until the next change in this sample.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+        kind: str
+            One of 'features', 'metadata' or 'labels'.
+
+        Returns
+        -------
+        np.array or pd.DataFrame
+        """
+        if (sample, kind) not in self._cache:
+            rows = self.indices(sample)
+            if kind == 'features':
+                value = self.features[rows]
+            elif kind == 'metadata':
+                value = self.metadata.iloc[rows]
+            elif kind == 'labels':
+                value = self.labels[rows]
+            else:
+                raise ValueError('Unknown kind: ' + str(kind))
+            self._cache[(sample, kind)] = value
+        return self._cache[(sample, kind)]
+
+    def _invalidate(self, samples, kinds=('rows', 'features', 'metadata',
+                                          'labels')):
+        """Drop cached results of some samples.
+
+        Parameters
+        ----------
+        samples: iterable
+            Names of the samples which changed.
+        kinds: tuple (optional)
+            Cached results to drop. Default is all of them.
+        """
+        for name in samples:
+            for kind in kinds:
+                self._cache.pop((name, kind), None)
+
+    def move(self, rows: np.array, to='train', remove_from=('pool',)):
+        """Move rows from some samples to another.
+
+        Parameters
+        ----------
+        rows: np.array
+            Rows to be moved. They are added to the end of the
+            destination sample in this order.
+        to: str (optional)
+            Destination sample. Default is 'train'.
+        remove_from: tuple (optional)
+            Samples from which rows are removed. Default is ('pool',).
+        """
+        rows = np.asarray(rows, dtype=int)
+        for name in remove_from:
+            self._members[name][rows] = False
+        self._members[to][rows] = True
+        self._ranks[to][rows] = self._next_rank + np.arange(rows.shape[0])
+        self._next_rank += rows.shape[0]
+        self._invalidate((to,) + tuple(remove_from))
+
+    def remove(self, sample: str, rows: np.array):
+        """Remove rows from one sample.
+
+        Parameters
+        ----------
+        sample: str
+            One of 'train', 'pool', 'test' or 'validation'.
+        rows: np.array
+            Rows to be removed, rows not in the sample are ignored.
+        """
+        rows = np.asarray(rows, dtype=int)
+        if np.any(self._members[sample][rows]):
+            self._members[sample][rows] = False
+            self._invalidate((sample,))
+
+    def set_metadata(self, row: int, values: list):
+        """Replace metadata of one object.
+
+        Parameters
+        ----------
+        row: int
+            Row to be changed.
+        values: list
+            New metadata, in the same order as the metadata columns.
+        """
+        for name, value in zip(self.metadata.keys(), values):
+            self.metadata.loc[row, name] = value
+        self._invalidate([name for name in SAMPLE_NAMES
+                          if self._members[name][row]], kinds=('metadata',))
@@ -72,17 +72,16 @@ def main(user_choice):
     spec_SNR = user_choice.spec_SNR
     fname_pattern = user_choice.fname_pattern
 
-    for item in day:
-        data = SNPCCPhotometry()
-        data.create_daily_file(output_dir=output_dir, day=item, get_cost=get_cost)
-        data.build_one_epoch(raw_data_dir=path_to_data, day_of_survey=int(item),
-                             time_domain_dir=output_dir,
-                             feature_method=feature_method, screen=screen,
-                             days_since_obs=days_since_obs,
-                             queryable_criteria=queryable_criteria, 
-                             get_cost=get_cost, tel_sizes=tel_sizes,
-                             tel_names=tel_names, spec_SNR=spec_SNR,
-                             fname_pattern=fname_pattern)
+    # read and fit each light curve once for all days
+    data = SNPCCPhotometry()
+    data.build_all_epochs(raw_data_dir=path_to_data, days=day,
+                          time_domain_dir=output_dir,
+                          feature_method=feature_method, screen=screen,
+                          days_since_obs=days_since_obs,
+                          queryable_criteria=queryable_criteria, 
+                          get_cost=get_cost, tel_sizes=tel_sizes,
+                          tel_names=tel_names, spec_SNR=spec_SNR,
+                          fname_pattern=fname_pattern)
 
 
 if __name__ == '__main__':
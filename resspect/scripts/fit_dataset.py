@@ -45,6 +45,10 @@ def main(user_choices):
     -sp: str or None (optional)
         Sample to be fitted. Options are 'train', 'test' or None.
         Default is None.
+    -nw: int (optional)
+        Number of worker processes. Default is 1.
+    -v: bool (optional)
+        If True, use the vectorized Bazin fit. Default is False.
 
     Examples
     --------
@@ -57,6 +61,10 @@ def main(user_choices):
 
     >>> fit_dataset.py -s <dataset_name> -p <path_to_photo_file> 
              -hd <path_to_header_file> -o <output_file> 
+
+    Using 4 worker processes:
+
+    >>> fit_dataset.py -s SNPCC -dd <path_to_data_dir> -o <output_file> -nw 4
     """
 
     # raw data directory
@@ -65,18 +73,24 @@ def main(user_choices):
 
     if user_choices.sim_name == 'SNPCC':
         # fit the entire sample
-        fit_snpcc_bazin(path_to_data_dir=data_dir, features_file=features_file)
+        fit_snpcc_bazin(path_to_data_dir=data_dir, features_file=features_file,
+                        vectorized=user_choices.vectorized,
+                        n_workers=user_choices.n_workers)
     
     elif user_choices.sim_name == 'RESSPECT':
         fit_resspect_bazin(path_photo_file=user_choices.photo_file,
                            path_header_file=user_choices.header_file,
-                           output_file=features_file, sample=user_choices.sample)
+                           output_file=features_file, sample=user_choices.sample,
+                           vectorized=user_choices.vectorized,
+                           n_workers=user_choices.n_workers)
 
     elif user_choices.sim_name == 'PLAsTiCC':
         fit_plasticc_bazin(path_photo_file=user_choices.photo_file, 
                            path_header_file=user_choices.header_file,
                            output_file=features_file,
-                           sample=user_choices.sample)
+                           sample=user_choices.sample,
+                           vectorized=user_choices.vectorized,
+                           n_workers=user_choices.n_workers)
 
     return None
 
@@ -105,6 +119,13 @@ if __name__ == '__main__':
                         help='Sample to be fitted. Options are "train", ' + \
                              ' "test" or None.',
                         required=False, default=None)
+    parser.add_argument('-nw', '--n_workers', dest='n_workers', type=int,
+                        help='Number of worker processes. Default is 1.',
+                        required=False, default=1)
+    parser.add_argument('-v', '--vectorized', dest='vectorized',
+                        action='store_true',
+                        help='Use the vectorized Bazin fit.',
+                        required=False, default=False)
 
     user_input = parser.parse_args()
 
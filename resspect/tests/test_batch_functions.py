@@ -14,5 +14,96 @@ def test_entropy_from_probs_b_M_C():
     foo = batch_functions.entropy_from_probs_b_M_C(x)
 
 
+def test_exact_batch_max_bytes():
+    """Test chunked joint entropies match a single chunk."""
+
+    from resspect import batch_functions
+
+    rng = np.random.default_rng(42)
+    probs_B_K_C = rng.dirichlet([1., 1., 1.], size=(40, 6)) + 1.e-12
+    prev_joint_probs_M_K = batch_functions.joint_probs_M_K(probs_B_K_C[:3])
+
+    entropy_B = batch_functions.exact_batch(probs_B_K_C, prev_joint_probs_M_K)
+    entropy_B_chunked = batch_functions.exact_batch(probs_B_K_C,
+                                                    prev_joint_probs_M_K,
+                                                    max_bytes=1000)
+    assert np.allclose(entropy_B, entropy_B_chunked)
+
+    samples_M_K = batch_functions.sample_M_K(probs_B_K_C[:3], S=50,
+                                             max_bytes=1000)
+    entropy_B = batch_functions.batch_sample(probs_B_K_C, samples_M_K)
+    entropy_B_chunked = batch_functions.batch_sample(probs_B_K_C, samples_M_K,
+                                                     max_bytes=1000)
+    assert np.allclose(entropy_B, entropy_B_chunked)
+
+    assert batch_functions.exact_joint_fits(27, 6, 3, max_bytes=10 ** 6)
+    assert not batch_functions.exact_joint_fits(27, 6, 3, max_bytes=1000)
+
+
+def test_fast_multi_choices():
+    """Test categorical samples follow the distribution and seed."""
+
+    from resspect import batch_functions
+
+    probs_b_C = np.array([[0.2, 0.5, 0.3], [1., 0., 0.]])
+    choices_b_M = batch_functions.fast_multi_choices(
+        probs_b_C, 20000, rng=np.random.default_rng(42))
+    assert choices_b_M.shape == (2, 20000)
+
+    freq_b_C = np.stack([(choices_b_M == c).mean(axis=1) for c in range(3)],
+                        axis=1)
+    assert np.allclose(freq_b_C, probs_b_C, atol=0.02)
+
+    same_b_M = batch_functions.fast_multi_choices(
+        probs_b_C, 20000, rng=np.random.default_rng(42))
+    assert np.array_equal(choices_b_M, same_b_M)
+
+
+def test_adaptive_batch_sample():
+    """Test adaptive sampling stops early when the best score stands out."""
+
+    from resspect import batch_functions
+
+    rng = np.random.default_rng(42)
+    probs_B_K_C = rng.dirichlet([5., 5.], size=(20, 4)) + 1.e-12
+    # object 0 is a coin flip for every member, hence clearly the best
+    probs_B_K_C[0] = 0.5
+
+    entropy_B, S = batch_functions.adaptive_batch_sample(
+        probs_B_K_C, probs_B_K_C[5:8], S_max=10000, S_min=100,
+        rng=np.random.default_rng(0))
+    assert S < 10000
+    assert entropy_B.argmax() == 0
+
+    exact_B = batch_functions.exact_batch(
+        probs_B_K_C, batch_functions.joint_probs_M_K(probs_B_K_C[5:8]))
+    assert np.allclose(entropy_B, exact_B, atol=0.05)
+
+    # ties are accepted within tol, otherwise all samples are used
+    tied_B_K_C = np.repeat(probs_B_K_C[1:2], 2, axis=0)
+    _, S = batch_functions.adaptive_batch_sample(
+        tied_B_K_C, probs_B_K_C[5:8], S_max=800, S_min=100,
+        rng=np.random.default_rng(0))
+    assert S == 100
+
+    _, S = batch_functions.adaptive_batch_sample(
+        tied_B_K_C, probs_B_K_C[5:8], S_max=800, S_min=100, tol=0.,
+        rng=np.random.default_rng(0))
+    assert S == 800
+
+    # the ranking is resolved among data points with non zero weights
+    mixed_B_K_C = np.concatenate([probs_B_K_C[:1], tied_B_K_C])
+    _, S = batch_functions.adaptive_batch_sample(
+        mixed_B_K_C, probs_B_K_C[5:8], S_max=800, S_min=100, tol=0.,
+        rng=np.random.default_rng(0))
+    assert S < 800
+
+    _, S = batch_functions.adaptive_batch_sample(
+        mixed_B_K_C, probs_B_K_C[5:8], S_max=800, S_min=100, tol=0.,
+        weights_B_T=np.array([[0.], [1.], [1.]]),
+        rng=np.random.default_rng(0))
+    assert S == 800
+
+
 if __name__ == '__main__':
     pytest.main()
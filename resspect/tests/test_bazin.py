@@ -81,5 +81,136 @@ def test_fit_scipy():
     assert not np.isnan(res).any()
 
 
+def test_jac_errfunc():
+    """
+    Test the closed-form Jacobian against finite differences.
+    """
+    from scipy.optimize import approx_fprime
+
+    from resspect import bazin, errfunc, errfunc_smooth, jac_errfunc
+
+    time = np.arange(0, 50, 3.5)
+    params = np.array([10, 1, 10, 3, 1.5])
+    flux = bazin(time, 10, 1, 10, 3, 2) + 0.1
+    fluxerr = 0.5
+
+    jac = jac_errfunc(params, time, flux, fluxerr)
+    jac_num = np.array([approx_fprime(
+        params, lambda p: errfunc_smooth(p, time, flux, fluxerr)[i], 1e-7)
+        for i in range(time.size)])
+
+    assert jac.shape == (time.size, 5)
+    assert np.allclose(jac, jac_num, atol=1e-4)
+    assert np.allclose(abs(errfunc_smooth(params, time, flux, fluxerr)),
+                       errfunc(params, time, flux, fluxerr))
+
+
+def test_fit_scipy_analytic_jac():
+    """
+    Test the scipy fit using the closed-form Jacobian.
+    """
+    from resspect import fit_scipy
+
+    fname = testing.download_data('tests/lc_mjd_flux.csv')
+    data = read_csv(fname)
+
+    time = data['mjd'].values - data['mjd'].values[0]
+    flux = data['flux'].values
+
+    res = fit_scipy(time, flux, 1)
+    res_jac = fit_scipy(time, flux, 1, analytic_jac=True)
+
+    assert not np.isnan(res_jac).any()
+    assert np.allclose(res, res_jac, rtol=1e-3)
+
+
+def test_fit_scipy_initial_guess():
+    """
+    Test the scipy fit started from a prior best fit.
+    """
+    from resspect import errfunc, fit_scipy
+
+    fname = testing.download_data('tests/lc_mjd_flux.csv')
+    data = read_csv(fname)
+
+    time = data['mjd'].values - data['mjd'].values[0]
+    flux = data['flux'].values
+    fluxerr = np.ones(flux.shape)
+
+    res = fit_scipy(time, flux, fluxerr)
+
+    # start from the fit to all but the last point
+    prior = fit_scipy(time[:-1], flux[:-1], fluxerr[:-1])
+    res_warm = fit_scipy(time, flux, fluxerr, initial_guess=prior)
+
+    def chi2(params):
+        r = params[3] / params[4]
+        return np.sum(errfunc(np.append(params[:4], r), time, flux,
+                              fluxerr) ** 2)
+
+    assert not np.isnan(res_warm).any()
+    assert chi2(res_warm) <= chi2(res) * (1 + 1e-3)
+
+    # invalid priors fall back to the heuristic guess
+    res_nan = fit_scipy(time, flux, fluxerr, initial_guess=[np.nan] * 5)
+    assert np.allclose(res, res_nan)
+
+
+def test_fit_bazin_batch():
+    """
+    Test the vectorized fit against the scipy fit.
+    """
+    from resspect import errfunc, fit_bazin_batch, fit_scipy
+
+    fname = testing.download_data('tests/lc_mjd_flux.csv')
+    data = read_csv(fname)
+
+    time = data['mjd'].values - data['mjd'].values[0]
+    flux = data['flux'].values
+    fluxerr = np.ones(flux.shape)
+
+    # second curve is padded and has too few valid points
+    mask = np.ones((2, time.size), dtype=bool)
+    mask[1, 4:] = False
+
+    res = fit_bazin_batch(np.tile(time, (2, 1)), np.tile(flux, (2, 1)),
+                          np.tile(fluxerr, (2, 1)), mask)
+    res_scipy = fit_scipy(time, flux, fluxerr)
+
+    def chi2(params):
+        a, b, t0, tfall, trise = params
+        return np.sum(errfunc([a, b, t0, tfall, tfall / trise],
+                              time, flux, fluxerr) ** 2)
+
+    assert res.shape == (2, 5)
+    assert not np.isnan(res[0]).any()
+    assert np.isnan(res[1]).all()
+    assert chi2(res[0]) <= 1.001 * chi2(res_scipy)
+
+
+def test_fit_bazin_batch_initial_guess():
+    """
+    Test the vectorized fit starts from the same guess as the scipy fit.
+    """
+    from resspect.bazin import _get_batch_guess_and_bounds
+    from resspect.bazin import _get_scipy_guess_and_bounds
+
+    time = np.array([0., 3., 7., 12., 20., 31., 45.])
+    base_flux = np.array([1., 2., 3., 2., 1.5, 1., 0.5])
+
+    # maximum at the edges, where scipy slices wrap around, and inside
+    for imax in [0, 1, 2, 6]:
+        flux = base_flux.copy()
+        flux[imax] = 10.
+        guess, bounds = _get_scipy_guess_and_bounds(time, flux)
+
+        mask = np.ones((1, time.size), dtype=bool)
+        batch_guess, lower, upper = \
+            _get_batch_guess_and_bounds(time[None, :], flux[None, :], mask)
+        assert np.allclose(batch_guess[0], guess)
+        assert np.allclose(lower[0], bounds[0])
+        assert np.allclose(upper[0], bounds[1])
+
+
 if __name__ == '__main__':
     pytest.main()
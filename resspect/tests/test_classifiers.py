@@ -0,0 +1,230 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+
+from resspect.classifiers import bootstrap_clf
+from resspect.classifiers import CachedKernelSVC
+from resspect.classifiers import forest_committee
+from resspect.classifiers import gradient_boosted_trees
+from resspect.classifiers import IncrementalKNN
+from resspect.classifiers import mlp
+from resspect.classifiers import nbg
+from resspect.classifiers import predict_in_chunks
+from resspect.classifiers import random_forest
+from resspect.classifiers import update_classifier
+
+
+@pytest.fixture
+def train_test():
+    rng = np.random.default_rng(42)
+    train_labels = rng.integers(0, 2, 60)
+    train_features = rng.normal(size=(60, 4)) + train_labels[:, None]
+    test_features = rng.normal(size=(30, 4))
+    return train_features, train_labels, test_features
+
+
+@pytest.mark.parametrize('clf_function, kwargs',
+                         [(nbg, {}), (random_forest, {'n_estimators': 10})])
+def test_bootstrap_clf_n_workers(train_test, clf_function, kwargs):
+    """Test parallel bootstrap gives the same ensemble as serial."""
+
+    train_features, train_labels, test_features = train_test
+
+    _, class_prob, ensemble_probs, clf = bootstrap_clf(
+        clf_function, 4, train_features, train_labels, test_features,
+        seed=3, **kwargs)
+    _, class_prob_par, ensemble_probs_par, clf_par = bootstrap_clf(
+        clf_function, 4, train_features, train_labels, test_features,
+        n_workers=2, seed=3, **kwargs)
+
+    assert ensemble_probs.shape == (30, 4, 2)
+    assert np.allclose(ensemble_probs, ensemble_probs_par)
+    assert np.allclose(class_prob, class_prob_par)
+    assert np.allclose(clf_par.predict_proba(test_features), class_prob)
+
+    # members are trained on different resamples
+    assert not np.allclose(ensemble_probs[:, 0], ensemble_probs[:, 1])
+
+
+def test_forest_committee(train_test):
+    """Test groups of trees of one forest as a committee."""
+
+    train_features, train_labels, test_features = train_test
+
+    predictions, class_prob, ensemble_probs, clf = forest_committee(
+        train_features, train_labels, test_features, n_committees=4,
+        n_estimators=30, random_state=42)
+
+    assert ensemble_probs.shape == (30, 4, 2)
+    assert np.allclose(class_prob, clf.predict_proba(test_features))
+    assert np.array_equal(predictions, clf.predict(test_features))
+    assert np.allclose(ensemble_probs.sum(axis=2), 1.)
+
+    with pytest.raises(ValueError):
+        forest_committee(train_features, train_labels, test_features,
+                         n_committees=40, n_estimators=30)
+
+
+def test_predict_in_chunks(train_test):
+    """Test chunked classification gives the same results."""
+
+    train_features, train_labels, test_features = train_test
+
+    predictions, prob, clf = random_forest(
+        train_features, train_labels, test_features, n_estimators=20,
+        random_state=42)
+    predictions_chunk, prob_chunk = predict_in_chunks(
+        clf, test_features, chunk_size=7, n_threads=3)
+    assert np.array_equal(predictions_chunk, predictions)
+    assert np.allclose(prob_chunk, prob)
+
+    committee = forest_committee(train_features, train_labels,
+                                 test_features, n_committees=4,
+                                 n_estimators=30, random_state=42)
+    committee_chunk = forest_committee(train_features, train_labels,
+                                       test_features, n_committees=4,
+                                       n_estimators=30, random_state=42,
+                                       chunk_size=7, n_threads=3)
+    for result, result_chunk in zip(committee[:3], committee_chunk[:3]):
+        assert np.allclose(result_chunk, result)
+
+    bootstrap = bootstrap_clf(nbg, 4, train_features, train_labels,
+                              test_features, seed=3)
+    bootstrap_chunk = bootstrap_clf(nbg, 4, train_features, train_labels,
+                                    test_features, seed=3, chunk_size=7)
+    for result, result_chunk in zip(bootstrap[:3], bootstrap_chunk[:3]):
+        assert np.allclose(result_chunk, result)
+
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+@pytest.mark.parametrize('clf_class, kwargs',
+                         [(IncrementalKNN, {}),
+                          (CachedKernelSVC, {'random_state': 42})])
+def test_predict_in_chunks_cached(train_test, clf_class, kwargs):
+    """Test threads sharing classifiers which cache results."""
+
+    train_features, train_labels, test_features = train_test
+    test_features = np.concatenate([test_features] * 20 +
+                                   [test_features[:, ::-1]] * 20)
+
+    prob = list()
+    for n_threads in [1, 8]:
+        # cached objects made stale by new training objects
+        clf = clf_class(**kwargs)
+        clf.fit(train_features[:50], train_labels[:50])
+        clf.predict_proba(test_features[:300])
+        if clf_class is IncrementalKNN:
+            clf.partial_fit(train_features[50:], train_labels[50:])
+        else:
+            clf.fit(train_features, train_labels)
+
+        prob.append(predict_in_chunks(clf, test_features, chunk_size=7,
+                                      n_threads=n_threads)[1])
+
+    assert np.allclose(prob[1], prob[0])
+
+
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+def test_incremental_knn(train_test, weights):
+    """Test cached neighbours follow a growing training sample."""
+
+    train_features, train_labels, test_features = train_test
+
+    clf = IncrementalKNN(n_neighbors=5, weights=weights)
+    clf.fit(train_features[:40], train_labels[:40])
+    clf.predict_proba(test_features)
+
+    for start, end in [(40, 45), (45, 60)]:
+        clf.partial_fit(train_features[start:end], train_labels[start:end])
+        reference = KNeighborsClassifier(n_neighbors=5, weights=weights)
+        reference.fit(train_features[:end], train_labels[:end])
+
+        assert np.allclose(clf.predict_proba(test_features),
+                           reference.predict_proba(test_features))
+        assert np.array_equal(clf.predict(test_features[::2]),
+                              reference.predict(test_features[::2]))
+
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_cached_kernel_svc(train_test):
+    """Test cached kernels give the same SVM as a new fit."""
+
+    train_features, train_labels, test_features = train_test
+
+    clf = CachedKernelSVC(random_state=42)
+    clf.fit(train_features[:40], train_labels[:40])
+    clf.predict_proba(test_features)
+
+    # objects added and removed, then the same sample again
+    for start, end in [(0, 50), (5, 60), (5, 60)]:
+        clf.fit(train_features[start:end], train_labels[start:end])
+        reference = SVC(probability=True, random_state=42)
+        reference.fit(train_features[start:end], train_labels[start:end])
+
+        # equal up to the tolerance of the solver
+        assert np.allclose(clf.predict_proba(test_features),
+                           reference.predict_proba(test_features), atol=1.e-3)
+
+
+def _n_trees(clf):
+    """Number of trees or boosting rounds in a forest or booster."""
+    if hasattr(clf, 'estimators_'):
+        return len(clf.estimators_)
+    return clf.get_booster().num_boosted_rounds()
+
+
+@pytest.mark.filterwarnings('ignore::sklearn.exceptions.ConvergenceWarning')
+@pytest.mark.parametrize('clf_function, kwargs',
+                         [(random_forest, {'n_estimators': 20}),
+                          (gradient_boosted_trees, {'n_estimators': 20}),
+                          (gradient_boosted_trees, {}),
+                          (mlp, {'max_iter': 50})])
+def test_update_classifier(train_test, clf_function, kwargs):
+    """Test warm updates keep the size of the classifier bounded."""
+
+    train_features, train_labels, test_features = train_test
+
+    np.random.seed(42)
+    _, _, clf = clf_function(train_features[:30], train_labels[:30], None,
+                             **kwargs)
+    n_start = _n_trees(clf) if clf_function != mlp else None
+
+    # one new object per loop, trained on a window of 10 objects
+    for end in range(31, 61):
+        predictions, prob, clf = \
+            update_classifier(clf, train_features[:end], train_labels[:end],
+                              test_features, np.array([end - 1]), window=10)
+
+        assert predictions.shape == (30,)
+        assert prob.shape == (30, 2)
+        if n_start is not None:
+            assert n_start <= _n_trees(clf) <= 2 * n_start
+            assert clf.get_params()['n_estimators'] == n_start
+
+    # only training
+    predictions, prob, clf = \
+        update_classifier(clf, train_features, train_labels, None,
+                          np.array([], dtype=int))
+    assert predictions is None and prob is None
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -58,7 +58,270 @@ def test_load_bazin_features():
     
     assert (sizes1 and queryable1)
     assert (sizes2 and queryable2)
-    
-    
+
+
+def test_load_bazin_features_binary(tmp_path):
+    """Test loading Bazin features from a columnar binary file."""
+
+    from resspect.feature_store import read_features_table
+    from resspect.feature_store import write_features_table
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data_text = DataBase()
+    data_text.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+
+    fname_npy = str(tmp_path / 'Bazin_SNPCC1.npy')
+    write_features_table(read_features_table(fname), fname_npy)
+
+    data_npy = DataBase()
+    data_npy.load_bazin_features(path_to_bazin_file=fname_npy, survey='DES')
+
+    assert data_npy.features.dtype == np.float64
+    assert np.allclose(data_npy.features, data_text.features)
+    assert np.all(data_npy.metadata.values == data_text.metadata.values)
+
+
+def test_update_samples():
+    """Test moving queried objects from pool to training."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original', queryable=True)
+
+    ntrain = data.train_metadata.shape[0]
+    npool = data.pool_metadata.shape[0]
+    query_indx = [3, 0, 7]
+    query_ids = data.pool_metadata['id'].values[query_indx]
+    query_features = data.pool_features[query_indx]
+
+    data.update_samples(query_indx, epoch=5, queryable=True)
+
+    # queried objects go to the end of training, in query order
+    assert data.train_metadata.shape[0] == ntrain + 3
+    assert data.pool_metadata.shape[0] == npool - 3
+    assert np.all(data.train_metadata['id'].values[-3:] == query_ids)
+    assert np.allclose(data.train_features[-3:], query_features)
+    assert data.train_labels.shape[0] == ntrain + 3
+    assert not np.any(np.isin(query_ids, data.test_metadata['id'].values))
+    assert [line[1] for line in data.queried_sample] == list(query_ids)
+    assert [line[0] for line in data.queried_sample] == [5, 5, 5]
+
+    # samples can still be replaced directly
+    data.pool_features = data.pool_features[1:]
+    data.pool_metadata = data.pool_metadata[1:]
+    data.pool_labels = data.pool_labels[1:]
+    query_id = data.pool_metadata['id'].values[0]
+    data.update_samples([0], queryable=True)
+
+    assert data.train_metadata['id'].values[-1] == query_id
+    assert data.pool_metadata.shape[0] == npool - 5
+
+
+def test_locate_ids():
+    """Test finding and removing objects by id."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+
+    pool_ids = data.pool_metadata['id'].values
+    train_ids = data.train_metadata['id'].values
+    positions = data.locate_ids('pool', [pool_ids[4], train_ids[0], pool_ids[0]])
+    assert list(positions) == [4, -1, 0]
+
+    # index follows changes in the samples
+    data.update_samples([4])
+    assert data.locate_ids('pool', [pool_ids[4]])[0] == -1
+    assert data.locate_ids('train', [pool_ids[4]])[0] == len(train_ids)
+
+    data.remove_ids(pool_ids[:2])
+    assert data.pool_metadata.shape[0] == len(pool_ids) - 3
+    assert np.all(data.locate_ids('test', pool_ids[:2]) == -1)
+    assert np.all(data.locate_ids('validation', pool_ids[:2]) == -1)
+
+
+def test_classify_warm_start():
+    """Test updating the classifier with newly queried objects."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+
+    data.classify(method='NB', warm_start=True)
+    classifier = data.classifier
+    data.update_samples([0, 1, 2])
+    data.classify(method='NB', warm_start=True)
+
+    # Naive Bayes is updated in place, with the statistics of a new fit
+    assert data.classifier is classifier
+    data.classify(method='NB')
+    assert data.classifier is not classifier
+    assert np.allclose(classifier.theta_, data.classifier.theta_)
+    assert np.allclose(classifier.var_ - classifier.epsilon_,
+                       data.classifier.var_ - data.classifier.epsilon_)
+
+    # features of a known object replaced, as in time domain loops
+    data.classify(method='NB', warm_start=True)
+    classifier = data.classifier
+    order = np.roll(np.arange(data.train_labels.shape[0]), 1)
+    train_features = data.train_features[order]
+    train_features[0] = train_features[0] + 1.
+    data.train_metadata = data.train_metadata.iloc[order]
+    data.train_features = train_features
+    data.train_labels = data.train_labels[order]
+    data.classify(method='NB', warm_start=True)
+    assert data.classifier is not classifier
+
+    # only reordered, nothing to update
+    classifier = data.classifier
+    data.train_metadata = data.train_metadata.iloc[order]
+    data.train_features = data.train_features[order]
+    data.train_labels = data.train_labels[order]
+    data.classify(method='NB', warm_start=True)
+    assert data.classifier is classifier
+
+
+@pytest.mark.filterwarnings('ignore::sklearn.exceptions.ConvergenceWarning')
+@pytest.mark.parametrize('method, kwargs',
+                         [('RandomForest', {'n_estimators': 20}),
+                          ('GradientBoostedTrees', {'n_estimators': 20}),
+                          ('MLP', {'max_iter': 50})])
+def test_classify_warm_start_loops(method, kwargs):
+    """Test warm updates over several loops keep the classifier bounded."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+
+    np.random.seed(42)
+    data.classify(method=method, warm_start=True, **kwargs)
+    classifier = data.classifier
+
+    for loop in range(15):
+        data.update_samples([0])
+        data.classify(method=method, warm_start=True, n_replace=5,
+                      window=10, **kwargs)
+        assert data.classprob.shape == (data.pool_features.shape[0], 2)
+
+        if method == 'RandomForest':
+            # updated in place, the 5 oldest trees replaced
+            assert data.classifier is classifier
+            assert len(data.classifier.estimators_) == 20
+        elif method == 'GradientBoostedTrees':
+            # 5 rounds added until more than 40, then trained again
+            n_rounds = data.classifier.get_booster().num_boosted_rounds()
+            assert n_rounds == 20 + 5 * ((loop + 1) % 5)
+        else:
+            assert data.classifier is classifier
+            assert data.classifier.coefs_[0].shape == \
+                (data.train_features.shape[1], 100)
+
+
+def test_classify_reuses_pool_predictions():
+    """Test validation predictions are reused when it equals the pool."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+
+    data.classify(method='NB')
+    assert data.validation_prob is data.classprob
+
+    # validation differs from the pool after removing some objects
+    validation_ids = data.validation_metadata['id'].values
+    data.remove_ids(validation_ids[:5], samples=('validation',))
+    data.classify(method='NB')
+    assert data.validation_prob.shape[0] == data.classprob.shape[0] - 5
+    assert np.allclose(data.validation_prob, data.classprob[5:])
+
+
+def test_classify_in_chunks():
+    """Test classifying the pool in chunks gives the same predictions."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+    validation_ids = data.validation_metadata['id'].values
+    data.remove_ids(validation_ids[:5], samples=('validation',))
+
+    data.classify(method='RandomForest', random_state=42)
+    classprob = data.classprob
+    validation_prob = data.validation_prob
+
+    data.classify(method='RandomForest', random_state=42, chunk_size=50,
+                  n_threads=2)
+    assert np.allclose(data.classprob, classprob)
+    assert np.allclose(data.validation_prob, validation_prob)
+
+    data.classify_bootstrap(method='NB', n_ensembles=3, seed=3)
+    ensemble_probs = data.ensemble_probs
+    data.classify_bootstrap(method='NB', n_ensembles=3, seed=3,
+                            chunk_size=50)
+    assert np.allclose(data.ensemble_probs, ensemble_probs)
+
+
+def test_classify_queryable_only():
+    """Test classifying only queryable objects gives the same queries."""
+
+    fname = testing.download_data("tests/Bazin_SNPCC1.dat")
+    data = DataBase()
+    data.load_bazin_features(path_to_bazin_file=fname, survey='DES')
+    data.build_samples(initial_training='original')
+    pool_ids = data.pool_metadata['id'].values
+    queryable_rows = np.arange(0, pool_ids.shape[0], 3)
+    data.queryable_ids = pool_ids[queryable_rows]
+
+    # validation classified from the pool, then separately
+    for remove in [False, True]:
+        if remove:
+            validation_ids = data.validation_metadata['id'].values
+            data.remove_ids(validation_ids[:5], samples=('validation',))
+
+        data.classify(method='RandomForest', random_state=42)
+        classprob = data.classprob
+        validation_prob = data.validation_prob
+        query_indx = data.make_query(batch=3)
+        random_indx = data.make_query(strategy='RandomSampling', batch=3,
+                                      queryable=True, query_thre=0.5)
+
+        data.classify(method='RandomForest', random_state=42,
+                      queryable_only=True)
+        assert np.array_equal(data.classprob_rows, queryable_rows)
+        assert np.allclose(data.classprob, classprob[queryable_rows])
+        assert np.allclose(data.validation_prob, validation_prob)
+        assert data.make_query(batch=3) == query_indx
+
+        # ranks within the whole pool are only known for random queries
+        assert data.make_query(strategy='RandomSampling', batch=3,
+                               queryable=True, query_thre=0.5) == random_indx
+        with pytest.raises(ValueError):
+            data.make_query(batch=3, query_thre=0.5)
+
+    data.classify_bootstrap(method='NB', n_ensembles=3, seed=3,
+                            queryable_only=True)
+    assert data.ensemble_probs.shape[0] == queryable_rows.shape[0]
+    assert data.make_query(strategy='QBDEntropy', batch=3)[0] in \
+        queryable_rows
+
+    # no queryable objects, only the validation sample is classified
+    data.queryable_ids = np.array([])
+    for method in ['RandomForest', 'NB']:
+        data.classify(method=method, queryable_only=True)
+        assert data.classprob.shape == (0, 2)
+        assert data.predicted_class.shape == (0,)
+        assert np.allclose(data.validation_prob.sum(axis=1), 1.)
+
+        data.classify_bootstrap(method=method, n_ensembles=3,
+                                queryable_only=True)
+        assert data.classprob.shape == (0, 2)
+        assert data.ensemble_probs.shape == (0, 3, 2)
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,59 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resspect.feature_store import FeaturesWriter
+from resspect.feature_store import read_features_table
+from resspect.feature_store import write_features_table
+
+
+def test_npy_round_trip_dtypes(tmp_path):
+    """Test '.npy' files give the same column types as text files."""
+
+    header = ['id', 'redshift', 'type', 'code', 'orig_sample',
+              'queryable', 'gA']
+    rows = [[1, 0.1, 'Ia', 0, 'train', True, 1.5],
+            [2, 0.2, 'II', 33, 'test', False, 2.5],
+            [3, 0.3, 'Ibc', 21, 'test', True, 3.5]]
+
+    tables = {}
+    for extension in ['.dat', '.npy']:
+        file_path = str(tmp_path / ('features' + extension))
+        with FeaturesWriter(file_path, header) as writer:
+            for each_row in rows:
+                writer.write_row(each_row)
+        tables[extension] = read_features_table(file_path)
+
+    # columns of python objects, as built from an object array
+    data = pd.DataFrame(np.array(rows, dtype=object), columns=header)
+    file_path = str(tmp_path / 'objects.npy')
+    write_features_table(data, file_path)
+    tables['objects'] = read_features_table(file_path)
+
+    text = tables['.dat']
+    assert text['queryable'].dtype == bool
+    for name in ['.npy', 'objects']:
+        assert list(tables[name].dtypes) == list(text.dtypes)
+        for column in header:
+            assert list(tables[name][column]) == list(text[column])
+
+
+if __name__ == '__main__':
+    pytest.main()
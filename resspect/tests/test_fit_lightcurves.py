@@ -73,6 +73,63 @@ def test_load_plasticc_lc():
     assert np.all(header == lc.photometry.keys())
     
 
+def test_build_snid_index():
+    """ Test SNID index slices match the per-object boolean masks. """
+
+    from resspect.lightcurves_utils import build_snid_index
+    from resspect.lightcurves_utils import get_photometry_with_snid_index
+    from resspect.lightcurves_utils import read_plasticc_full_photometry_data
+
+    path_to_lc = testing.download_data("tests/plasticc_lightcurves.csv.gz")
+    full_photometry = read_plasticc_full_photometry_data(path_to_lc)
+    # shuffle rows so objects are no longer contiguous
+    shuffled = full_photometry.sample(frac=1, random_state=42)
+
+    sorted_photometry, snid_index, id_name = build_snid_index(
+        shuffled, ['object_id', 'SNID'])
+
+    assert id_name == 'object_id'
+    assert set(snid_index.keys()) == set(full_photometry['object_id'])
+    for snid in snid_index.keys():
+        expected = shuffled[shuffled['object_id'] == snid]
+        result = get_photometry_with_snid_index(
+            sorted_photometry, snid_index, snid)
+        assert np.all(result.values == expected.values)
+
+    assert get_photometry_with_snid_index(
+        sorted_photometry, snid_index, -1).empty
+
+
+def test_photometry_store():
+    """ Test photometry files are parsed once and evicted by size. """
+
+    from resspect.lightcurves_utils import PhotometryStore
+
+    path_plasticc = testing.download_data(
+        "tests/plasticc_lightcurves.csv.gz")
+    path_resspect = testing.download_data("tests/RESSPECT_PHOTO.csv.gz")
+
+    store = PhotometryStore()
+    first = store.get(path_plasticc, 'PLAsTiCC')
+    second = store.get(path_plasticc, 'PLAsTiCC')
+    assert first[0] is second[0]
+    assert store.n_reads == 1
+
+    assert store.find_file(229855, [path_resspect, path_plasticc],
+                           dataset_name='PLAsTiCC') == path_plasticc
+    assert store.find_file(-1, [path_plasticc]) is None
+    # object already in the lookup table, no other file is parsed
+    assert store.n_reads == 1
+
+    # a tiny budget keeps only the most recently used table
+    store = PhotometryStore(max_bytes=1)
+    store.get(path_plasticc, 'PLAsTiCC')
+    store.get(path_resspect, 'RESSPECT')
+    store.get(path_plasticc, 'PLAsTiCC')
+    assert store.n_reads == 3
+    assert len(store._tables) == 1
+
+
 def test_conv_flux_mag(input_lc):
     """ Test flux to magnitude conversion. """
     
@@ -156,6 +213,182 @@ def test_fit_bazin_all(input_lc):
     l2 = len(input_lc.filters) * 5
     
     assert l1 == l2
+
+
+def test_fit_bazin_all_batch(input_lc):
+    """ Test vectorized Bazin fit for many light curves. """
+
+    from resspect.fit_lightcurves import fit_bazin_all_batch
+
+    empty_lc = LightCurve()
+    empty_lc.filters = input_lc.filters
+
+    fit_bazin_all_batch([input_lc, empty_lc])
+
+    assert len(input_lc.bazin_features) == len(input_lc.filters) * 5
+    assert 'None' not in input_lc.bazin_features
+    assert empty_lc.bazin_features == ['None'] * len(input_lc.filters) * 5
+
+
+def test_fit_snpcc_bazin_n_workers(tmp_path):
+    """ Test parallel fit gives the same output as the serial one. """
+
+    import shutil
+    from resspect.fit_lightcurves import fit_snpcc_bazin
+
+    path_to_lc = testing.download_data("tests/DES_SN848233.DAT")
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for i in range(3):
+        shutil.copy(path_to_lc, str(data_dir / ('DES_SN' + str(i) + '.DAT')))
+
+    serial_file = str(tmp_path / 'serial.dat')
+    parallel_file = str(tmp_path / 'parallel.dat')
+    fit_snpcc_bazin(str(data_dir), serial_file)
+    fit_snpcc_bazin(str(data_dir), parallel_file, n_workers=2)
+
+    with open(serial_file) as f1, open(parallel_file) as f2:
+        serial_lines = f1.readlines()
+        parallel_lines = f2.readlines()
+
+    assert len(serial_lines) == 4
+    assert serial_lines == parallel_lines
+
+    # one object per shard
+    fit_snpcc_bazin(str(data_dir), parallel_file, n_workers=2, batch_size=1)
+    with open(parallel_file) as f2:
+        assert f2.readlines() == serial_lines
+
+
+def _write_photometry_header(tmp_path, dataset_name, photo_name):
+    """ Write a header file for all objects in a test photometry file. """
+
+    import pandas as pd
+    from resspect.fit_lightcurves import fit_plasticc_bazin
+    from resspect.fit_lightcurves import fit_resspect_bazin
+
+    path_photo_file = testing.download_data("tests/" + photo_name)
+    photometry = pd.read_csv(path_photo_file)
+    snids = photometry.iloc[:, 0].unique()
+
+    # objects out of the file order
+    snids = snids[::-1]
+    path_header_file = str(tmp_path / 'header.csv')
+    if dataset_name == 'RESSPECT':
+        fit_function = fit_resspect_bazin
+        header = pd.DataFrame({'SNID': snids, 'redshift': 0.5,
+                               'type': 'Ia', 'code': 0})
+    else:
+        fit_function = fit_plasticc_bazin
+        header = pd.DataFrame({'object_id': snids, 'true_z': 0.5,
+                               'true_target': 90})
+    header.to_csv(path_header_file, index=False)
+
+    return fit_function, path_photo_file, path_header_file
+
+
+@pytest.mark.parametrize('dataset_name, photo_name',
+                         [('RESSPECT', 'RESSPECT_PHOTO.csv.gz'),
+                          ('PLAsTiCC', 'plasticc_lightcurves.csv.gz')])
+def test_fit_bazin_n_workers_photometry_file(tmp_path, dataset_name,
+                                             photo_name):
+    """ Test parallel fit from one photometry file matches the serial one. """
+
+    fit_function, path_photo_file, path_header_file = \
+        _write_photometry_header(tmp_path, dataset_name, photo_name)
+
+    serial_file = str(tmp_path / 'serial.dat')
+    fit_function(path_photo_file, path_header_file, serial_file,
+                 sample='train')
+    with open(serial_file) as f1:
+        serial_lines = f1.readlines()
+    assert len(serial_lines) > 2
+
+    parallel_file = str(tmp_path / 'parallel.dat')
+    for batch_size in [1000, 1]:
+        fit_function(path_photo_file, path_header_file, parallel_file,
+                     sample='train', n_workers=2, batch_size=batch_size)
+        with open(parallel_file) as f2:
+            assert f2.readlines() == serial_lines
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('dataset_name, photo_name',
+                         [('RESSPECT', 'RESSPECT_PHOTO.csv.gz'),
+                          ('PLAsTiCC', 'plasticc_lightcurves.csv.gz')])
+def test_fit_bazin_vectorized_photometry_file(tmp_path, dataset_name,
+                                              photo_name):
+    """ Test vectorized fit gives the same light curves as the scalar one. """
+
+    from resspect.bazin import bazin
+    from resspect.feature_store import read_features_table
+
+    fit_function, path_photo_file, path_header_file = \
+        _write_photometry_header(tmp_path, dataset_name, photo_name)
+
+    features = {}
+    for vectorized in [False, True]:
+        features_file = str(tmp_path / ('features' + str(vectorized) +
+                                        '.dat'))
+        fit_function(path_photo_file, path_header_file, features_file,
+                     sample='train', vectorized=vectorized, batch_size=3)
+        features[vectorized] = read_features_table(features_file)
+
+    scalar, batch = features[False], features[True]
+    assert scalar.shape[0] > 1
+    assert list(scalar.keys()) == list(batch.keys())
+    assert np.array_equal(scalar.values[:, :5], batch.values[:, :5])
+
+    # compare fitted fluxes, parameters along flat directions may differ
+    for i, snid in enumerate(scalar['id'].values):
+        lc = LightCurve()
+        if dataset_name == 'RESSPECT':
+            lc.load_resspect_lc(path_photo_file, snid)
+        else:
+            lc.load_plasticc_lc(path_photo_file, snid)
+
+        for j, band in enumerate(lc.filters):
+            columns = slice(5 + 5 * j, 10 + 5 * j)
+            scalar_params = scalar.values[i, columns].astype(float)
+            batch_params = batch.values[i, columns].astype(float)
+            assert np.array_equal(np.isnan(scalar_params),
+                                  np.isnan(batch_params))
+            if np.isnan(scalar_params).any():
+                continue
+
+            band_flag = lc.photometry['band'].values == band
+            time = lc.photometry['mjd'].values[band_flag]
+            flux = lc.photometry['flux'].values[band_flag]
+            assert np.allclose(bazin(time - time[0], *batch_params),
+                               bazin(time - time[0], *scalar_params),
+                               rtol=1.e-2, atol=1.e-2 * np.abs(flux).max())
+
+
+def test_fit_snpcc_bazin_binary(tmp_path):
+    """ Test binary output holds the same values with typed columns. """
+
+    import shutil
+    from resspect.feature_store import read_features_table
+    from resspect.fit_lightcurves import fit_snpcc_bazin
+
+    path_to_lc = testing.download_data("tests/DES_SN848233.DAT")
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for i in range(3):
+        shutil.copy(path_to_lc, str(data_dir / ('DES_SN' + str(i) + '.DAT')))
+
+    text_file = str(tmp_path / 'features.dat')
+    npy_file = str(tmp_path / 'features.npy')
+    fit_snpcc_bazin(str(data_dir), text_file)
+    fit_snpcc_bazin(str(data_dir), npy_file)
+    text_table = read_features_table(text_file)
+    npy_table = read_features_table(npy_file)
+
+    assert npy_table.shape == (3, text_table.shape[1])
+    assert list(npy_table.keys()) == list(text_table.keys())
+    assert npy_table['gA'].dtype == np.float64
+    assert np.allclose(npy_table['gA'].values, text_table['gA'].values)
+
     
     
 def test_evaluate_bazin(input_lc):
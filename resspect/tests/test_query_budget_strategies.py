@@ -0,0 +1,95 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resspect.query_budget_strategies import batch_queries_mi_entropy
+from resspect.query_budget_strategies import batch_queries_uncertainty
+
+
+@pytest.fixture
+def budget_pool():
+    prob_Ia = np.array([0.5, 0.45, 0.6, 0.9, 0.52, 0.3])
+    class_probs = np.array([1 - prob_Ia, prob_Ia]).T
+    pool_metadata = pd.DataFrame({
+        'id': [10, 11, 12, 13, 14, 15],
+        'cost_4m': [600., 100., 9999., 100., 500., 100.],
+        'cost_8m': [9999., 300., 200., 100., 9999., 9999.]})
+    return class_probs, pool_metadata
+
+
+def test_batch_queries_uncertainty_greedy(budget_pool):
+    """Test greedy selection of objects within budget."""
+
+    class_probs, pool_metadata = budget_pool
+    query_indx = batch_queries_uncertainty(
+        class_probs, 'id', queryable_ids=np.array([10, 11, 12, 13, 14]),
+        pool_metadata=pool_metadata, budgets=(650., 250.),
+        criteria='uncertainty')
+
+    # 4m: object 0 fits, nothing else fits afterwards
+    # 8m: object 1 costs more than the budget, 2 fits, 3 does not
+    assert query_indx == [0, 2]
+
+
+def test_batch_queries_uncertainty_exact(budget_pool):
+    """Test exact selection of objects within budget."""
+
+    class_probs, pool_metadata = budget_pool
+    query_indx = batch_queries_uncertainty(
+        class_probs, 'id', queryable_ids=np.array([10, 11, 12, 13, 14]),
+        pool_metadata=pool_metadata, budgets=(650., 250.),
+        criteria='uncertainty', method='exact')
+
+    # 4m: 4 + 1 are worth more than 0 + 3
+    assert sorted(query_indx[:2]) == [1, 4]
+    assert query_indx[2:] == [2]
+
+
+def test_batch_queries_mi_entropy_lazy():
+    """Test lazy greedy gives the same acquisitions as full rescoring."""
+
+    rng = np.random.default_rng(42)
+    nobjects = 60
+    probs_B_K_C = rng.dirichlet([0.5, 0.5], size=(nobjects, 5))
+    pool_metadata = pd.DataFrame({
+        'id': np.arange(nobjects),
+        'cost_4m': np.where(rng.random(nobjects) < 0.3, 9999.,
+                            rng.uniform(100, 1000, nobjects)),
+        'cost_8m': rng.uniform(50, 800, nobjects)})
+
+    for criteria in ['MI', 'entropy']:
+        query_indx = batch_queries_mi_entropy(
+            probs_B_K_C.copy(), 'id', np.arange(nobjects), pool_metadata,
+            budgets=(2000., 1500.), criteria=criteria)
+        query_indx_lazy = batch_queries_mi_entropy(
+            probs_B_K_C.copy(), 'id', np.arange(nobjects), pool_metadata,
+            budgets=(2000., 1500.), criteria=criteria, lazy=True)
+
+        assert len(query_indx) > 1
+        assert query_indx_lazy == query_indx
+
+    with pytest.raises(ValueError):
+        batch_queries_mi_entropy(
+            probs_B_K_C.copy(), 'id', np.arange(nobjects), pool_metadata,
+            budgets=(2000., 1500.), lazy=True, adaptive=True)
+
+
+if __name__ == '__main__':
+    pytest.main()
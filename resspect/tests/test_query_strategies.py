@@ -0,0 +1,54 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from resspect import select_queries
+from resspect import uncertainty_sampling
+
+
+def test_select_queries():
+    """Test choosing queryable objects with lowest scores."""
+
+    scores = np.array([0.5, 0.1, 0.3, 0.2, 0.4, 0.0])
+    queryable_flag = np.array([True, True, True, False, True, False])
+
+    query_indx = select_queries(scores, queryable_flag, batch=3)
+    assert query_indx == [1, 2, 4]
+
+    # best queryable object is ranked second in the whole sample
+    assert select_queries(scores, queryable_flag, query_thre=0.4) == [1]
+    assert select_queries(scores, queryable_flag, query_thre=0.3) == []
+    assert select_queries(scores, np.zeros(6, dtype=bool)) == []
+
+
+def test_uncertainty_sampling():
+    """Test uncertainty sampling with queryable constraints."""
+
+    prob_Ia = np.array([0.9, 0.45, 0.52, 0.1, 0.7])
+    class_prob = np.array([1 - prob_Ia, prob_Ia]).T
+    test_ids = np.array([10, 11, 12, 13, 14])
+
+    query_indx = uncertainty_sampling(class_prob, test_ids,
+                                      queryable_ids=np.array([10, 11, 14]),
+                                      batch=2)
+    assert query_indx == [1, 4]
+
+
+if __name__ == '__main__':
+    pytest.main()
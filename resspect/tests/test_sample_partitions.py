@@ -0,0 +1,62 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resspect.sample_partitions import SamplePartitions
+
+
+def test_sample_partitions_cache():
+    """Test changes only drop cached results of the samples involved."""
+
+    features = np.arange(20.).reshape(10, 2)
+    metadata = pd.DataFrame({'id': np.arange(10), 'type': ['Ia'] * 10})
+    labels = np.zeros(10, dtype=int)
+    rows = np.arange(10)
+    partitions = SamplePartitions(features, metadata, labels,
+                                  members={'train': rows < 3,
+                                           'pool': (rows >= 3) & (rows < 8),
+                                           'validation': rows >= 8})
+
+    pool_features = partitions.get('pool', 'features')
+    validation_features = partitions.get('validation', 'features')
+    validation_metadata = partitions.get('validation', 'metadata')
+
+    partitions.move([3], to='train', remove_from=('pool',))
+    assert partitions.get('validation', 'features') is validation_features
+    assert np.array_equal(partitions.get('pool', 'features'),
+                          pool_features[1:])
+    assert np.array_equal(partitions.get('train', 'features'),
+                          features[[0, 1, 2, 3]])
+
+    # rows not in the sample, nothing changes
+    partitions.remove('validation', [0, 1])
+    assert partitions.get('validation', 'features') is validation_features
+
+    partitions.set_metadata(3, [3, 'II'])
+    assert partitions.get('validation', 'metadata') is validation_metadata
+    assert partitions.get('train', 'metadata')['type'].values[-1] == 'II'
+
+    partitions.remove('validation', [8])
+    assert np.array_equal(partitions.get('validation', 'features'),
+                          features[[9]])
+
+
+if __name__ == '__main__':
+    pytest.main()
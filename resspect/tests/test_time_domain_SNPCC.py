@@ -0,0 +1,106 @@
+# Copyright 2020 resspect software
+# Author: The RESSPECT team
+#
+# created on 18 October 2026
+#
+# Licensed GNU General Public License v3.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.gnu.org/licenses/gpl-3.0.en.html
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import os
+import pytest
+
+from resspect import testing
+from resspect.time_domain_SNPCC import SNPCCPhotometry
+
+
+def test_build_all_epochs(tmp_path):
+    """ Test single pass builder matches the day by day one. """
+
+    path_to_lc = testing.download_data("tests/DES_SN848233.DAT")
+    raw_data_dir = os.path.dirname(path_to_lc) + '/'
+    days = [60, 61, 62, 80, 120]
+
+    one_epoch_dir = str(tmp_path / 'one_epoch') + '/'
+    all_epochs_dir = str(tmp_path / 'all_epochs') + '/'
+
+    data = SNPCCPhotometry()
+    for day in days:
+        data.create_daily_file(output_dir=one_epoch_dir, day=day)
+        data.build_one_epoch(raw_data_dir=raw_data_dir, day_of_survey=day,
+                             time_domain_dir=one_epoch_dir,
+                             queryable_criteria=2)
+
+    data = SNPCCPhotometry()
+    data.build_all_epochs(raw_data_dir=raw_data_dir, days=days,
+                          time_domain_dir=all_epochs_dir,
+                          queryable_criteria=2)
+
+    n_lines = 0
+    for day in days:
+        with open(one_epoch_dir + 'day_' + str(day) + '.dat') as f1, \
+             open(all_epochs_dir + 'day_' + str(day) + '.dat') as f2:
+            lines = f1.readlines()
+            assert lines == f2.readlines()
+            n_lines += len(lines) - 1
+
+    assert n_lines > 0
+
+
+def test_build_all_epochs_warm_start(tmp_path):
+    """ Test warm started fits fill the parameter cache. """
+
+    path_to_lc = testing.download_data("tests/DES_SN848233.DAT")
+    raw_data_dir = os.path.dirname(path_to_lc) + '/'
+    output_dir = str(tmp_path) + '/'
+
+    data = SNPCCPhotometry()
+    data.build_all_epochs(raw_data_dir=raw_data_dir, days=[60, 80, 120],
+                          time_domain_dir=output_dir, warm_start=True)
+
+    assert len(data.bazin_cache) == 1
+    features = list(data.bazin_cache.values())[0]
+    assert len(features) == 20
+
+    with open(output_dir + 'day_120.dat') as f:
+        lines = f.readlines()
+    assert len(lines) == 2
+    assert np.allclose([float(x) for x in lines[1].split()[7:]], features)
+
+
+def test_daily_features_writer(tmp_path):
+    """ Test buffered lines are flushed by threshold and on close. """
+
+    from resspect.feature_store import DailyFeaturesWriter
+
+    fnames = [str(tmp_path / ('day_' + str(day) + '.dat'))
+              for day in range(3)]
+
+    with DailyFeaturesWriter(max_lines=4) as writer:
+        for i in range(5):
+            for fname in fnames:
+                writer.write(fname, str(i) + '\n')
+            if i == 0:
+                # below threshold, nothing written yet
+                assert not os.path.isfile(fnames[0])
+        assert writer.n_lines < 4
+
+    for fname in fnames:
+        with open(fname) as f:
+            assert f.read() == '0\n1\n2\n3\n4\n'
+
+    with pytest.raises(ValueError):
+        writer.write(fnames[0], 'closed\n')
+
+
+if __name__ == '__main__':
+    pytest.main()
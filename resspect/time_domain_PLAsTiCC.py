@@ -17,11 +17,12 @@
 
 import os
 
-from copy import deepcopy
 import numpy as np
 import pandas as pd
 
 from resspect import LightCurve
+from resspect.feature_store import DailyFeaturesWriter
+from resspect.lightcurves_utils import photometry_store
 
 
 class PLAsTiCCPhotometry(object):
@@ -29,6 +30,9 @@ class PLAsTiCCPhotometry(object):
 
     Attributes
     ----------
+    bazin_cache: dict
+        Keywords are object ids, values are the last Bazin features
+        fitted for each object. Only used with "warm_start == True".
     bazin_header: str
         Header to be added to features files for each day.
     class_code: dict
@@ -68,6 +72,7 @@ class PLAsTiCCPhotometry(object):
              95: 'SLSN', 15:'TDE', 64:'KN', 88:'AGN', 92:'RRL', 65:'M-dwarf',
              16:'EB',53:'Mira', 6:'MicroL', 991:'MicroLB', 992:'ILOT', 
              993:'CART', 994:'PISN',995:'MLString'}
+        self.bazin_cache = {}
         self.fdic = {}
         self.fdic['test'] = ['plasticc_test_lightcurves_' + str(x).zfill(2) + '.csv.gz' 
                               for x in range(1, 12)]
@@ -197,7 +202,7 @@ class PLAsTiCCPhotometry(object):
 
     def write_bazin_to_file(self, lc: LightCurve, 
                             features_file: str, tel_names=['4m', '8m'], 
-                            get_cost=False):
+                            get_cost=False, writer=None):
         """Write Bazin parameters and metadata to file.
 
         Use output filename defined in the features_file attribute.
@@ -217,6 +222,9 @@ class PLAsTiCCPhotometry(object):
         get_cost: bool (optional)
             If True, calculate cost of taking a spectra in the last 
             observed photometric point. Default is False.
+        writer: DailyFeaturesWriter or None (optional)
+            If given, buffer the line in this writer instead of
+            appending it to features_file immediately. Default is None.
         
         Returns
         -------
@@ -240,8 +248,11 @@ class PLAsTiCCPhotometry(object):
         line = line + '\n'
                                                                
         # save features to file
-        with open(features_file, 'a') as param_file:
-            param_file.write(line)
+        if writer is not None:
+            writer.write(features_file, line)
+        else:
+            with open(features_file, 'a') as param_file:
+                param_file.write(line)
 
         return line
             
@@ -249,7 +260,8 @@ class PLAsTiCCPhotometry(object):
                    output_dir: str, vol=None, day=None, screen=False,
                    queryable_criteria=1, days_since_last_obs=2,
                    get_cost=False, tel_sizes=[4, 8], tel_names=['4m', '8m'],
-                   feature_method='Bazin', spec_SNR=10, **kwargs):
+                   feature_method='Bazin', spec_SNR=10, warm_start=False,
+                   writer=None, **kwargs):
         """Fit one light curve throughout the entire survey.
 
         Save results to appropriate file, considering 1 day survey 
@@ -301,6 +313,13 @@ class PLAsTiCCPhotometry(object):
             Only possibility is 'Bazin'.
         spec_SNR: float (optional)
             SNR required for spectroscopic follow-up. Default is 10.
+        warm_start: bool (optional)
+            If True, start each Bazin fit from the parameters previously
+            fitted for the same object (see bazin_cache). Default is False.
+        writer: DailyFeaturesWriter or None (optional)
+            Writer shared among objects, which is not closed here.
+            If None, lines for this object are buffered and written
+            once at the end. Default is None.
         kwargs: extra parameters
             Any input required by ExpTimeCalc.findexptime function.
         """
@@ -312,42 +331,28 @@ class PLAsTiCCPhotometry(object):
                                  'header.\n Change attribute ' + \
                                  '"bazin_header" to continue!')
 
-        # store number of points per day
-        npoints = {}
-        npoints[0] = 0
-
         # create light curve instance
         orig_lc = LightCurve()          
 
         if vol ==  None:
-            vol = 0
-            
-            # search within test light curve files
-            while orig_lc.photometry.shape[0] == 0 and vol < 11:
-                vol = vol + 1
+            # search within test light curve files, each file is
+            # parsed only once per run through the photometry store
+            test_files = [raw_data_dir + fname for fname in self.fdic['test']]
+            photo_file = photometry_store.find_file(snid, test_files)
+            if photo_file is not None:
                 if screen:
-                    print('vol: ', vol)
-                    
-                orig_lc.load_plasticc_lc(raw_data_dir + self.fdic['test'][vol - 1], snid)
+                    print('vol: ', test_files.index(photo_file) + 1)
+                orig_lc.load_plasticc_lc(photo_file, snid)
 
         elif isinstance(vol, int):
             # load light curve
-            orig_lc.load_plasticc_lc(raw_data_dir + self.fdic[vol - 1], snid)
+            orig_lc.load_plasticc_lc(raw_data_dir + self.fdic['test'][vol - 1],
+                                     snid)
             
         # define days in which this light curve exists
         min_mjd = min(orig_lc.photometry['mjd'].values)
         max_mjd = max(orig_lc.photometry['mjd'].values)
 
-        # get number of points in all days of the survey for this light curve
-        for days in range(1, self.max_epoch - self.min_epoch):
-
-            # see which epochs are observed until this day
-            now = days + self.min_epoch
-            photo_flag_now = orig_lc.photometry['mjd'].values <= now
-
-            # number of points today
-            npoints[days] = sum(photo_flag_now)
-
         if day == None:
             # for every day of survey
             fit_days = range(int(min_mjd - self.min_epoch), 
@@ -359,30 +364,45 @@ class PLAsTiCCPhotometry(object):
             
         # create instance to store Bazin fit parameters    
         line = False
+
+        # metadata for this object
+        mask = self.metadata['object_id'].values == snid
+
+        # daily files are only touched once per flush
+        day_writer = writer
+        if writer is None:
+            day_writer = DailyFeaturesWriter()
+
+        # light curve is loaded once and fitted again only on days
+        # when a new point arrives
+        lc = orig_lc
+        full_photometry = orig_lc.photometry
+        mjd = full_photometry['mjd'].values
+        npoints_fit = 0
             
         for day_of_survey in fit_days:
 
-            lc = deepcopy(orig_lc)
-
             # see which epochs are observed until this day
             today = day_of_survey + self.min_epoch
-            photo_flag = lc.photometry['mjd'].values <= today
+            photo_flag = mjd <= today
 
             # number of points today
-            npoints[day_of_survey] = sum(photo_flag)                                 
+            npoints = sum(photo_flag)
 
             # check if any point survived, other checks are made
             # inside lc object
-            if npoints[day_of_survey] > 4:
+            if npoints > 4:
                 
                 # only the allowed photometry
-                lc.photometry = lc.photometry[photo_flag] 
+                lc.photometry = full_photometry[photo_flag] 
             
                 # perform feature extraction
-                if feature_method == 'Bazin':
-                    lc.fit_bazin_all()
-                else:
+                if feature_method != 'Bazin':
                     raise ValueError('Only Bazin features are implemented!')
+                if npoints != npoints_fit:
+                    lc.fit_bazin_warm(
+                        self.bazin_cache if warm_start else None)
+                    npoints_fit = npoints
                     
                 # only save to file if all filters were fitted
                 if len(lc.bazin_features) > 0 and \
@@ -396,7 +416,6 @@ class PLAsTiCCPhotometry(object):
                                        filter_lim=self.rmag_lim, 
                                        criteria=queryable_criteria,
                                        days_since_last_obs=days_since_last_obs)
-                    
 
                     if get_cost:
                         for k in range(len(tel_names)):
@@ -414,9 +433,6 @@ class PLAsTiCCPhotometry(object):
                             
                         lc.queryable = bool(sum(query_flags))
 
-                    # mask only metadata for this object
-                    mask = self.metadata['object_id'].values == snid
-                    
                     # set redshift
                     lc.redshift = self.metadata['true_z'].values[mask][0]
 
@@ -437,7 +453,11 @@ class PLAsTiCCPhotometry(object):
                     # write to file
                     line = self.write_bazin_to_file(lc, features_file, 
                                                     tel_names=tel_names,
-                                                    get_cost=get_cost)
+                                                    get_cost=get_cost,
+                                                    writer=day_writer)
 
                     if screen:
-                        print('   *** Wrote to file ***   ')
\ No newline at end of file
+                        print('   *** Wrote to file ***   ')
+
+        if writer is None:
+            day_writer.close()
@@ -18,6 +18,7 @@
 import os
 
 from resspect import LightCurve
+from resspect.feature_store import DailyFeaturesWriter
 
 __all__ = ['SNPCCPhotometry']
 
@@ -29,6 +30,9 @@ class SNPCCPhotometry(object):
 
     Attributes
     ----------
+    bazin_cache: dict
+        Keywords are object ids, values are the last Bazin features
+        fitted for each object. Only used with "warm_start == True".
     bazin_header: str
         Header to be added to features files for each day.
     max_epoch: float
@@ -53,6 +57,11 @@ class SNPCCPhotometry(object):
         Selects objects with observed points until given MJD, 
         performs feature extraction and evaluate if query is possible.
         Save results to file.
+    build_all_epochs(raw_data_dir: str, days: list,
+                     time_domain_dir: str, feature_method: str,
+                     dataset: str)
+        Same as create_daily_file and build_one_epoch for a list of days,
+        reading and fitting each light curve in a single pass.
     """
     def __init__(self):
         # header is hard coded! If different telescopes, this needs to be 
@@ -61,6 +70,7 @@ class SNPCCPhotometry(object):
                             'last_rmag cost_4m cost_8m gA gB gt0 ' + \
                             'gtfall gtrise rA rB rt0 rtfall rtrise iA ' + \
                             'iB it0 itfall itrise zA zB zt0 ztfall ztrise\n'
+        self.bazin_cache = {}
         self.max_epoch = 56352
         self.min_epoch = 56171
         self.rmag_lim = 24
@@ -154,7 +164,7 @@ class SNPCCPhotometry(object):
                         queryable_criteria=1, get_cost=False,
                         tel_sizes=[4, 8], tel_names=['4m', '8m'], 
                         spec_SNR=10, fname_pattern=['day_', '.dat'],
-                        **kwargs):
+                        warm_start=False, **kwargs):
         """Fit bazin for all objects with enough points in a given day.
 
         Generate 1 file containing best-fit Bazin parameters for a given
@@ -203,6 +213,9 @@ class SNPCCPhotometry(object):
             Primary mirrors diameters of potential spectroscopic telescopes.
             Only used if "get_cost == True".
             Default is [4, 8].
+        warm_start: bool (optional)
+            If True, start each Bazin fit from the parameters previously
+            fitted for the same object (see bazin_cache). Default is False.
         kwargs: extra parameters
             Any input required by ExpTimeCalc.findexptime function.
         """
@@ -223,6 +236,9 @@ class SNPCCPhotometry(object):
 
         # count survivors
         count_surv = 0
+
+        # buffer lines, the file is only opened once per flush
+        writer = DailyFeaturesWriter()
         
         for i in range(len(lc_list)):
 
@@ -249,7 +265,8 @@ class SNPCCPhotometry(object):
 
                 # perform feature extraction
                 if feature_method == 'Bazin':
-                    lc.fit_bazin_all()
+                    lc.fit_bazin_warm(
+                        self.bazin_cache if warm_start else None)
                 else:
                     raise ValueError('Only Bazin features are implemented!')
 
@@ -260,45 +277,211 @@ class SNPCCPhotometry(object):
 
                     if screen:
                         print('... ... ... Survived: ', count_surv)
-                        
-                    # calculate r-mag today
-                    lc.queryable = lc.check_queryable(mjd=self.min_epoch + day_of_survey,
-                                       filter_lim=self.rmag_lim, 
-                                       criteria=queryable_criteria,
-                                       days_since_last_obs=days_since_obs)
-
-                    if get_cost:
-                        for k in range(len(tel_names)):
-                            lc.calc_exp_time(telescope_diam=tel_sizes[k],
-                                             telescope_name=tel_names[k],
-                                             SNR=spec_SNR, **kwargs)
-                            
-                        # see if query is possible
-                        query_flags = []
-                        for item in tel_names:
-                            if lc.exp_time[item] < 7200:
-                                query_flags.append(True)
-                            else:
-                                query_flags.append(False)
-                            
-                        lc.queryable = bool(sum(query_flags))
-                    
+
+                    line = self._get_epoch_line(
+                        lc, day_of_survey=day_of_survey,
+                        days_since_obs=days_since_obs,
+                        queryable_criteria=queryable_criteria,
+                        get_cost=get_cost, tel_sizes=tel_sizes,
+                        tel_names=tel_names, spec_SNR=spec_SNR, **kwargs)
+
                     # save features to file
-                    with open(features_file, 'a') as param_file:
-                        param_file.write(str(lc.id) + ' ' +
-                                         str(lc.redshift) + ' ' +
-                                         str(lc.sntype) + ' ')
-                        param_file.write(str(lc.sncode) + ' ' +
-                                         str(lc.sample) + ' ' +
-                                         str(lc.queryable) + ' ')
-                        param_file.write(str(lc.last_mag) + ' ')
-                        if get_cost:
-                            for k in range(len(tel_names)):
-                                param_file.write(str(lc.exp_time[tel_names[k]]) + ' ')
-                        for item in lc.bazin_features[:-1]:
-                            param_file.write(str(item) + ' ')
-                        param_file.write(str(lc.bazin_features[-1]) + '\n')
+                    writer.write(features_file, line)
+
+        writer.close()
+
+    def build_all_epochs(self, raw_data_dir: str, days: list,
+                         time_domain_dir: str, feature_method='Bazin',
+                         dataset='SNPCC', screen=False, days_since_obs=2,
+                         queryable_criteria=1, get_cost=False,
+                         tel_sizes=[4, 8], tel_names=['4m', '8m'],
+                         spec_SNR=10, fname_pattern=['day_', '.dat'],
+                         warm_start=False, max_lines=100000, **kwargs):
+        """Build features files for many days of the survey in one pass.
+
+        Produces the same files as calling create_daily_file and
+        build_one_epoch for each day, but reads each light curve only once.
+        Days are walked in increasing order and the Bazin fit is only
+        repeated on days when a new photometric point arrived. Lines are
+        buffered in a DailyFeaturesWriter and each daily file is only
+        opened once per flush.
 
+        Parameters
+        ----------
+        raw_data_dir: str
+            Complete path to raw data directory
+        days: list of int
+            Days since the beginning of survey.
+        time_domain_dir: str
+            Output directory to store time domain files.
+        dataset: str (optional)
+            Name of the data set. 
+            Only possibility is 'SNPCC'.
+        days_since_obs: int (optional)
+            Day since last observation to consider for spectroscopic
+            follow-up without the need to extrapolate light curve.
+            Only used if "queryable_criteria == 2". Default is 2. 
+        feature_method: str (optional)
+            Feature extraction method.
+            Only possibility is 'Bazin'.
+        fname_pattern: list of str (optional)
+            Pattern for time domain file names.
+            Default is ['day_', '.dat'].
+        get_cost: bool (optional)
+            If True, calculate cost of taking a spectra in the last 
+            observed photometric point. Default is False.
+        queryable_criteria: int [1 or 2] (optional)
+            Criteria to determine if an obj is queryable.
+            1 -> r-band cut on last measured photometric point.
+            2 -> last obs was further than a given limit, 
+                 use Bazin estimate of flux today. Otherwise, use
+                 the last observed point.
+            Default is 1.
+        screen: bool (optional)
+            If true, display steps info on screen. Default is False.
+        spec_SNR: float (optional)
+            SNR required for spectroscopic follow-up. Default is 10.
+        tel_names: list (optional)
+            Names of the telescopes under consideraton for spectroscopy.
+            Only used if "get_cost == True".
+            Default is ["4m", "8m"].
+        tel_sizes: list (optional)
+            Primary mirrors diameters of potential spectroscopic telescopes.
+            Only used if "get_cost == True".
+            Default is [4, 8].
+        warm_start: bool (optional)
+            If True, start each Bazin fit from the parameters previously
+            fitted for the same object (see bazin_cache). Default is False.
+        max_lines: int (optional)
+            Number of buffered lines that triggers writing to the daily
+            files. Default is 100000.
+        kwargs: extra parameters
+            Any input required by ExpTimeCalc.findexptime function.
+        """
+        if feature_method != 'Bazin':
+            raise ValueError('Only Bazin features are implemented!')
+        if dataset != 'SNPCC':
+            raise ValueError('This module only deals with ' + \
+                             'the SNPCC data set.!')
+
+        days = sorted(set(int(day) for day in days))
+
+        # write headers, this also sets the bazin_header attribute
+        for day_of_survey in days:
+            self.create_daily_file(output_dir=time_domain_dir,
+                                   day=day_of_survey, get_cost=get_cost)
+
+        # check if telescope names are ok
+        if ('cost_' + tel_names[0] not in self.bazin_header or \
+            'cost_' + tel_names[1] not in self.bazin_header) and get_cost: 
+                raise ValueError('Telescope names are hard coded in ' + \
+                                 'header.\n Change attribute ' + \
+                                 '"bazin_header" to continue!')
+
+        # read file names
+        file_list_all = os.listdir(raw_data_dir)
+        lc_list = [elem for elem in file_list_all if 'DES_SN' in elem]
+
+        features_files = dict([(day_of_survey, time_domain_dir +
+                                fname_pattern[0] + str(day_of_survey) +
+                                fname_pattern[1])
+                               for day_of_survey in days])
+        writer = DailyFeaturesWriter(max_lines=max_lines)
+
+        for i in range(len(lc_list)):
+
+            if screen:
+                print('Processed : ', i)
+
+            lc = LightCurve()
+            lc.load_snpcc_lc(raw_data_dir + lc_list[i])
+            full_photometry = lc.photometry
+            mjd = full_photometry['mjd'].values
+
+            # number of points in the last fit
+            npoints_fit = 0
+
+            for day_of_survey in days:
+                photo_flag = mjd <= day_of_survey + self.min_epoch
+                npoints = sum(photo_flag)
+
+                if npoints <= 4:
+                    continue
+
+                # the set of observed points only changes if npoints does
+                lc.photometry = full_photometry[photo_flag]
+                if npoints != npoints_fit:
+                    lc.fit_bazin_warm(
+                        self.bazin_cache if warm_start else None)
+                    npoints_fit = npoints
+
+                if len(lc.bazin_features) > 0 and \
+                        'None' not in lc.bazin_features:
+                    line = self._get_epoch_line(
+                        lc, day_of_survey=day_of_survey,
+                        days_since_obs=days_since_obs,
+                        queryable_criteria=queryable_criteria,
+                        get_cost=get_cost, tel_sizes=tel_sizes,
+                        tel_names=tel_names, spec_SNR=spec_SNR, **kwargs)
+                    writer.write(features_files[day_of_survey], line)
+
+        writer.close()
+
+    def _get_epoch_line(self, lc: LightCurve, day_of_survey: int,
+                        days_since_obs=2, queryable_criteria=1,
+                        get_cost=False, tel_sizes=[4, 8],
+                        tel_names=['4m', '8m'], spec_SNR=10, **kwargs):
+        """Evaluate if query is possible and build one features line.
+
+        Parameters
+        ----------
+        lc: LightCurve
+            Light curve with photometry up to day_of_survey and 
+            Bazin features already fitted.
+        day_of_survey: int
+            Day since the beginning of survey.
+        other parameters
+            See build_one_epoch.
+
+        Returns
+        -------
+        line: str
+            A line concatenating metadata and Bazin fits for 1 obj.
+        """
+        # calculate r-mag today
+        lc.queryable = lc.check_queryable(mjd=self.min_epoch + day_of_survey,
+                                          filter_lim=self.rmag_lim, 
+                                          criteria=queryable_criteria,
+                                          days_since_last_obs=days_since_obs)
+
+        if get_cost:
+            for k in range(len(tel_names)):
+                lc.calc_exp_time(telescope_diam=tel_sizes[k],
+                                 telescope_name=tel_names[k],
+                                 SNR=spec_SNR, **kwargs)
+
+            # see if query is possible
+            query_flags = []
+            for item in tel_names:
+                if lc.exp_time[item] < 7200:
+                    query_flags.append(True)
+                else:
+                    query_flags.append(False)
+
+            lc.queryable = bool(sum(query_flags))
+
+        line = str(lc.id) + ' ' + str(lc.redshift) + ' ' + \
+               str(lc.sntype) + ' ' + str(lc.sncode) + ' ' + \
+               str(lc.sample) + ' ' + str(lc.queryable) + ' ' + \
+               str(lc.last_mag) + ' '
+        if get_cost:
+            for k in range(len(tel_names)):
+                line = line + str(lc.exp_time[tel_names[k]]) + ' '
+        for item in lc.bazin_features[:-1]:
+            line = line + str(item) + ' '
+        line = line + str(lc.bazin_features[-1]) + '\n'
+
+        return line
 
 
 def main():
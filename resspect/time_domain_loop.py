@@ -75,6 +75,80 @@ def load_dataset(fname: str, survey='DES',
     return data
 
 
+def _update_with_tomorrow(data: DataBase, data_tomorrow: DataBase,
+                         ini_train_ids: np.array):
+    """Reconcile the training sample with the features for next day.
+
+    Training objects, except those in the initial training, which are
+    observed again get tomorrow's features in the training and queried
+    samples. All training objects are removed from tomorrow's pool,
+    test and validation samples.
+
+    Parameters
+    ----------
+    data: resspect.DataBase
+        Current samples, training and queried samples are updated.
+    data_tomorrow: resspect.DataBase
+        Samples for next day, pool, test and validation are updated.
+    ini_train_ids: np.array
+        Ids of objects in the initial training sample.
+    """
+    id_name = data.identify_keywords()
+
+    train_ids = data.train_metadata[id_name].values
+    indx_tomorrow = data_tomorrow.locate_ids('pool', train_ids)
+    update_flag = np.logical_and(indx_tomorrow >= 0,
+                                 ~pd.Series(train_ids).isin(ini_train_ids).values)
+
+    if np.any(update_flag):
+        new_indx = indx_tomorrow[update_flag]
+        new_metadata = data_tomorrow.pool_metadata.iloc[new_indx]
+        new_features = data_tomorrow.pool_features[new_indx]
+        new_labels = data_tomorrow.pool_labels[new_indx]
+
+        if data.queryable_ids.shape[0] > 0:
+            # build query data frame
+            full_header = ['epoch'] + data.metadata_names + data.features_names
+            queried_sample = pd.DataFrame(data.queried_sample,
+                                          columns=full_header)
+
+            # get first index of each object in the queried sample
+            first_flag = ~queried_sample[id_name].duplicated(keep='first').values
+            first_ids = pd.Index(queried_sample[id_name].values[first_flag])
+            indx_queried = first_ids.get_indexer(train_ids[update_flag])
+            if np.any(indx_queried < 0):
+                raise ValueError('Training object ',
+                                 train_ids[update_flag][indx_queried < 0][0],
+                                 ' not found in queried sample!')
+            indx_queried = np.flatnonzero(first_flag)[indx_queried]
+
+            # replace old features, keeping the query epoch
+            obj_epoch = queried_sample['epoch'].values[indx_queried]
+            new_query = pd.DataFrame([[epoch] + list(header) + list(features)
+                                      for epoch, header, features in
+                                      zip(obj_epoch, new_metadata.values,
+                                          new_features)],
+                                     columns=full_header)
+            queried_sample = queried_sample.drop(queried_sample.index[indx_queried])
+            queried_sample = pd.concat([queried_sample, new_query], axis=0,
+                                       ignore_index=True)
+            data.queried_sample = list(queried_sample.values)
+
+        # move updated objects to the end of the training sample
+        keep_flag = ~update_flag
+        data.train_metadata = pd.concat([data.train_metadata[keep_flag],
+                                         new_metadata],
+                                        axis=0, ignore_index=True)
+        data.train_features = np.append(data.train_features[keep_flag],
+                                        new_features, axis=0)
+        data.train_labels = np.append(data.train_labels[keep_flag],
+                                      new_labels, axis=0)
+
+    # remove training objects from other samples
+    data_tomorrow.remove_ids(train_ids,
+                             samples=('pool', 'test', 'validation'))
+
+
 def time_domain_loop(days: list,  output_metrics_file: str,
                      output_queried_file: str,
                      path_to_features_dir: str, strategy: str,
@@ -86,8 +160,9 @@ def time_domain_loop(days: list,  output_metrics_file: str,
                      path_to_queried="", queryable=True,
                      query_thre=1.0, save_samples=False, sep_files=False,
                      screen=True, survey='LSST', initial_training='original',
-                     save_full_query=False,
-                    **kwargs):
+                     save_full_query=False, warm_start=False,
+                     queryable_only=False, n_replace=None, window=None,
+                     **kwargs):
     """Perform the active learning loop. All results are saved to file.
 
     Parameters
@@ -167,6 +242,21 @@ def time_domain_loop(days: list,  output_metrics_file: str,
     output_fname: str (optional)
         Complete path to output file where initial training will be stored.
         Only used if save_samples == True.
+    warm_start: bool (optional)
+        If True, update the classifier of the previous night with the newly
+        queried objects instead of training a new one. Only used if
+        clf_bootstrap is False. Default is False.
+    n_replace: int (optional)
+        Number of trees replaced or boosting rounds added by each warm
+        update, see DataBase.classify. Default is None.
+    window: int (optional)
+        Number of training objects used by each warm update, see
+        DataBase.classify. Default is None.
+    queryable_only: bool (optional)
+        If True, only classify queryable objects of the pool each night,
+        metrics are still computed on the validation sample. Only
+        'RandomSampling' accepts query_thre < 1 in this case.
+        Default is False.
     """
 
     # load features for the first obs day
@@ -219,8 +309,8 @@ def time_domain_loop(days: list,  output_metrics_file: str,
     ini_train_ids = data.train_metadata[id_name].values
 
     # remove repeated ids
-    rep_ids_flag = np.array([item in data.train_metadata[id_name].values
-                            for item in first_loop.pool_metadata[id_name].values])
+    rep_ids_flag = data.locate_ids('train',
+                                   first_loop.pool_metadata[id_name].values) >= 0
 
     first_loop.pool_metadata = first_loop.pool_metadata[~rep_ids_flag]
     first_loop.pool_features = first_loop.pool_features[~rep_ids_flag]
@@ -283,9 +373,14 @@ def time_domain_loop(days: list,  output_metrics_file: str,
 
             # classify
             if clf_bootstrap:
-                data.classify_bootstrap(method=classifier, screen=screen, **kwargs)
+                data.classify_bootstrap(method=classifier, screen=screen,
+                                        queryable_only=queryable_only,
+                                        **kwargs)
             else:
-                data.classify(method=classifier, screen=screen, **kwargs)
+                data.classify(method=classifier, screen=screen,
+                              warm_start=warm_start,
+                              queryable_only=queryable_only,
+                              n_replace=n_replace, window=window, **kwargs)
 
             # calculate metrics
             data.evaluate_classification(screen=screen)
@@ -303,7 +398,12 @@ def time_domain_loop(days: list,  output_metrics_file: str,
 
                 if screen:
                     print('\n queried obj index: ', indx)
-                    print('Prob [nIa, Ia]: ', data.classprob[indx[0]])
+                    if data.classprob_rows is None:
+                        prob_indx = indx[0]
+                    else:
+                        prob_indx = np.flatnonzero(data.classprob_rows ==
+                                                   indx[0])[0]
+                    print('Prob [nIa, Ia]: ', data.classprob[prob_indx])
                     print('size of pool: ', data.pool_metadata.shape[0], '\n')
 
                 # update training and test samples
@@ -351,91 +451,7 @@ def time_domain_loop(days: list,  output_metrics_file: str,
                               initial_training=0,
                               ia_frac=ia_frac, queryable=queryable)
 
-            for obj in data.train_metadata[id_name].values:
-                if obj in data_tomorrow.pool_metadata[id_name].values:
-
-                    indx_tomorrow = list(data_tomorrow.pool_metadata[id_name].values).index(obj)
-
-                    if obj not in ini_train_ids:
-                        # remove old features from training
-                        indx_today = list(data.train_metadata[id_name].values).index(obj)
-
-                        flag1 = data.train_metadata[id_name].values == obj
-                        data.train_metadata = data.train_metadata.drop(data.train_metadata.index[indx_today])
-                        data.train_labels = np.delete(data.train_labels, indx_today, axis=0)
-                        data.train_features = np.delete(data.train_features, indx_today, axis=0)
-                        
-                        if data.queryable_ids.shape[0] > 0:
-                            # get number of queried objects
-                            n = np.array(data.queried_sample).shape[0] * np.array(data.queried_sample).shape[1]
-                            
-                            # build query data frame
-                            full_header = ['epoch'] + data.metadata_names + data.features_names
-                            queried_sample = pd.DataFrame(data.queried_sample,
-                                                          columns=full_header)
-                        
-                            # get object index in the queried sample
-                            indx_queried = list(queried_sample[id_name].values).index(obj)
-                        
-                            # get flag to isolate object in question
-                            flag2 = queried_sample[id_name].values == obj
-                        
-                            # get object epoch in the queried sample
-                            obj_epoch = queried_sample['epoch'].values[flag2]
-                        
-                            # remove old features from queried
-                            queried_sample = queried_sample.drop(queried_sample.index[indx_queried])
-                        
-                        # update new features of the training with new obs
-                        flag = data_tomorrow.pool_metadata[id_name].values == obj
-                        
-                        if data.queryable_ids.shape[0] > 0:
-                            
-                            # update new features in the queried sample
-                            l1 = [obj_epoch[0]] + list(data_tomorrow.pool_metadata[flag].values[0]) + \
-                                 list(data_tomorrow.pool_features[flag][0])
-                            new_query = pd.DataFrame([l1], columns=full_header)
-                            queried_sample = pd.concat([queried_sample, new_query], axis=0,
-                                                        ignore_index=True)
-                        
-                            # update queried sample
-                            data.queried_sample = list(queried_sample.values)
-
-                        data.train_metadata = pd.concat([data.train_metadata,
-                                                         data_tomorrow.pool_metadata[flag]],
-                                                         axis=0, ignore_index=True)
-                        data.train_features = np.append(data.train_features,
-                                                        data_tomorrow.pool_features[flag], axis=0)
-                        data.train_labels = np.append(data.train_labels,
-                                                      data_tomorrow.pool_labels[flag], axis=0)
-                        
-                    # remove obj from pool sample
-                    data_tomorrow.pool_metadata = data_tomorrow.pool_metadata.drop(\
-                                             data_tomorrow.pool_metadata.index[indx_tomorrow])
-                    data_tomorrow.pool_labels = np.delete(data_tomorrow.pool_labels, indx_tomorrow, axis=0)
-                    data_tomorrow.pool_features = np.delete(data_tomorrow.pool_features, indx_tomorrow, axis=0)
-
-                # remove object from other samples
-                if len(data_tomorrow.validation_metadata) > 0 and  obj in data_tomorrow.validation_metadata[id_name].values:
-                    indx_val =  list(data_tomorrow.validation_metadata[id_name].values).index(obj)
-
-                    data_tomorrow.validation_metadata = data_tomorrow.validation_metadata.drop(\
-                                             data_tomorrow.validation_metadata.index[indx_val])
-                    data_tomorrow.validation_labels = np.delete(data_tomorrow.validation_labels,
-                                                                indx_val, axis=0)
-                    data_tomorrow.validation_features = np.delete(data_tomorrow.validation_features,
-                                                                  indx_val, axis=0)
-
-                if len(data_tomorrow.test_metadata) > 0 and obj in data_tomorrow.test_metadata[id_name].values:
-                    indx_test = list(data_tomorrow.test_metadata[id_name].values).index(obj)
-
-                    data_tomorrow.test_metadata = data_tomorrow.test_metadata.drop(\
-                                             data_tomorrow.test_metadata.index[indx_test])
-                    data_tomorrow.test_labels = np.delete(data_tomorrow.test_labels,
-                                                                indx_test, axis=0)
-                    data_tomorrow.test_features = np.delete(data_tomorrow.test_features,
-                                                                  indx_test, axis=0)
-
+            _update_with_tomorrow(data, data_tomorrow, ini_train_ids)
 
             # use new data
             data.pool_metadata = data_tomorrow.pool_metadata
@@ -29,6 +29,7 @@ setuptools.setup(
                 'resspect/classifiers',
                 'resspect/database',
                 'resspect/exposure_time_calculator',
+                'resspect/feature_store',
                 'resspect/cosmo_metric_utils',
                 'resspect/fit_lightcurves',
                 'resspect/learn_loop',
@@ -36,6 +37,7 @@ setuptools.setup(
                 'resspect/plot_results',
                 'resspect/query_strategies',
                 'resspect/salt3_utils',
+                'resspect/sample_partitions',
                 'resspect/snana_fits_to_pd',
                 'resspect/time_domain_SNPCC',
                 'resspect/time_domain_PLAsTiCC'],